@@ -332,10 +332,11 @@ def _build_completion_message(dur_str: str) -> str:
 
 
 def _resolve_symbols_auto(settings: dict) -> list[str]:
-    """Auto-detect symbols: scan CSV cache files first, fall back to active_strategies."""
+    """Auto-detect symbols: scan OHLCV cache files first, fall back to active_strategies."""
     import glob as _glob
-    # Try to find cached OHLCV files (e.g. BTC-USDT-USDT_15m.csv)
-    files = _glob.glob(os.path.join(CACHE_DIR, '*-USDT-USDT_*.csv'))
+    # Try to find cached OHLCV files (e.g. BTC-USDT-USDT_15m.npy or legacy .csv)
+    files = (_glob.glob(os.path.join(CACHE_DIR, '*-USDT-USDT_*.npy')) +
+             _glob.glob(os.path.join(CACHE_DIR, '*-USDT-USDT_*.csv')))
     found = set()
     for f in files:
         m = re.search(r'([A-Z0-9]+)-USDT-USDT_', os.path.basename(f))
@@ -49,44 +49,29 @@ else
     OPTIM_MODE_ARG="best_profit"; read -p "Max Drawdown % [Standard: 30]: " MAX_DD; MAX_DD=${MAX_DD:-30}; MIN_WR=0; MIN_PNL=-99999
 fi
 
-for symbol in $SYMBOLS; do
-    for timeframe in $TIMEFRAMES; do
+# 'a' = Rückblick je Zeitfenster (5m/15m=60d, 30m/1h=365d, 2h/4h=730d, 6h/1d=1095d) im Optimierer
+if [ "$START_DATE_INPUT" == "a" ]; then
+    FINAL_START_DATE="auto"
+else
+    FINAL_START_DATE=$START_DATE_INPUT
+fi
 
-        # *** HIER WIRD DAS STARTDATUM BERECHNET (FALLS 'a') ***
-        if [ "$START_DATE_INPUT" == "a" ]; then
-             lookback_days=365 # Standard-Fallback
-             case "$timeframe" in 
-                 5m|15m) lookback_days=60 ;; 
-                 30m|1h) lookback_days=365 ;; 
-                 2h|4h) lookback_days=730 ;; 
-                 6h|1d) lookback_days=1095 ;; 
-             esac
-             # Berechne das Startdatum basierend auf dem Lookback
-             FINAL_START_DATE=$(date -d "$lookback_days days ago" +%F)
-             echo -e "${YELLOW}INFO: Automatisches Startdatum für $timeframe (${lookback_days} Tage Rückblick) gesetzt auf: $FINAL_START_DATE${NC}"
-        else
-             FINAL_START_DATE=$START_DATE_INPUT
-        fi
-        # *** ENDE DATUMSBRECHNUNG ***
+echo -e "\n${BLUE}=======================================================${NC}";
+echo -e "${BLUE}  Bearbeite Pipeline für: $SYMBOLS ($TIMEFRAMES)${NC}";
+echo -e "${BLUE}  Datenzeitraum: $FINAL_START_DATE bis $END_DATE${NC}";
+echo -e "${BLUE}=======================================================${NC}"
 
-        echo -e "\n${BLUE}=======================================================${NC}";
-        echo -e "${BLUE}  Bearbeite Pipeline für: $symbol ($timeframe)${NC}";
-        # *** Angepasst: Zeige das finale Startdatum an ***
-        echo -e "${BLUE}  Datenzeitraum: $FINAL_START_DATE bis $END_DATE${NC}";
-        echo -e "${BLUE}=======================================================${NC}"
+# Alle Paare in einem Aufruf: der Optimierer verteilt die CPU-Kerne selbst auf die Paare
+echo -e "\n${GREEN}>>> Starte SMC-Optimierung...${NC}"
+python3 "$OPTIMIZER" --symbols "$SYMBOLS" --timeframes "$TIMEFRAMES" \
+    --start_date "$FINAL_START_DATE" --end_date "$END_DATE" \
+    --jobs "$N_CORES" --max_drawdown "$MAX_DD" \
+    --start_capital "$START_CAPITAL" --min_win_rate "$MIN_WR" \
+    --trials "$N_TRIALS" --min_pnl "$MIN_PNL" --mode "$OPTIM_MODE_ARG"
 
-        echo -e "\n${GREEN}>>> Starte SMC-Optimierung für $symbol ($timeframe)...${NC}"
-        python3 "$OPTIMIZER" --symbols "$symbol" --timeframes "$timeframe" \
-            --start_date "$FINAL_START_DATE" --end_date "$END_DATE" \
-            --jobs "$N_CORES" --max_drawdown "$MAX_DD" \
-            --start_capital "$START_CAPITAL" --min_win_rate "$MIN_WR" \
-            --trials "$N_TRIALS" --min_pnl "$MIN_PNL" --mode "$OPTIM_MODE_ARG"
-        
-        if [ $? -ne 0 ]; then
-            echo -e "${RED}Fehler im Optimierer für $symbol ($timeframe). Überspringe...${NC}";
-        fi
-    done
-done
+if [ $? -ne 0 ]; then
+    echo -e "${RED}Fehler im Optimierer.${NC}";
+fi
 
 deactivate
 echo -e "\n${BLUE}✔ Alle Pipeline-Aufgaben erfolgreich abgeschlossen!${NC}"
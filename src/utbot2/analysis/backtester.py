@@ -12,13 +12,28 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
 from utbot2.utils.exchange import Exchange
+from utbot2.utils.ohlcv_cache import (BINARY_SUFFIX, CSV_SUFFIX, cache_time_range, merge_ohlcv_cache,
+                                      read_cache_meta, read_csv_cache, read_ohlcv_cache, write_cache_meta,
+                                      write_ohlcv_cache)
+from utbot2.analysis.indicator_cache import dataset_fingerprint, indicator_cache
 from utbot2.strategy.ichimoku_engine import IchimokuEngine
 from utbot2.strategy.supertrend_engine import SupertrendEngine  # NEU: Supertrend für MTF
-from utbot2.strategy.trade_logic import get_titan_signal
-from utbot2.utils.timeframe_utils import determine_htf
+from utbot2.strategy.trade_logic import get_titan_signals
+from utbot2.utils.timeframe_utils import determine_htf, timeframe_to_minutes
 
 secrets_cache = None
-htf_cache = {}  # Cache für HTF-Daten um wiederholtes Laden zu vermeiden
+
+# Bei jeder Änderung an Signal- oder Trade-Logik erhöhen (invalidiert den Ergebnis-Cache)
+BACKTEST_ENGINE_VERSION = "2"
+
+# Handelsannahmen (simulate_trades und population_backtester)
+FEE_PCT = 0.05 / 100
+ABSOLUTE_MAX_NOTIONAL_VALUE = 1000000
+MAX_ALLOWED_EFFECTIVE_LEVERAGE = 10
+
+def _utc_now():
+    return pd.Timestamp.now(tz='UTC')
+
 
 class Bias:
     BULLISH = "BULLISH"
@@ -30,21 +45,47 @@ def load_data(symbol, timeframe, start_date_str, end_date_str):
     data_dir = os.path.join(PROJECT_ROOT, 'data')
     cache_dir = os.path.join(data_dir, 'cache')
     symbol_filename = symbol.replace('/', '-').replace(':', '-')
-    cache_file = os.path.join(cache_dir, f"{symbol_filename}_{timeframe}.csv")
+    cache_base = os.path.join(cache_dir, f"{symbol_filename}_{timeframe}")
+    cache_file = cache_base + BINARY_SUFFIX
+    csv_cache_file = cache_base + CSV_SUFFIX
     
     try:
         if not os.path.exists(data_dir): os.makedirs(data_dir)
         os.makedirs(cache_dir, exist_ok=True)
     except OSError: return pd.DataFrame()
 
+    req_start = pd.to_datetime(start_date_str, utc=True); req_end = pd.to_datetime(end_date_str, utc=True)
+
+    # CSV-Fallback: alte CSV-Caches einmalig ins Binärformat überführen
+    if not os.path.exists(cache_file) and os.path.exists(csv_cache_file):
+        try:
+            data = read_csv_cache(csv_cache_file)
+            try:
+                write_ohlcv_cache(data[~data.index.duplicated(keep='first')].sort_index(), cache_file)
+            except Exception:
+                if data.index.min() <= req_start and data.index.max() >= req_end:
+                    return data.loc[req_start:req_end]
+        except Exception:
+            try: os.remove(csv_cache_file)
+            except OSError: pass
+
+    data_start = data_end = None
+    # Früheste Kerze, die die Börse überhaupt liefert (Listing); davor wird nicht erneut abgefragt
+    first_available = read_cache_meta(cache_file).get('first_available')
+    first_available = pd.to_datetime(first_available, utc=True) if first_available else None
     if os.path.exists(cache_file):
         try:
-            data = pd.read_csv(cache_file, index_col='timestamp', parse_dates=True)
-            data_start = data.index.min(); data_end = data.index.max()
-            req_start = pd.to_datetime(start_date_str, utc=True); req_end = pd.to_datetime(end_date_str, utc=True)
-            if data_start <= req_start and data_end >= req_end:
-                return data.loc[req_start:req_end]
+            data_start, data_end = cache_time_range(cache_file)
+            head_covered = data_start is not None and (
+                data_start <= req_start or (first_available is not None and data_start <= first_available))
+            # Offene Kerzen werden nie gespeichert -> der Tail ist gedeckt, sobald bis
+            # min(req_end + Kerze, jetzt) keine weitere Kerze geschlossen sein kann
+            candle = pd.Timedelta(minutes=timeframe_to_minutes(timeframe) or 1)
+            tail_covered = data_start is not None and data_end + 2 * candle > min(req_end + candle, _utc_now())
+            if head_covered and tail_covered:
+                return read_ohlcv_cache(cache_file, req_start, req_end)
         except Exception:
+            data_start = data_end = None
             try: os.remove(cache_file)
             except OSError: pass
 
@@ -59,80 +100,279 @@ def load_data(symbol, timeframe, start_date_str, end_date_str):
         
         exchange = Exchange(api_setup)
         if not exchange.markets: return pd.DataFrame()
-        
-        full_data = exchange.fetch_historical_ohlcv(symbol, timeframe, start_date_str, end_date_str)
-        if not full_data.empty:
-            full_data.to_csv(cache_file)
-            req_start_dt = pd.to_datetime(start_date_str, utc=True)
-            req_end_dt = pd.to_datetime(end_date_str, utc=True)
-            return full_data.loc[req_start_dt:req_end_dt]
-        return pd.DataFrame()
+
+        fetch_start = pd.to_datetime(start_date_str + 'T00:00:00Z', utc=True)
+        fetch_end = pd.to_datetime(end_date_str + 'T23:59:59Z', utc=True)
+
+        if data_start is None:
+            full_data = drop_unclosed_candles(
+                exchange.fetch_historical_ohlcv(symbol, timeframe, start_date_str, end_date_str), timeframe)
+            if not full_data.empty:
+                write_ohlcv_cache(full_data, cache_file)
+                if full_data.index.min() > fetch_start:
+                    write_cache_meta(cache_file, first_available=full_data.index.min().isoformat())
+                return full_data.loc[req_start:req_end]
+            return pd.DataFrame()
+
+        # Nur die fehlenden Ränder nachladen; offene Kerzen werden nie gespeichert, gecachte
+        # Kerzen sind also final und werden nicht erneut abgerufen
+        for gap_start, gap_end in missing_cache_ranges(data_start, data_end, fetch_start, fetch_end, timeframe,
+                                                       first_available):
+            gap_data = drop_unclosed_candles(exchange.fetch_ohlcv_range(symbol, timeframe, gap_start, gap_end), timeframe)
+            if not gap_data.empty:
+                merge_ohlcv_cache(gap_data, cache_file)
+            if gap_end < data_start:
+                # Head-Lücke: vor der ersten gelieferten Kerze hat die Börse keine Daten
+                listing = gap_data.index.min() if not gap_data.empty else data_start
+                if listing > gap_start:
+                    write_cache_meta(cache_file, first_available=listing.isoformat())
+        return read_ohlcv_cache(cache_file, req_start, req_end)
     except Exception: return pd.DataFrame()
 
 
-def run_backtest(data, strategy_params, risk_params, start_capital=1000, verbose=False):
-    global htf_cache
-    
-    if data.empty or len(data) < 52:
-        return {"total_pnl_pct": -100, "trades_count": 0, "win_rate": 0, "max_drawdown_pct": 1.0, "end_capital": start_capital}
+def missing_cache_ranges(data_start, data_end, fetch_start, fetch_end, timeframe, first_available=None, now=None):
+    """
+    Zeiträume [von, bis] (Eröffnungszeiten), die vor bzw. nach dem gecachten Block
+    [data_start, data_end] fehlen, um [fetch_start, fetch_end] abzudecken.
+
+    Der Tail-Bereich beginnt nach der letzten gecachten Kerze und entfällt, solange
+    bis `now` (Default: jetzt, UTC) keine neue Kerze geschlossen sein kann. Beginnt
+    der Cache bereits bei `first_available` (früheste Kerze der Börse), entfällt
+    der Head-Bereich.
+    """
+    tf_minutes = timeframe_to_minutes(timeframe) or 1
+    candle = pd.Timedelta(minutes=tf_minutes)
+    now = _utc_now() if now is None else now
+    ranges = []
+    head_exhausted = first_available is not None and data_start <= first_available
+    if fetch_start < data_start and not head_exhausted:
+        ranges.append((fetch_start, data_start - pd.Timedelta(milliseconds=1)))
+    if fetch_end >= data_end + candle and now >= data_end + 2 * candle:
+        ranges.append((data_end + candle, fetch_end))
+    return ranges
+
+
+def drop_unclosed_candles(df, timeframe, now=None):
+    """Entfernt Kerzen, die zum Zeitpunkt `now` (Default: jetzt, UTC) noch nicht geschlossen sind."""
+    if df is None or df.empty:
+        return df if df is not None else pd.DataFrame()
+    tf_minutes = timeframe_to_minutes(timeframe) or 1
+    now = _utc_now() if now is None else now
+    closes = pd.DatetimeIndex(df.index) + pd.Timedelta(minutes=tf_minutes)
+    return df[closes <= now]
+
+
+def align_htf_positions(ltf_index, htf_index, timeframe=None, htf=None):
+    """
+    Ordnet jeder LTF-Kerze die Position der letzten bereits ABGESCHLOSSENEN HTF-Kerze zu.
+
+    Beide Indizes enthalten Eröffnungszeiten. Eine HTF-Kerze (Open t) ist erst
+    bei Schluss t + htf verfügbar; ein LTF-Signal entsteht beim Schluss der
+    LTF-Kerze (ts + timeframe). Sind die Timeframes unbekannt, wird wie früher
+    nach Eröffnungszeit (asof) zugeordnet.
 
+    Returns:
+        np.ndarray (int64): Position in `htf_index` oder -1, falls keine HTF-Kerze verfügbar ist
+    """
+    ltf_minutes = timeframe_to_minutes(timeframe) if timeframe else None
+    htf_minutes = timeframe_to_minutes(htf) if htf else None
+    ltf_close = ltf_index
+    htf_close = htf_index
+    if ltf_minutes and htf_minutes:
+        ltf_close = ltf_index + pd.Timedelta(minutes=ltf_minutes)
+        htf_close = htf_index + pd.Timedelta(minutes=htf_minutes)
+    return np.searchsorted(htf_close.values, ltf_close.values, side='right').astype(np.int64) - 1
+
+
+def build_htf_bias(ltf_index, htf_processed, timeframe=None, htf=None):
+    """
+    Supertrend-Bias der HTF als int8-Array, ausgerichtet auf den LTF-Index.
+
+    Returns:
+        np.ndarray (int8): 1 = BULLISH, -1 = BEARISH, 0 = NEUTRAL
+    """
+    bias = np.zeros(len(ltf_index), dtype=np.int8)
+    if htf_processed is None or htf_processed.empty or 'supertrend_direction' not in htf_processed.columns:
+        return bias
+
+    direction = htf_processed['supertrend_direction'].to_numpy(dtype=np.float64)
+    positions = align_htf_positions(ltf_index, htf_processed.index, timeframe, htf)
+    available = positions >= 0
+    aligned = direction[positions[available]]
+    bias[available] = np.where(aligned == 1, 1, np.where(aligned == -1, -1, 0))
+    return bias
+
+
+def compute_signal_vector(processed_data, params_for_logic, htf_bias=None):
+    """
+    Berechnet das Einstiegssignal (inkl. MTF-Bias) für jede Kerze genau einmal.
+
+    Returns:
+        np.ndarray (int8): 1 = buy, -1 = sell, 0 = kein Signal
+    """
+    return get_titan_signals(processed_data, params_for_logic, htf_bias)
+
+
+def add_atr(data):
+    """Ergänzt die ATR(14) für die SL-Berechnung und entfernt die Anlaufphase (in-place)."""
+    atr_indicator = ta.volatility.AverageTrueRange(high=data['high'], low=data['low'], close=data['close'], window=14)
+    data['atr'] = atr_indicator.average_true_range()
+    data.dropna(subset=['atr'], inplace=True)
+    return data
+
+
+def load_htf_data(strategy_params, data_start, data_end):
+    """
+    Rohe HTF-Daten für [data_start, data_end] (Zeitraum der LTF-Rohdaten) samt
+    Fingerprint, beides über indicator_cache.
+
+    Returns:
+        (DataFrame, str) oder (None, None), wenn keine eigene HTF konfiguriert ist
+        bzw. keine Daten geladen werden konnten
+    """
     symbol = strategy_params.get('symbol', '')
     timeframe = strategy_params.get('timeframe', '')
     htf = strategy_params.get('htf')
+    if not htf or htf == timeframe:
+        return None, None
+
+    # Rohe HTF-Daten hängen nur von Symbol und Zeitraum ab
+    htf_start = data_start.strftime('%Y-%m-%d')
+    htf_end = data_end.strftime('%Y-%m-%d')
+    raw_cache_key = ('htf_raw', symbol, htf, htf_start, htf_end)
+    htf_data = indicator_cache.get(raw_cache_key)
+    if htf_data is None:
+        htf_data = load_data(symbol, htf, htf_start, htf_end)
+        if not htf_data.empty:
+            indicator_cache.put(raw_cache_key, htf_data)
+    if htf_data is None or htf_data.empty:
+        return None, None
+    htf_fingerprint = indicator_cache.get_or_compute(raw_cache_key + ('fingerprint',), lambda: dataset_fingerprint(htf_data))
+    return htf_data, htf_fingerprint
+
 
-    # --- HTF Daten laden und Supertrend berechnen für MTF-Filter ---
+def compute_htf_bias(ltf_index, strategy_params, data_start, data_end):
+    """
+    Lädt die HTF-Daten für [data_start, data_end] (Zeitraum der Rohdaten), berechnet
+    den Supertrend (beides über indicator_cache) und liefert den Bias ausgerichtet
+    auf `ltf_index`.
+
+    Returns:
+        np.ndarray (int8): 1 = BULLISH, -1 = BEARISH, 0 = NEUTRAL (ohne HTF überall 0)
+    """
     htf_processed = None
-    if htf and htf != timeframe:
-        # Cache-Key für rohe HTF-Daten (ohne Supertrend-Params, da die OHLCV gleich bleiben)
-        raw_cache_key = f"{symbol}_{htf}_{data.index.min().strftime('%Y%m%d')}_{data.index.max().strftime('%Y%m%d')}_raw"
-        
+    htf_data, htf_fingerprint = load_htf_data(strategy_params, data_start, data_end)
+    if htf_data is not None:
         # Supertrend-Settings
         st_atr = strategy_params.get('supertrend_atr_period', 10)
         st_mult = strategy_params.get('supertrend_multiplier', 3.0)
-        
-        # Cache-Key für verarbeitete Daten (inkl. Supertrend-Params)
-        processed_cache_key = f"{raw_cache_key}_{st_atr}_{st_mult}"
-        
-        if processed_cache_key in htf_cache:
-            # Verarbeitete HTF-Daten aus Cache nutzen
-            htf_processed = htf_cache[processed_cache_key]
-        else:
-            # Rohe HTF-Daten aus Cache oder laden
-            if raw_cache_key in htf_cache:
-                htf_data = htf_cache[raw_cache_key]
-            else:
-                htf_data = load_data(symbol, htf, data.index.min().strftime('%Y-%m-%d'), data.index.max().strftime('%Y-%m-%d'))
-                if not htf_data.empty:
-                    htf_cache[raw_cache_key] = htf_data.copy()
-            
-            if htf_data is not None and not htf_data.empty:
-                supertrend_settings = {
-                    'supertrend_atr_period': st_atr,
-                    'supertrend_multiplier': st_mult
-                }
-                htf_engine = SupertrendEngine(settings=supertrend_settings)
-                htf_processed = htf_engine.process_dataframe(htf_data.copy())
-                # Verarbeitete Daten in Cache speichern
-                htf_cache[processed_cache_key] = htf_processed
-
-    # --- ATR Berechnung ---
-    try:
-        atr_indicator = ta.volatility.AverageTrueRange(high=data['high'], low=data['low'], close=data['close'], window=14)
-        data['atr'] = atr_indicator.average_true_range()
-        data.dropna(subset=['atr'], inplace=True)
-    except Exception:
-        return {"total_pnl_pct": -100, "end_capital": start_capital}
+        supertrend_settings = {
+            'supertrend_atr_period': st_atr,
+            'supertrend_multiplier': st_mult
+        }
+        htf_processed = indicator_cache.get_or_compute(
+            ('supertrend', htf_fingerprint, st_atr, st_mult),
+            lambda: SupertrendEngine(settings=supertrend_settings).process_dataframe(htf_data.copy())
+        )
+
+    return build_htf_bias(ltf_index, htf_processed, strategy_params.get('timeframe', ''), strategy_params.get('htf'))
+
 
-    # --- Ichimoku Engine ---
-    engine = IchimokuEngine(settings=strategy_params)
-    processed_data = engine.process_dataframe(data)
+def run_backtest(data, strategy_params, risk_params, start_capital=1000, verbose=False, processed_data=None,
+                 abort_max_drawdown=None, abort_capital_floor=None, checkpoints=None, on_checkpoint=None,
+                 entry_signals=None):
+    """
+    Backtest einer Ichimoku-Strategie mit Supertrend-MTF-Filter.
 
+    `processed_data` kann einen bereits mit ATR und Ichimoku angereicherten Frame
+    enthalten (z.B. IchimokuBatch über add_atr(data)); dann wird die
+    Indikatorberechnung übersprungen und `data` nicht verändert.
+
+    `entry_signals` (int8 pro Kerze von `processed_data`, inkl. MTF-Bias) ersetzt
+    die Signalberechnung komplett; `processed_data` braucht dann nur OHLC und ATR.
+    So simulieren Trials, die nur Risiko-Parameter ändern, allein die Ausstiege.
+
+    `abort_max_drawdown` / `abort_capital_floor` beenden die Simulation vorzeitig,
+    sobald die Schwelle verletzt ist (siehe simulate_trades, Ergebnis mit 'aborted').
+    `checkpoints` / `on_checkpoint` melden Zwischenstände an Kerzen-Indizes von
+    `processed_data` (z.B. für Optuna-Pruning nach jedem Zeitabschnitt).
+    """
+    if data.empty or len(data) < 52:
+        return {"total_pnl_pct": -100, "trades_count": 0, "win_rate": 0, "max_drawdown_pct": 1.0, "end_capital": start_capital}
+    # HTF-Zeitraum vor add_atr bestimmen (entfernt die Anlaufphase in-place)
+    data_start, data_end = data.index.min(), data.index.max()
+
+    if processed_data is None:
+        # --- ATR Berechnung ---
+        try:
+            add_atr(data)
+        except Exception:
+            return {"total_pnl_pct": -100, "end_capital": start_capital}
+
+        # --- Ichimoku Engine ---
+        engine = IchimokuEngine(settings=strategy_params)
+        processed_data = engine.process_dataframe(data)
+
+    if entry_signals is None:
+        # Signale (inkl. MTF-Bias) einmalig für die gesamte Serie berechnen
+        params_for_logic = {"strategy": strategy_params, "risk": risk_params}
+        htf_bias = compute_htf_bias(processed_data.index, strategy_params, data_start, data_end)
+        entry_signals = compute_signal_vector(processed_data, params_for_logic, htf_bias)
+
+    return simulate_trades(
+        processed_data['high'].to_numpy(dtype=np.float64),
+        processed_data['low'].to_numpy(dtype=np.float64),
+        processed_data['close'].to_numpy(dtype=np.float64),
+        processed_data['atr'].to_numpy(dtype=np.float64),
+        entry_signals, risk_params, start_capital,
+        abort_max_drawdown=abort_max_drawdown, abort_capital_floor=abort_capital_floor,
+        checkpoints=checkpoints, on_checkpoint=on_checkpoint
+    )
+
+
+def _trade_stats(start_capital, current_capital, trades_count, wins_count, max_drawdown_pct, aborted_at=None):
+    """Ergebnis-Dict von simulate_trades (auch für Zwischenstände an Checkpoints)."""
+    win_rate = (wins_count / trades_count * 100) if trades_count > 0 else 0
+    final_pnl_pct = ((current_capital - start_capital) / start_capital) * 100 if start_capital > 0 else 0
+    final_capital = max(0, current_capital)
+
+    return {
+        "total_pnl_pct": final_pnl_pct, "trades_count": trades_count,
+        "win_rate": win_rate, "max_drawdown_pct": max_drawdown_pct,
+        "end_capital": final_capital,
+        "aborted": aborted_at is not None, "aborted_at": aborted_at
+    }
+
+
+def simulate_trades(high, low, close, atr, signals, risk_params, start_capital=1000,
+                    abort_max_drawdown=None, abort_capital_floor=None, checkpoints=None, on_checkpoint=None):
+    """
+    Positions-Simulation (Einstieg, SL/TP, Trailing-Stop) über reine float64-Arrays.
+
+    Die offene Position wird als Record mit fester Struktur in lokalen Variablen
+    gehalten (Seite, Entry, SL, TP, Aktivierung, Peak, Trailing-Flag, Notional)
+    statt als Dict pro Trade - das hält die Schleife frei von Pandas-Overhead.
+    Ohne offene Position springt die Schleife direkt zur nächsten Signal-Kerze.
+
+    Args:
+        high, low, close, atr: np.ndarray (float64) pro Kerze
+        signals: np.ndarray (int8), 1 = buy, -1 = sell, 0 = kein Signal
+        risk_params: Dict mit den Risiko-Einstellungen der Strategie
+        start_capital: Startkapital in USDT
+        abort_max_drawdown: Abbruch, sobald der Drawdown (Anteil, z.B. 0.30) überschritten ist
+        abort_capital_floor: Abbruch, sobald das Kapital unter diesen USDT-Wert fällt
+        checkpoints: aufsteigende Kerzen-Indizes; beim Erreichen wird
+            on_checkpoint(schritt, zwischenergebnis) mit den Kennzahlen der Kerzen davor
+            aufgerufen (schritt = 1, 2, ...). Gibt der Callback True zurück, wird abgebrochen.
+
+    Bei einem Abbruch enthält das Ergebnis 'aborted': True und 'aborted_at' (Kerzen-Index);
+    die Kennzahlen beziehen sich dann nur auf die bis dahin simulierten Kerzen.
+    """
     current_capital = start_capital
     peak_capital = start_capital
     max_drawdown_pct = 0.0
     trades_count = 0
     wins_count = 0
-    position = None
 
     # Parameter-Extraction
     risk_reward_ratio = risk_params.get('risk_reward_ratio', 2.0)
@@ -140,119 +380,122 @@ def run_backtest(data, strategy_params, risk_params, start_capital=1000, verbose
     activation_rr = risk_params.get('trailing_stop_activation_rr', 2.0)
     callback_rate = risk_params.get('trailing_stop_callback_rate_pct', 1.0) / 100
     leverage = risk_params.get('leverage', 10)
-    fee_pct = 0.05 / 100
     atr_multiplier_sl = risk_params.get('atr_multiplier_sl', 2.0)
     min_sl_pct = risk_params.get('min_sl_pct', 0.5) / 100.0
-    
-    absolute_max_notional_value = 1000000
-    max_allowed_effective_leverage = 10
 
-    params_for_logic = {"strategy": strategy_params, "risk": risk_params}
+    # Positions-Record: side 0 = flat, 1 = long, -1 = short
+    pos_side = 0
+    pos_entry = pos_sl = pos_tp = pos_activation = pos_peak = pos_notional = 0.0
+    pos_trailing = False
+    aborted_at = None
+    checkpoints = list(checkpoints) if (checkpoints is not None and on_checkpoint is not None) else []
+    next_checkpoint = checkpoints[0] if checkpoints else -1
+    checkpoint_step = 0
 
-    iterator = processed_data.iterrows()
+    highs = np.asarray(high, dtype=np.float64).tolist()
+    lows = np.asarray(low, dtype=np.float64).tolist()
+    closes = np.asarray(close, dtype=np.float64).tolist()
+    atrs = np.asarray(atr, dtype=np.float64).tolist()
+    signal_values = np.asarray(signals)
+    signal_list = signal_values.tolist()
+    # Ohne offene Position zählen nur Kerzen mit Signal -> flache Strecken überspringen
+    entry_bars = np.flatnonzero(signal_values).tolist()
+    next_entry = 0
+    n_bars = len(highs)
 
-    for timestamp, current_candle in iterator:
+    bar_index = -1
+    while True:
+        bar_index += 1
         if current_capital <= 0: break
 
+        if not pos_side:
+            while next_entry < len(entry_bars) and entry_bars[next_entry] < bar_index:
+                next_entry += 1
+            bar_index = entry_bars[next_entry] if next_entry < len(entry_bars) else n_bars
+
+        # Übersprungene Checkpoints nachholen (Stand ist ohne Position unverändert)
+        while 0 <= next_checkpoint <= bar_index and next_checkpoint < n_bars:
+            checkpoint_step += 1
+            partial = _trade_stats(start_capital, current_capital, trades_count, wins_count, max_drawdown_pct)
+            if on_checkpoint(checkpoint_step, partial):
+                aborted_at = next_checkpoint
+                break
+            next_checkpoint = checkpoints[checkpoint_step] if checkpoint_step < len(checkpoints) else -1
+        if aborted_at is not None or bar_index >= n_bars: break
+
+        bar_high, bar_low, bar_close = highs[bar_index], lows[bar_index], closes[bar_index]
+        bar_atr, signal = atrs[bar_index], signal_list[bar_index]
+
         # --- Positions-Management ---
-        if position:
+        if pos_side:
             exit_price = None
-            if position['side'] == 'long':
-                if not position['trailing_active'] and current_candle['high'] >= position['activation_price']: position['trailing_active'] = True
-                if position['trailing_active']:
-                    position['peak_price'] = max(position['peak_price'], current_candle['high'])
-                    trailing_sl = position['peak_price'] * (1 - callback_rate)
-                    position['stop_loss'] = max(position['stop_loss'], trailing_sl)
-                if current_candle['low'] <= position['stop_loss']: exit_price = position['stop_loss']
-                elif not position['trailing_active'] and current_candle['high'] >= position['take_profit']: exit_price = position['take_profit']
-            elif position['side'] == 'short':
-                if not position['trailing_active'] and current_candle['low'] <= position['activation_price']: position['trailing_active'] = True
-                if position['trailing_active']:
-                    position['peak_price'] = min(position['peak_price'], current_candle['low'])
-                    trailing_sl = position['peak_price'] * (1 + callback_rate)
-                    position['stop_loss'] = min(position['stop_loss'], trailing_sl)
-                if current_candle['high'] >= position['stop_loss']: exit_price = position['stop_loss']
-                elif not position['trailing_active'] and current_candle['low'] <= position['take_profit']: exit_price = position['take_profit']
+            if pos_side == 1:
+                if not pos_trailing and bar_high >= pos_activation: pos_trailing = True
+                if pos_trailing:
+                    pos_peak = max(pos_peak, bar_high)
+                    trailing_sl = pos_peak * (1 - callback_rate)
+                    pos_sl = max(pos_sl, trailing_sl)
+                if bar_low <= pos_sl: exit_price = pos_sl
+                elif not pos_trailing and bar_high >= pos_tp: exit_price = pos_tp
+            else:
+                if not pos_trailing and bar_low <= pos_activation: pos_trailing = True
+                if pos_trailing:
+                    pos_peak = min(pos_peak, bar_low)
+                    trailing_sl = pos_peak * (1 + callback_rate)
+                    pos_sl = min(pos_sl, trailing_sl)
+                if bar_high >= pos_sl: exit_price = pos_sl
+                elif not pos_trailing and bar_low <= pos_tp: exit_price = pos_tp
 
             if exit_price:
-                pnl_pct = (exit_price / position['entry_price'] - 1) if position['side'] == 'long' else (1 - exit_price / position['entry_price'])
-                notional_value = position['notional_value']
-                pnl_usd = notional_value * pnl_pct
-                total_fees = notional_value * fee_pct * 2
+                pnl_pct = (exit_price / pos_entry - 1) if pos_side == 1 else (1 - exit_price / pos_entry)
+                pnl_usd = pos_notional * pnl_pct
+                total_fees = pos_notional * FEE_PCT * 2
                 current_capital += (pnl_usd - total_fees)
                 if (pnl_usd - total_fees) > 0: wins_count += 1
                 trades_count += 1
-                position = None
+                pos_side = 0
                 peak_capital = max(peak_capital, current_capital)
                 if peak_capital > 0:
                     drawdown = (peak_capital - current_capital) / peak_capital
                     max_drawdown_pct = max(max_drawdown_pct, drawdown)
 
+                # Drawdown und Kapital ändern sich nur bei Ausstiegen -> nur hier prüfen
+                if ((abort_max_drawdown is not None and max_drawdown_pct > abort_max_drawdown) or
+                        (abort_capital_floor is not None and current_capital < abort_capital_floor)):
+                    aborted_at = bar_index
+                    break
+
         # --- Einstiegs-Logik ---
-        if not position and current_capital > 0:
-            
-            # Dynamischer MTF-Bias Check via Supertrend pro Kerze
-            market_bias = Bias.NEUTRAL
-            if htf_processed is not None:
-                # Suche den letzten verfügbaren HTF-Index vor oder gleich dem aktuellen Timestamp
-                try:
-                    htf_idx = htf_processed.index.asof(timestamp)
-                    if pd.notna(htf_idx):
-                        htf_row = htf_processed.loc[htf_idx]
-                        # Bias basierend auf Supertrend-Direction bestimmen
-                        supertrend_dir = htf_row.get('supertrend_direction', 0)
-                        if supertrend_dir == 1:  # Bullish
-                            market_bias = Bias.BULLISH
-                        elif supertrend_dir == -1:  # Bearish
-                            market_bias = Bias.BEARISH
-                except:
-                    pass  # Bei Fehler neutral bleiben
-
-            data_slice = processed_data.loc[:timestamp]
-            side, price = get_titan_signal(data_slice, current_candle, params_for_logic, market_bias)
-
-            if side:
-                entry_price = current_candle['close']
-                current_atr = current_candle.get('atr', 0)
-                if current_atr <= 0: continue
-                
-                sl_dist = max(current_atr * atr_multiplier_sl, entry_price * min_sl_pct)
-                
-                risk_amount_usd = current_capital * risk_per_trade_pct
-                sl_pct = sl_dist / entry_price
-                if sl_pct <= 0: continue
-                
-                calc_notional = risk_amount_usd / sl_pct
-                max_notional = current_capital * max_allowed_effective_leverage
-                final_notional = min(calc_notional, max_notional, absolute_max_notional_value)
-                
-                margin_needed = final_notional / leverage
-                if margin_needed > current_capital: continue
-
-                if side == 'buy':
-                    sl = entry_price - sl_dist
-                    tp = entry_price + sl_dist * risk_reward_ratio
-                    act = entry_price + sl_dist * activation_rr
-                else:
-                    sl = entry_price + sl_dist
-                    tp = entry_price - sl_dist * risk_reward_ratio
-                    act = entry_price - sl_dist * activation_rr
-
-                position = {
-                    'side': 'long' if side == 'buy' else 'short',
-                    'entry_price': entry_price, 'stop_loss': sl,
-                    'take_profit': tp, 'margin_used': margin_needed,
-                    'notional_value': final_notional,
-                    'trailing_active': False, 'activation_price': act,
-                    'peak_price': entry_price
-                }
+        if not pos_side and current_capital > 0 and signal:
+            entry_price = bar_close
+            if bar_atr <= 0: continue
 
-    win_rate = (wins_count / trades_count * 100) if trades_count > 0 else 0
-    final_pnl_pct = ((current_capital - start_capital) / start_capital) * 100 if start_capital > 0 else 0
-    final_capital = max(0, current_capital)
+            sl_dist = max(bar_atr * atr_multiplier_sl, entry_price * min_sl_pct)
 
-    return {
-        "total_pnl_pct": final_pnl_pct, "trades_count": trades_count,
-        "win_rate": win_rate, "max_drawdown_pct": max_drawdown_pct,
-        "end_capital": final_capital
-    }
+            risk_amount_usd = current_capital * risk_per_trade_pct
+            sl_pct = sl_dist / entry_price
+            if sl_pct <= 0: continue
+
+            calc_notional = risk_amount_usd / sl_pct
+            max_notional = current_capital * MAX_ALLOWED_EFFECTIVE_LEVERAGE
+            final_notional = min(calc_notional, max_notional, ABSOLUTE_MAX_NOTIONAL_VALUE)
+
+            margin_needed = final_notional / leverage
+            if margin_needed > current_capital: continue
+
+            if signal == 1:
+                pos_sl = entry_price - sl_dist
+                pos_tp = entry_price + sl_dist * risk_reward_ratio
+                pos_activation = entry_price + sl_dist * activation_rr
+            else:
+                pos_sl = entry_price + sl_dist
+                pos_tp = entry_price - sl_dist * risk_reward_ratio
+                pos_activation = entry_price - sl_dist * activation_rr
+
+            pos_side = signal
+            pos_entry = entry_price
+            pos_peak = entry_price
+            pos_notional = final_notional
+            pos_trailing = False
+
+    return _trade_stats(start_capital, current_capital, trades_count, wins_count, max_drawdown_pct, aborted_at)
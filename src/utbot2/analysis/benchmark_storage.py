@@ -0,0 +1,144 @@
+# /root/utbot2/src/utbot2/analysis/benchmark_storage.py
+"""
+Benchmark: Trial-Durchsatz der Optuna-Storage-Backends (sqlite / journal / memory)
+bei 1, 4 und 16 Workern.
+
+sqlite und journal laufen mit Worker-Prozessen (wie optimizer.py --executor process),
+memory kann nicht zwischen Prozessen geteilt werden und läuft mit Threads.
+
+    python src/utbot2/analysis/benchmark_storage.py --trials 400
+    python src/utbot2/analysis/benchmark_storage.py --objective backtest --symbol BTC --timeframe 1h
+
+Mit --objective noop wird nur die Trial-Verwaltung gemessen (Sampling + Storage),
+mit --objective backtest der komplette Optimizer-Trial: gleiche Worker-Vorbereitung
+wie optimizer.py (Signal-Raster, HTF-Bias, Pruning aus settings.json), nur ohne
+Ergebnis-Cache, damit spätere Messungen nicht von früheren profitieren.
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import optuna
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.analysis import optimizer
+from utbot2.analysis.backtester import load_data
+from utbot2.analysis.indicator_cache import indicator_cache
+from utbot2.utils.ohlcv_cache import write_ohlcv_cache
+from utbot2.utils.timeframe_utils import determine_htf
+
+optuna.logging.set_verbosity(optuna.logging.WARNING)
+
+
+def _noop_objective(trial):
+    """Gleicher Suchraum wie optimizer.objective, aber ohne Backtest."""
+    trial.suggest_int('tenkan_period', 7, 12)
+    trial.suggest_int('kijun_period', 22, 30)
+    trial.suggest_int('senkou_span_b_period', 44, 60)
+    trial.suggest_categorical('require_tk_cross', [True, False])
+    trial.suggest_int('supertrend_atr_period', 7, 14)
+    trial.suggest_float('supertrend_multiplier', 2.0, 4.0)
+    trial.suggest_float('risk_reward_ratio', 1.5, 4.0)
+    trial.suggest_float('risk_per_trade_pct', 0.5, 2.0)
+    trial.suggest_int('leverage', 5, 15)
+    return 0.0
+
+
+def _setup(db_dir, objective_name, data_file, symbol, timeframe):
+    """Bereitet einen (Worker-)Prozess vor und liefert die Objective-Funktion."""
+    optimizer.DB_DIR = db_dir
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    if objective_name == 'noop':
+        return _noop_objective
+    worker_globals = {name: getattr(optimizer, name) for name in optimizer._WORKER_GLOBALS}
+    worker_globals.update(CURRENT_SYMBOL=symbol, CURRENT_TIMEFRAME=timeframe, CURRENT_HTF=determine_htf(timeframe),
+                          OPTIM_MODE='best_profit', PRUNING=optimizer._load_pruning_settings(),
+                          USE_RESULT_CACHE=False, DB_DIR=db_dir)
+    optimizer._setup_worker(data_file, worker_globals, indicator_cache.max_bytes)
+    return optimizer.objective
+
+
+def _create_pruner(objective_name):
+    return optimizer._create_pruner(optimizer.PRUNING) if objective_name == 'backtest' else None
+
+
+def _bench_worker(backend, study_name, db_dir, n_trials, objective_name, data_file, symbol, timeframe):
+    objective = _setup(db_dir, objective_name, data_file, symbol, timeframe)
+    study = optuna.load_study(study_name=study_name, storage=optimizer.create_storage(backend, study_name),
+                              pruner=_create_pruner(objective_name))
+    study.optimize(objective, n_trials=n_trials, n_jobs=1)
+
+
+def run_benchmark(backend, workers, n_trials, objective_name, data_file, symbol, timeframe):
+    """Führt `n_trials` Trials mit `workers` Workern aus und liefert Trials pro Sekunde."""
+    db_dir = tempfile.mkdtemp(prefix='utbot2_storage_bench_')
+    try:
+        objective = _setup(db_dir, objective_name, data_file, symbol, timeframe)
+        study_name = f"bench_{backend}_{workers}"
+        storage = optimizer.create_storage(backend, study_name)
+        study = optuna.create_study(storage=storage, study_name=study_name, direction="maximize",
+                                    pruner=_create_pruner(objective_name))
+
+        start = time.perf_counter()
+        if backend == 'memory' or workers == 1:
+            study.optimize(objective, n_trials=n_trials, n_jobs=workers)
+        else:
+            ctx = multiprocessing.get_context('spawn')
+            counts = [n_trials // workers + (1 if i < n_trials % workers else 0) for i in range(workers)]
+            processes = [ctx.Process(target=_bench_worker,
+                                     args=(backend, study_name, db_dir, count, objective_name, data_file, symbol, timeframe))
+                         for count in counts if count > 0]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        elapsed = time.perf_counter() - start
+
+        finished = len(optuna.load_study(study_name=study_name, storage=storage).trials)
+        return finished, elapsed
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trial-Durchsatz der Optuna-Storage-Backends")
+    parser.add_argument('--backends', type=str, default=' '.join(optimizer.STORAGE_BACKENDS))
+    parser.add_argument('--workers', type=str, default="1 4 16")
+    parser.add_argument('--trials', type=int, default=400)
+    parser.add_argument('--objective', choices=['noop', 'backtest'], default='noop')
+    parser.add_argument('--symbol', type=str, default='BTC')
+    parser.add_argument('--timeframe', type=str, default='1h')
+    parser.add_argument('--start_date', type=str, default='2025-01-01')
+    parser.add_argument('--end_date', type=str, default='2025-11-20')
+    args = parser.parse_args()
+
+    symbol = f"{args.symbol}/USDT:USDT"
+    data_file = None
+    if args.objective == 'backtest':
+        data = load_data(symbol, args.timeframe, args.start_date, args.end_date)
+        if data.empty:
+            print(f"FEHLER: Keine Daten für {symbol} ({args.timeframe}).")
+            return
+        data_file = os.path.join(tempfile.mkdtemp(prefix='utbot2_storage_bench_data_'), 'data.npy')
+        write_ohlcv_cache(data, data_file)
+
+    print(f"{'Backend':<10}{'Worker':>8}{'Trials':>8}{'Sekunden':>10}{'Trials/s':>10}")
+    try:
+        for backend in args.backends.split():
+            for workers in (int(w) for w in args.workers.split()):
+                finished, elapsed = run_benchmark(backend, workers, args.trials, args.objective,
+                                                  data_file, symbol, args.timeframe)
+                print(f"{backend:<10}{workers:>8}{finished:>8}{elapsed:>10.2f}{finished / elapsed:>10.1f}")
+    finally:
+        if data_file:
+            shutil.rmtree(os.path.dirname(data_file), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# /root/utbot2/src/utbot2/analysis/indicator_cache.py
+"""
+Prozesslokaler Cache für berechnete Indikatoren (Ichimoku, Supertrend, HTF-Daten).
+
+Schlüssel sind Tupel aus Dataset-Fingerprint und Indikator-Parametern. Der Cache
+ist thread-sicher (Optuna n_jobs > 1), verdrängt die am längsten ungenutzten
+Einträge, sobald das Speicherbudget überschritten wird, und zählt Hits/Misses.
+
+Gecachte Objekte werden geteilt zurückgegeben und dürfen nicht verändert werden.
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """Kurzer Hash über Zeitstempel und OHLC-Werte eines DataFrames."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(pd.DatetimeIndex(df.index).asi8).tobytes())
+    for col in ('open', 'high', 'low', 'close'):
+        if col in df.columns:
+            digest.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+def _estimate_nbytes(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=False))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class IndicatorCache:
+    """
+    Thread-sicherer LRU-Cache mit Speicherbudget in Bytes.
+    """
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (wert, bytes)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = _estimate_nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return value  # Passt nie ins Budget: nicht cachen
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key, compute):
+        """
+        Liefert den gecachten Wert oder berechnet ihn mit `compute()`.
+        Die Berechnung läuft außerhalb des Locks; parallele Misses auf denselben
+        Schlüssel rechnen im schlimmsten Fall doppelt, blockieren sich aber nicht.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+        return self.put(key, compute())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Gemeinsame Instanz für Backtester und Optimizer
+indicator_cache = IndicatorCache()
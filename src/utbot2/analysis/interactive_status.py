@@ -21,7 +21,7 @@ sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
 from utbot2.utils.exchange import Exchange
 from utbot2.strategy.ichimoku_engine import IchimokuEngine
-from utbot2.analysis.backtester import run_backtest
+from utbot2.analysis.result_cache import cached_run_backtest
 
 def setup_logging():
     logger = logging.getLogger('interactive_status')
@@ -106,7 +106,7 @@ def run_backtest_for_chart(df, config, start_capital=1000):
         original_level = logger_backtest.level
         logger_backtest.setLevel(logging.ERROR)
         
-        stats = run_backtest(df.copy(), strategy_params, risk_params, start_capital=start_capital, verbose=False)
+        stats = cached_run_backtest(df.copy(), strategy_params, risk_params, start_capital=start_capital, verbose=False)
         
         logger_backtest.setLevel(original_level)
         
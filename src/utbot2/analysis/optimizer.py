@@ -5,9 +5,14 @@ import json
 import optuna
 import numpy as np
 import argparse
+import math
+import multiprocessing
+import multiprocessing.connection
+import threading
 import logging
 import warnings
 from datetime import datetime, timedelta
+from tqdm import tqdm
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 logging.getLogger('tensorflow').setLevel(logging.ERROR)
@@ -18,13 +23,27 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
 # Imports auf utbot2 angepasst
-from utbot2.analysis.backtester import load_data, run_backtest
+from utbot2.analysis.backtester import load_data, load_htf_data, run_backtest, add_atr, compute_htf_bias
 from utbot2.analysis.evaluator import evaluate_dataset
+from utbot2.analysis.indicator_cache import dataset_fingerprint, indicator_cache
+from utbot2.analysis.population_backtester import simulate_population
+from utbot2.analysis.result_cache import get_result_cache, result_key
+from utbot2.analysis.signal_grid import load_or_build_signal_grid, signal_grid_path
+from utbot2.strategy.ichimoku_engine import IchimokuBatch
+from utbot2.strategy.trade_logic import apply_market_bias, get_titan_signals
+from utbot2.utils.ohlcv_cache import read_ohlcv_cache, write_ohlcv_cache
 from utbot2.utils.timeframe_utils import determine_htf
 
+try:
+    from optuna.storages.journal import JournalFileBackend
+except ImportError:  # optuna < 4.0
+    from optuna.storages import JournalFileStorage as JournalFileBackend
+
 optuna.logging.set_verbosity(optuna.logging.WARNING)
 
 HISTORICAL_DATA = None
+ICHIMOKU_BATCH = None  # Vorberechnete Rolling-Extrema für alle Ichimoku-Perioden des Suchraums
+DATA_FINGERPRINT = None
 CURRENT_SYMBOL = None
 CURRENT_TIMEFRAME = None
 CURRENT_HTF = None
@@ -34,6 +53,32 @@ MIN_WIN_RATE_CONSTRAINT = 55.0
 MIN_PNL_CONSTRAINT = 0.0
 START_CAPITAL = 1000
 OPTIM_MODE = "strict"
+PRUNING = {}  # settings.json -> optimization_settings.pruning
+
+# Suchraum: name -> ('int' | 'float', low, high) oder ('categorical', choices)
+SEARCH_SPACE = {
+    'tenkan_period': ('int', 7, 12),
+    'kijun_period': ('int', 22, 30),
+    'senkou_span_b_period': ('int', 44, 60),
+    'require_tk_cross': ('categorical', [True, False]),
+    'supertrend_atr_period': ('int', 7, 14),
+    'supertrend_multiplier': ('float', 2.0, 4.0),
+    'risk_reward_ratio': ('float', 1.5, 4.0),
+    'risk_per_trade_pct': ('float', 0.5, 2.0),
+    'leverage': ('int', 5, 15),
+    'trailing_stop_activation_rr': ('float', 1.0, 3.0),
+    'trailing_stop_callback_rate_pct': ('float', 0.3, 2.0),
+    'atr_multiplier_sl': ('float', 1.5, 4.0),
+}
+ACTIVE_SEARCH_SPACE = SEARCH_SPACE  # ggf. per Warm-Start eingeengt
+WARM_START = {}  # settings.json -> optimization_settings.warm_start
+USE_RESULT_CACHE = True
+CHECKPOINT_PNL_FIELD = 'checkpoint_pnl'  # PnL je Fidelity-Checkpoint (Schritt 1..n) im gecachten Ergebnis
+ENGINE = 'trial'  # 'trial' = objective() pro Trial, 'population' = ask/tell-Batches
+USE_SIGNAL_GRID = True
+SIGNAL_GRID = None  # Vorberechnete Ichimoku-Signale des Integer-Rasters (signal_grid.py)
+POPULATION_SIZE = 256
+TPE_STARTUP_TRIALS = 10  # Zufalls-Trials vor dem ersten TPE-Modell (Optuna-Standard)
 
 _TIMEFRAME_LOOKBACK = {
     '5m': 60, '15m': 60,
@@ -50,21 +95,108 @@ def _resolve_start_date(timeframe: str, end_date_str: str) -> str:
     return (end_dt - timedelta(days=days)).strftime('%Y-%m-%d')
 
 
+def _load_pruning_settings() -> dict:
+    """Liest optimization_settings.pruning aus settings.json (leer = kein Multi-Fidelity)."""
+    try:
+        with open(os.path.join(PROJECT_ROOT, 'settings.json'), 'r') as f:
+            pruning = json.load(f).get('optimization_settings', {}).get('pruning', {})
+    except (OSError, ValueError):
+        return {}
+    return pruning if pruning.get('enabled') and int(pruning.get('chunks', 1)) > 1 else {}
+
+
+def _load_warm_start_settings(force=None) -> dict:
+    """
+    Liest optimization_settings.warm_start aus settings.json. `force` (True/False aus
+    --warm_start / --cold_start) überschreibt 'enabled'. Leer = Kaltstart.
+    """
+    try:
+        with open(os.path.join(PROJECT_ROOT, 'settings.json'), 'r') as f:
+            warm_start = dict(json.load(f).get('optimization_settings', {}).get('warm_start', {}))
+    except (OSError, ValueError):
+        warm_start = {}
+    enabled = warm_start.get('enabled', False) if force is None else force
+    return warm_start if enabled else {}
+
+
+def _create_pruner(pruning: dict):
+    """Successive-Halving- oder Hyperband-Pruner gemäß den Pruning-Settings (None = Optuna-Standard)."""
+    if not pruning:
+        return None
+    chunks = int(pruning['chunks'])
+    reduction_factor = int(pruning.get('reduction_factor', 3))
+    min_resource = int(pruning.get('min_resource', 1))
+    if pruning.get('pruner', 'hyperband') == 'successive_halving':
+        return optuna.pruners.SuccessiveHalvingPruner(min_resource=min_resource, reduction_factor=reduction_factor)
+    return optuna.pruners.HyperbandPruner(min_resource=min_resource, max_resource=chunks, reduction_factor=reduction_factor)
+
+
+def _create_sampler():
+    """
+    Population-Modus: TPE mit constant_liar, damit die noch offenen Trials eines
+    ask()-Batches nicht alle dieselbe Region vorgeschlagen bekommen (None = Optuna-Standard).
+    """
+    if ENGINE != 'population':
+        return None
+    return optuna.samplers.TPESampler(n_startup_trials=TPE_STARTUP_TRIALS, constant_liar=True)
+
+
+def _population_batch_size(n_trials, population_size):
+    """
+    Trials pro ask/tell-Batch. Innerhalb eines Batches sieht der Sampler keine neuen
+    Ergebnisse -> höchstens ein Achtel des Trial-Budgets (mindestens die Startphase),
+    damit auch kurze Läufe mehrere Posterior-Updates bekommen.
+    """
+    return max(1, min(population_size, max(TPE_STARTUP_TRIALS, n_trials // 8)))
+
+
 def create_safe_filename(symbol, timeframe):
     return f"{symbol.replace('/', '').replace(':', '')}_{timeframe}"
 
-def objective(trial):
+def _suggest(trial, name):
+    spec = ACTIVE_SEARCH_SPACE[name]
+    if spec[0] == 'int':
+        return trial.suggest_int(name, spec[1], spec[2])
+    if spec[0] == 'float':
+        return trial.suggest_float(name, spec[1], spec[2])
+    return trial.suggest_categorical(name, spec[1])
+
+def _entry_signals(strategy_params):
+    """
+    Einstiegssignale (inkl. MTF-Bias) für objective(). Ichimoku-Signale werden pro
+    Perioden-Tupel + TK-Cross, der HTF-Bias pro Supertrend-Setting gecacht und erst
+    hier kombiniert.
+    """
+    combo = (strategy_params['tenkan_period'], strategy_params['kijun_period'],
+             strategy_params['senkou_span_b_period'], strategy_params['require_tk_cross'])
+    signal_key = ('entry_signals', DATA_FINGERPRINT, strategy_params['displacement']) + combo
+    if (SIGNAL_GRID is not None and SIGNAL_GRID.fingerprint == DATA_FINGERPRINT
+            and SIGNAL_GRID.displacement == strategy_params['displacement'] and combo in SIGNAL_GRID):
+        compute = lambda: SIGNAL_GRID.signals(*combo)
+    else:
+        compute = lambda: get_titan_signals(ICHIMOKU_BATCH.process_dataframe(strategy_params), {'strategy': strategy_params})
+    ichimoku_signals = indicator_cache.get_or_compute(signal_key, compute)
+
+    bias_key = ('htf_bias', DATA_FINGERPRINT, CURRENT_HTF,
+                strategy_params['supertrend_atr_period'], strategy_params['supertrend_multiplier'])
+    htf_bias = indicator_cache.get_or_compute(bias_key, lambda: compute_htf_bias(
+        ICHIMOKU_BATCH.df.index, strategy_params, HISTORICAL_DATA.index.min(), HISTORICAL_DATA.index.max()))
+    return apply_market_bias(ichimoku_signals, htf_bias)
+
+
+def _trial_params(trial):
+    """Strategie- und Risiko-Parameter eines Trials (objective und optimize_population)."""
     # Ichimoku Parameter (klassische Werte, weniger Varianz)
     strategy_params = {
-        'tenkan_period': trial.suggest_int('tenkan_period', 7, 12),
-        'kijun_period': trial.suggest_int('kijun_period', 22, 30),
-        'senkou_span_b_period': trial.suggest_int('senkou_span_b_period', 44, 60),
+        'tenkan_period': _suggest(trial, 'tenkan_period'),
+        'kijun_period': _suggest(trial, 'kijun_period'),
+        'senkou_span_b_period': _suggest(trial, 'senkou_span_b_period'),
         'displacement': 26,
-        'require_tk_cross': trial.suggest_categorical('require_tk_cross', [True, False]),
+        'require_tk_cross': _suggest(trial, 'require_tk_cross'),
         
         # Supertrend MTF-Filter Parameter
-        'supertrend_atr_period': trial.suggest_int('supertrend_atr_period', 7, 14),
-        'supertrend_multiplier': trial.suggest_float('supertrend_multiplier', 2.0, 4.0),
+        'supertrend_atr_period': _suggest(trial, 'supertrend_atr_period'),
+        'supertrend_multiplier': _suggest(trial, 'supertrend_multiplier'),
         
         'symbol': CURRENT_SYMBOL,
         'timeframe': CURRENT_TIMEFRAME,
@@ -72,17 +204,66 @@ def objective(trial):
     }
     
     risk_params = {
-        'risk_reward_ratio': trial.suggest_float('risk_reward_ratio', 1.5, 4.0),
-        'risk_per_trade_pct': trial.suggest_float('risk_per_trade_pct', 0.5, 2.0),
-        'leverage': trial.suggest_int('leverage', 5, 15),
-        'trailing_stop_activation_rr': trial.suggest_float('trailing_stop_activation_rr', 1.0, 3.0),
-        'trailing_stop_callback_rate_pct': trial.suggest_float('trailing_stop_callback_rate_pct', 0.3, 2.0),
-        'atr_multiplier_sl': trial.suggest_float('atr_multiplier_sl', 1.5, 4.0),
+        'risk_reward_ratio': _suggest(trial, 'risk_reward_ratio'),
+        'risk_per_trade_pct': _suggest(trial, 'risk_per_trade_pct'),
+        'leverage': _suggest(trial, 'leverage'),
+        'trailing_stop_activation_rr': _suggest(trial, 'trailing_stop_activation_rr'),
+        'trailing_stop_callback_rate_pct': _suggest(trial, 'trailing_stop_callback_rate_pct'),
+        'atr_multiplier_sl': _suggest(trial, 'atr_multiplier_sl'),
         'min_sl_pct': 0.5
     }
+    return strategy_params, risk_params
+
+
+def _fidelity_checkpoints():
+    """Kerzen-Indizes der Multi-Fidelity-Zwischenberichte (leer ohne Pruning)."""
+    chunks = int(PRUNING.get('chunks', 1)) if PRUNING else 1
+    if chunks <= 1:
+        return []
+    return [len(ICHIMOKU_BATCH.df) * step // chunks for step in range(1, chunks)]
+
+
+def _abort_drawdown():
+    # Beide Modi prunen bei zu hohem Drawdown -> Simulation beim ersten Überschreiten abbrechen
+    return MAX_DRAWDOWN_CONSTRAINT if OPTIM_MODE in ("strict", "best_profit") else None
+
+
+def _htf_fingerprint():
+    """Fingerprint der HTF-Daten zum aktuellen Datensatz (None ohne eigene HTF)."""
+    _, fingerprint = load_htf_data({'symbol': CURRENT_SYMBOL, 'timeframe': CURRENT_TIMEFRAME, 'htf': CURRENT_HTF},
+                                   HISTORICAL_DATA.index.min(), HISTORICAL_DATA.index.max())
+    return fingerprint
+
+
+def _cache_key(strategy_params, risk_params, abort_drawdown, checkpoints):
+    """
+    Ergebnis-Cache-Schlüssel eines Trials (LTF- und HTF-Daten, Parameter, Abbruch-
+    Schwelle). Mit Fidelity-Checkpoints werden deren Zwischenstände mitgespeichert
+    (CHECKPOINT_PNL_FIELD) -> die Checkpoints gehören in den Schlüssel, damit ein
+    Treffer sie dem Pruner erneut melden kann.
+    """
+    extra = {'checkpoints': checkpoints} if checkpoints else {}
+    return result_key(DATA_FINGERPRINT, strategy_params, risk_params, START_CAPITAL,
+                      htf_fingerprint=_htf_fingerprint(), abort_max_drawdown=abort_drawdown, **extra)
+
+
+def _replay_checkpoints(trial, result):
+    """
+    Meldet die gespeicherten Zwischenstände eines Cache-Treffers an den Pruner,
+    als wäre der Backtest gelaufen. Returns True, wenn der Pruner den Trial stoppt.
+    """
+    for step, pnl in enumerate(result.get(CHECKPOINT_PNL_FIELD, ()), start=1):
+        trial.report(pnl, step)
+        if trial.should_prune():
+            return True
+    return False
+
+
+def _score(result):
+    """Zielwert eines Backtest-Ergebnisses; verletzte Constraints -> TrialPruned."""
+    if result.get('aborted'):
+        raise optuna.exceptions.TrialPruned()
 
-    result = run_backtest(HISTORICAL_DATA.copy(), strategy_params, risk_params, START_CAPITAL, verbose=False)
-    
     pnl = result.get('total_pnl_pct', -1000)
     drawdown = result.get('max_drawdown_pct', 1.0)
     trades = result.get('trades_count', 0)
@@ -95,11 +276,636 @@ def objective(trial):
     elif OPTIM_MODE == "best_profit" and (
         drawdown > MAX_DRAWDOWN_CONSTRAINT or trades < 30):
         raise optuna.exceptions.TrialPruned()
+    return pnl
+
 
+def objective(trial):
+    strategy_params, risk_params = _trial_params(trial)
+
+    # Einstiegssignale hängen nur von den Strategie-Parametern ab -> Trials, die nur
+    # Risiko-Parameter variieren, simulieren allein die Ausstiege
+    entry_signals = _entry_signals(strategy_params)
+    processed_data = ICHIMOKU_BATCH.df  # OHLC + ATR
+    # Multi-Fidelity: nach jedem chronologischen Abschnitt den PnL melden und ggf. prunen
+    checkpoints = _fidelity_checkpoints()
+    pruned_at_checkpoint = []
+    checkpoint_pnl = []
+
+    def on_checkpoint(step, partial):
+        checkpoint_pnl.append(partial['total_pnl_pct'])
+        trial.report(partial['total_pnl_pct'], step)
+        if trial.should_prune():
+            pruned_at_checkpoint.append(step)
+            return True
+        return False
+
+    abort_drawdown = _abort_drawdown()
+
+    # Identische Parameter auf identischen Daten (auch aus früheren Läufen) nicht erneut simulieren
+    cache_key = result = None
+    if USE_RESULT_CACHE:
+        cache_key = _cache_key(strategy_params, risk_params, abort_drawdown, checkpoints)
+        result = get_result_cache().get(cache_key)
+        if result is not None and _replay_checkpoints(trial, result):
+            raise optuna.exceptions.TrialPruned()
+    if result is None:
+        result = run_backtest(HISTORICAL_DATA, strategy_params, risk_params, START_CAPITAL, verbose=False,
+                              processed_data=processed_data, entry_signals=entry_signals, abort_max_drawdown=abort_drawdown,
+                              checkpoints=checkpoints or None, on_checkpoint=on_checkpoint if checkpoints else None)
+        # Pruner-Abbrüche hängen von anderen Trials ab und werden nicht gespeichert
+        if cache_key and not pruned_at_checkpoint:
+            get_result_cache().put(cache_key, {**result, CHECKPOINT_PNL_FIELD: checkpoint_pnl} if checkpoints else result)
+
+    pnl = _score(result)
+    if checkpoints:
+        trial.report(pnl, len(checkpoints) + 1)  # volle Datenmenge = höchste Fidelity-Stufe
     return pnl
 
+
+def _evaluate_population(trials):
+    """
+    Simuliert alle Trials eines ask()-Batches gemeinsam mit simulate_population.
+
+    Returns:
+        Liste der Backtest-Ergebnisse in der Reihenfolge von `trials`
+    """
+    params = [_trial_params(trial) for trial in trials]
+    abort_drawdown = _abort_drawdown()
+    checkpoints = _fidelity_checkpoints()
+    results = [None] * len(trials)
+    cache_keys = [None] * len(trials)
+    if USE_RESULT_CACHE:
+        for i, (strategy_params, risk_params) in enumerate(params):
+            cache_keys[i] = _cache_key(strategy_params, risk_params, abort_drawdown, checkpoints)
+            results[i] = get_result_cache().get(cache_keys[i])
+            if results[i] is not None and _replay_checkpoints(trials[i], results[i]):
+                results[i] = {**results[i], 'aborted': True}
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    pruned_at_checkpoint = set()
+    checkpoint_pnl = {member: [] for member in range(len(pending))}
+
+    def on_checkpoint(step, partials):
+        stop = []
+        for member, partial in partials.items():
+            checkpoint_pnl[member].append(partial['total_pnl_pct'])
+            trial = trials[pending[member]]
+            trial.report(partial['total_pnl_pct'], step)
+            if trial.should_prune():
+                pruned_at_checkpoint.add(member)
+                stop.append(member)
+        return stop
+
+    processed_data = ICHIMOKU_BATCH.df
+    batch = simulate_population(
+        processed_data['high'].to_numpy(dtype=np.float64), processed_data['low'].to_numpy(dtype=np.float64),
+        processed_data['close'].to_numpy(dtype=np.float64), processed_data['atr'].to_numpy(dtype=np.float64),
+        np.stack([_entry_signals(params[i][0]) for i in pending]), [params[i][1] for i in pending],
+        START_CAPITAL, abort_max_drawdown=abort_drawdown,
+        checkpoints=checkpoints or None, on_checkpoint=on_checkpoint if checkpoints else None)
+
+    for member, (i, result) in enumerate(zip(pending, batch)):
+        results[i] = result
+        if cache_keys[i] and member not in pruned_at_checkpoint:
+            get_result_cache().put(cache_keys[i],
+                                   {**result, CHECKPOINT_PNL_FIELD: checkpoint_pnl[member]} if checkpoints else result)
+    return results
+
+
+def optimize_population(study, n_trials, population_size, callbacks=(), show_progress_bar=False):
+    """
+    Optimiert per ask/tell: jeweils bis zu `population_size` Trials (begrenzt durch
+    _population_batch_size) werden erfragt, in einem Populations-Backtest gemeinsam
+    simuliert und anschließend einzeln zurückgemeldet. Ergebnisse und Constraints
+    sind identisch zu objective().
+    """
+    if len(ICHIMOKU_BATCH.df) < 52:
+        # Zu wenige Kerzen: run_backtest liefert das Standard-Fehlerergebnis
+        study.optimize(objective, n_trials=n_trials, callbacks=list(callbacks))
+        return
+    progress = tqdm(total=n_trials, desc="Population", disable=not show_progress_bar)
+    batch_size = _population_batch_size(n_trials, population_size)
+    done = 0
+    while done < n_trials:
+        trials = [study.ask() for _ in range(min(batch_size, n_trials - done))]
+        results = _evaluate_population(trials)
+        final_step = len(_fidelity_checkpoints()) + 1
+        for trial, result in zip(trials, results):
+            try:
+                value = _score(result)
+            except optuna.exceptions.TrialPruned:
+                frozen = study.tell(trial, state=optuna.trial.TrialState.PRUNED)
+            else:
+                if final_step > 1:
+                    trial.report(value, final_step)
+                frozen = study.tell(trial, value)
+            for callback in callbacks:
+                callback(study, frozen)
+        done += len(trials)
+        progress.update(len(trials))
+    progress.close()
+
+
+# Modul-Globals, die ein Worker-Prozess für objective() braucht
+_WORKER_GLOBALS = ('CURRENT_SYMBOL', 'CURRENT_TIMEFRAME', 'CURRENT_HTF', 'MAX_DRAWDOWN_CONSTRAINT',
+                   'MIN_WIN_RATE_CONSTRAINT', 'MIN_PNL_CONSTRAINT', 'START_CAPITAL', 'OPTIM_MODE', 'PRUNING',
+                   'ACTIVE_SEARCH_SPACE', 'USE_RESULT_CACHE', 'ENGINE', 'POPULATION_SIZE', 'USE_SIGNAL_GRID',
+                   'DB_DIR')
+
+
+def _prepare_dataset(data):
+    """Setzt HISTORICAL_DATA samt Ichimoku-Vorberechnung und Fingerprint für objective()."""
+    global HISTORICAL_DATA, ICHIMOKU_BATCH, DATA_FINGERPRINT
+    HISTORICAL_DATA = data
+    # ATR + Rolling-Extrema einmal pro Datensatz statt in jedem Trial
+    ICHIMOKU_BATCH = IchimokuBatch(add_atr(HISTORICAL_DATA.copy()))
+    DATA_FINGERPRINT = dataset_fingerprint(HISTORICAL_DATA)
+
+
+def _prepare_signal_grid(verbose=False):
+    """
+    Lädt bzw. berechnet das Signal-Raster für alle Integer-Kombinationen von
+    SEARCH_SPACE (unabhängig von einem per Warm-Start eingeengten Suchraum).
+    """
+    global SIGNAL_GRID
+    SIGNAL_GRID = None
+    if not USE_SIGNAL_GRID or len(ICHIMOKU_BATCH.df) == 0:
+        return
+    periods = [range(SEARCH_SPACE[name][1], SEARCH_SPACE[name][2] + 1)
+               for name in ('tenkan_period', 'kijun_period', 'senkou_span_b_period')]
+    SIGNAL_GRID, built = load_or_build_signal_grid(signal_grid_path(CURRENT_SYMBOL, CURRENT_TIMEFRAME),
+                                                   ICHIMOKU_BATCH, DATA_FINGERPRINT, *periods)
+    if verbose:
+        size_mb = (SIGNAL_GRID.long_bits.nbytes + SIGNAL_GRID.short_bits.nbytes) / 1024 / 1024
+        print(f"  -> Signal-Raster {'neu berechnet' if built else 'wiederverwendet'}: "
+              f"{len(SIGNAL_GRID.combos)} Kombinationen ({size_mb:.1f} MB)")
+
+
+def _setup_worker(data_file, worker_globals, cache_bytes):
+    """
+    Bereitet einen Worker-Prozess für objective() vor: übernimmt die Modul-Globals,
+    bindet die OHLCV-Daten per Memory-Mapping ein (kein Pickling des DataFrames) und
+    lädt Signal-Raster und HTF-Daten.
+    """
+    globals().update(worker_globals)
+    indicator_cache.max_bytes = cache_bytes
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    _prepare_dataset(read_ohlcv_cache(data_file))
+    _prepare_signal_grid()
+    _htf_fingerprint()
+
+
+def _process_worker(data_file, study_name, storage_backend, n_trials, worker_globals, cache_bytes):
+    """Einstiegspunkt eines Worker-Prozesses: arbeitet Trials derselben Study ab."""
+    _setup_worker(data_file, worker_globals, cache_bytes)
+    study = optuna.load_study(study_name=study_name, storage=create_storage(storage_backend, study_name),
+                              sampler=_create_sampler(), pruner=_create_pruner(PRUNING))
+    if ENGINE == 'population':
+        optimize_population(study, n_trials, POPULATION_SIZE)
+    else:
+        study.optimize(objective, n_trials=n_trials, n_jobs=1)
+
+
+def _optimize_in_processes(study_name, storage_backend, n_trials, workers):
+    """
+    Verteilt die Trials auf `workers` Prozesse, die sich die Study über den Storage
+    teilen. Die Kerzen liegen einmal als .npy auf der Platte und werden von allen
+    Workern memory-mapped gelesen.
+    """
+    # HTF-Cache vorab füllen: sonst laden alle Worker dieselbe HTF-Datei gleichzeitig nach
+    _htf_fingerprint()
+    tmp_dir = os.path.join(PROJECT_ROOT, 'artifacts', 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    data_file = os.path.join(tmp_dir, f"{study_name}.npy")
+    write_ohlcv_cache(HISTORICAL_DATA, data_file)
+
+    worker_globals = {name: globals()[name] for name in _WORKER_GLOBALS}
+    trials_per_worker = [n_trials // workers + (1 if i < n_trials % workers else 0) for i in range(workers)]
+    ctx = multiprocessing.get_context('spawn')
+    processes = [
+        ctx.Process(target=_process_worker,
+                    args=(data_file, study_name, storage_backend, count, worker_globals, indicator_cache.max_bytes))
+        for count in trials_per_worker if count > 0
+    ]
+    try:
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    finally:
+        try: os.remove(data_file)
+        except OSError: pass
+
+    failed = [p.exitcode for p in processes if p.exitcode != 0]
+    if failed:
+        raise RuntimeError(f"{len(failed)} von {len(processes)} Worker-Prozessen fehlgeschlagen (Exitcodes {failed})")
+
+
+def allocate_cpu_budget(dataset_lengths: dict, budget: int) -> dict:
+    """
+    Verteilt `budget` Worker proportional zur Datensatzlänge auf die Paare
+    (mindestens 1 pro Paar, Rest nach größtem Nachkommaanteil).
+    Bei weniger Kernen als Paaren bekommt jedes Paar 1 Worker und der Scheduler
+    arbeitet die Paare in Wellen ab.
+    """
+    keys = list(dataset_lengths)
+    if budget <= len(keys):
+        return {key: 1 for key in keys}
+    total = sum(dataset_lengths.values()) or len(keys)
+    raw = {key: budget * (dataset_lengths[key] or 1) / total for key in keys}
+    allocation = {key: max(1, int(raw[key])) for key in keys}
+
+    while sum(allocation.values()) > budget:
+        largest = max(keys, key=lambda key: allocation[key])
+        allocation[largest] -= 1
+    remaining = budget - sum(allocation.values())
+    for key in sorted(keys, key=lambda key: raw[key] - int(raw[key]), reverse=True)[:remaining]:
+        allocation[key] += 1
+    return allocation
+
+
+def merge_results(results_file: str, results: list):
+    """
+    Führt Ergebnisse in optimization_results.json zusammen (gleiches Symbol/Timeframe wird
+    ersetzt). Gleichzeitig laufende Paar-Prozesse serialisieren sich über eine Lock-Datei;
+    geschrieben wird über eine temporäre Datei + os.replace, damit nie eine halbe Datei entsteht.
+    """
+    os.makedirs(os.path.dirname(results_file), exist_ok=True)
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+
+    with open(f"{results_file}.lock", 'w') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # Merge with existing results (don't overwrite previous runs in the same pipeline)
+        existing_results = []
+        if os.path.exists(results_file):
+            try:
+                with open(results_file) as f:
+                    existing_data = json.load(f)
+                existing_results = existing_data.get('results', [])
+            except Exception:
+                existing_results = []
+
+        # Replace entries for the same symbol/timeframe, keep the rest
+        new_keys = {(r['symbol'], r['timeframe']) for r in results}
+        merged = [r for r in existing_results if (r['symbol'], r['timeframe']) not in new_keys]
+        merged.extend(results)
+
+        tmp_file = f"{results_file}.tmp.{os.getpid()}"
+        with open(tmp_file, 'w') as f:
+            json.dump({"total": len(merged), "results": merged}, f, indent=2)
+        os.replace(tmp_file, results_file)
+
+
+def _configure(args):
+    """Setzt die Modul-Globals für objective() aus den CLI-Argumenten."""
+    global CONFIG_SUFFIX, MAX_DRAWDOWN_CONSTRAINT, MIN_WIN_RATE_CONSTRAINT, MIN_PNL_CONSTRAINT, START_CAPITAL, OPTIM_MODE, PRUNING, WARM_START, USE_RESULT_CACHE, ENGINE, POPULATION_SIZE, USE_SIGNAL_GRID
+    indicator_cache.max_bytes = args.cache_mb * 1024 * 1024
+    CONFIG_SUFFIX = args.config_suffix
+    MAX_DRAWDOWN_CONSTRAINT, MIN_WIN_RATE_CONSTRAINT, MIN_PNL_CONSTRAINT = args.max_drawdown / 100.0, args.min_win_rate, args.min_pnl
+    START_CAPITAL, OPTIM_MODE = args.start_capital, args.mode
+    PRUNING = _load_pruning_settings()
+    WARM_START = _load_warm_start_settings(args.warm_start)
+    USE_RESULT_CACHE = not args.no_result_cache
+    ENGINE, POPULATION_SIZE = args.engine, max(1, args.population_size)
+    USE_SIGNAL_GRID = not args.no_signal_grid
+
+
+STORAGE_BACKENDS = ('sqlite', 'journal', 'memory')
+DB_DIR = os.path.join(PROJECT_ROOT, 'artifacts', 'db')
+
+
+def _storage_url():
+    DB_FILE = os.path.join(DB_DIR, 'optuna_studies_ichimoku.db')
+    os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
+    return f"sqlite:///{DB_FILE}?timeout=60"
+
+
+def _journal_path(study_name):
+    os.makedirs(DB_DIR, exist_ok=True)
+    return os.path.join(DB_DIR, f"{study_name}.journal")
+
+
+def create_storage(backend, study_name):
+    """
+    Storage für eine Study:
+      sqlite  - gemeinsame DB (bisheriges Verhalten, Schreib-Lock über alle Paare/Worker)
+      journal - eigene Append-only-Journaldatei pro Study, kein DB-Lock zwischen Prozessen
+      memory  - In-Memory (nur Threads im selben Prozess), mit Checkpoints als Journal
+    """
+    if backend == 'journal':
+        return optuna.storages.JournalStorage(JournalFileBackend(_journal_path(study_name)))
+    if backend == 'memory':
+        return optuna.storages.InMemoryStorage()
+    if backend == 'sqlite':
+        return _storage_url()
+    raise ValueError(f"Unbekanntes Storage-Backend '{backend}' (erlaubt: {', '.join(STORAGE_BACKENDS)})")
+
+
+def _reset_study(backend, study_name):
+    """Alte Study löschen falls vorhanden, um mit frischen Parametern zu starten."""
+    if backend == 'memory':
+        return
+    if backend == 'journal':
+        path = _journal_path(study_name)
+        if os.path.exists(path):
+            os.remove(path)
+            print(f"  -> Altes Journal '{os.path.basename(path)}' gelöscht, starte neu...")
+        return
+    try:
+        optuna.delete_study(study_name=study_name, storage=_storage_url())
+        print(f"  -> Alte Study '{study_name}' gelöscht, starte neu...")
+    except KeyError:
+        pass  # Study existiert noch nicht
+
+
+class _MemoryCheckpoint:
+    """
+    Optuna-Callback: kopiert eine In-Memory-Study alle `every` beendeten Trials
+    in eine Journaldatei (<study>.checkpoint.journal), die per load_study geladen werden kann.
+    """
+    def __init__(self, storage, study_name, every):
+        self.storage = storage
+        self.study_name = study_name
+        self.every = max(1, every)
+        self.path = os.path.join(DB_DIR, f"{study_name}.checkpoint.journal")
+        self._lock = threading.Lock()
+
+    def __call__(self, study, trial):
+        if (trial.number + 1) % self.every == 0:
+            self.write()
+
+    def write(self):
+        with self._lock:
+            os.makedirs(DB_DIR, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            optuna.copy_study(from_study_name=self.study_name, from_storage=self.storage,
+                              to_storage=optuna.storages.JournalStorage(JournalFileBackend(tmp_path)))
+            os.replace(tmp_path, self.path)
+
+
+def _load_previous_study(backend, study_name):
+    """Die Study des letzten Laufs (vor dem Zurücksetzen), falls vorhanden."""
+    try:
+        if backend == 'journal':
+            if not os.path.exists(_journal_path(study_name)):
+                return None
+            return optuna.load_study(study_name=study_name, storage=create_storage('journal', study_name))
+        if backend == 'memory':
+            checkpoint_path = os.path.join(DB_DIR, f"{study_name}.checkpoint.journal")
+            if not os.path.exists(checkpoint_path):
+                return None
+            return optuna.load_study(study_name=study_name,
+                                     storage=optuna.storages.JournalStorage(JournalFileBackend(checkpoint_path)))
+        return optuna.load_study(study_name=study_name, storage=_storage_url())
+    except (KeyError, ValueError, OSError):
+        return None
+
+
+def _clamp_to_search_space(params: dict) -> dict:
+    """Übernimmt nur bekannte Parameter und begrenzt sie auf den Suchraum."""
+    seed = {}
+    for name, spec in SEARCH_SPACE.items():
+        if name not in params:
+            continue
+        value = params[name]
+        if spec[0] == 'categorical':
+            if value in spec[1]:
+                seed[name] = value
+            continue
+        value = min(max(value, spec[1]), spec[2])
+        seed[name] = int(round(value)) if spec[0] == 'int' else float(value)
+    return seed
+
+
+def warm_start_seeds(backend, study_name, config_path, top_k) -> list:
+    """
+    Startpunkte für eine neue Study: die aktuell gespeicherte Config des Paares
+    und die `top_k` besten abgeschlossenen Trials des letzten Laufs.
+    """
+    seeds = []
+    if os.path.exists(config_path):
+        try:
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+            seeds.append(_clamp_to_search_space({**config.get('strategy', {}), **config.get('risk', {})}))
+        except (OSError, ValueError):
+            pass
+
+    previous = _load_previous_study(backend, study_name)
+    if previous is not None:
+        completed = [t for t in previous.trials if t.state == optuna.trial.TrialState.COMPLETE and t.value is not None]
+        for trial in sorted(completed, key=lambda t: t.value, reverse=True)[:top_k]:
+            seeds.append(_clamp_to_search_space(trial.params))
+
+    unique = []
+    for seed in seeds:
+        if seed and seed not in unique:
+            unique.append(seed)
+    return unique
+
+
+def narrow_search_space(seeds: list, margin: float) -> dict:
+    """
+    Engt numerische Bereiche auf [min(seeds), max(seeds)] ± margin * ursprüngliche Breite ein
+    (begrenzt auf den ursprünglichen Suchraum). Kategorische Parameter bleiben unverändert.
+    """
+    narrowed = dict(SEARCH_SPACE)
+    for name, spec in SEARCH_SPACE.items():
+        values = [seed[name] for seed in seeds if name in seed]
+        if spec[0] == 'categorical' or not values:
+            continue
+        padding = margin * (spec[2] - spec[1])
+        low, high = max(spec[1], min(values) - padding), min(spec[2], max(values) + padding)
+        if spec[0] == 'int':
+            low, high = int(math.floor(low)), int(math.ceil(high))
+        narrowed[name] = (spec[0], low, high)
+    return narrowed
+
+
+def optimize_pair(task, args, workers, data=None, show_progress_bar=True) -> dict:
+    """Optimiert ein Symbol/Timeframe-Paar mit `workers` Jobs und schreibt die beste Config."""
+    global CURRENT_SYMBOL, CURRENT_TIMEFRAME, CURRENT_HTF, ACTIVE_SEARCH_SPACE
+    symbol, timeframe = task['symbol'], task['timeframe']
+    CURRENT_SYMBOL = symbol
+    CURRENT_TIMEFRAME = timeframe
+    CURRENT_HTF = determine_htf(timeframe)
+
+    actual_start = _resolve_start_date(timeframe, args.end_date) if args.start_date == 'auto' else args.start_date
+    print(f"\n===== Optimiere: {symbol} ({timeframe}) [Ichimoku + Supertrend MTF] =====")
+    if data is None:
+        data = load_data(symbol, timeframe, actual_start, args.end_date)
+    if data.empty:
+        return {"symbol": symbol, "timeframe": timeframe, "status": "failed", "reason": "no_data"}
+
+    _prepare_dataset(data)
+    _prepare_signal_grid(verbose=True)
+
+    study_name = f"ichi_st_{create_safe_filename(symbol, timeframe)}{CONFIG_SUFFIX}_{OPTIM_MODE}"
+    config_dir = os.path.join(PROJECT_ROOT, 'src', 'utbot2', 'strategy', 'configs')
+    config_output_path = os.path.join(config_dir, f'config_{create_safe_filename(symbol, timeframe)}{CONFIG_SUFFIX}.json')
+
+    seeds = []
+    ACTIVE_SEARCH_SPACE = SEARCH_SPACE
+    if WARM_START:
+        # Vor dem Zurücksetzen lesen: aktuelle Config + beste Trials des letzten Laufs
+        seeds = warm_start_seeds(args.storage, study_name, config_output_path, int(WARM_START.get('top_k', 10)))
+        if seeds and float(WARM_START.get('narrow_ranges', 0)) > 0:
+            ACTIVE_SEARCH_SPACE = narrow_search_space(seeds, float(WARM_START['narrow_ranges']))
+
+    _reset_study(args.storage, study_name)
+    storage = create_storage(args.storage, study_name)
+
+    study = optuna.create_study(storage=storage, study_name=study_name, direction="maximize", load_if_exists=False,
+                                sampler=_create_sampler(), pruner=_create_pruner(PRUNING))
+    for seed in seeds:
+        study.enqueue_trial(seed, skip_if_exists=True)
+    if seeds:
+        print(f"  -> Warm-Start mit {len(seeds)} Startpunkten"
+              f"{' (Suchraum eingeengt)' if ACTIVE_SEARCH_SPACE is not SEARCH_SPACE else ''}.")
+    try:
+        # Eine In-Memory-Study lässt sich nicht zwischen Prozessen teilen -> dort immer Threads
+        if args.executor == 'process' and workers > 1 and args.storage != 'memory':
+            _optimize_in_processes(study_name, args.storage, args.trials, workers)
+        elif ENGINE == 'population':
+            # Ein Batch wird vektorisiert simuliert -> keine zusätzlichen Threads
+            callbacks = []
+            if args.storage == 'memory':
+                callbacks.append(_MemoryCheckpoint(storage, study_name, args.checkpoint_every))
+            optimize_population(study, args.trials, POPULATION_SIZE, callbacks=callbacks,
+                                show_progress_bar=show_progress_bar)
+            for callback in callbacks:
+                callback.write()
+        elif args.storage == 'memory':
+            checkpoint = _MemoryCheckpoint(storage, study_name, args.checkpoint_every)
+            study.optimize(objective, n_trials=args.trials, n_jobs=workers, show_progress_bar=show_progress_bar,
+                           callbacks=[checkpoint])
+            checkpoint.write()
+        else:
+            study.optimize(objective, n_trials=args.trials, n_jobs=workers, show_progress_bar=show_progress_bar)
+    except Exception as e:
+        print(f"FEHLER: {e}")
+        return {"symbol": symbol, "timeframe": timeframe, "status": "failed", "reason": "error"}
+
+    cache_stats = indicator_cache.stats()
+    if cache_stats['hits'] + cache_stats['misses']:
+        print(f"  -> Indikator-Cache: {cache_stats['hits']} Hits / {cache_stats['misses']} Misses, "
+              f"{cache_stats['entries']} Einträge ({cache_stats['bytes'] / 1024 / 1024:.0f} MB)")
+
+    valid_trials = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+    if not valid_trials:
+        return {"symbol": symbol, "timeframe": timeframe, "status": "failed", "reason": "no_valid_trials"}
+
+    best_trial = max(valid_trials, key=lambda t: t.value)
+    best_params = best_trial.params
+
+    os.makedirs(config_dir, exist_ok=True)
+
+    # Robuste Config-Erstellung (kompatibel mit alten und neuen Trials)
+    strategy_config = {
+        'tenkan_period': best_params.get('tenkan_period', 9),
+        'kijun_period': best_params.get('kijun_period', 26),
+        'senkou_span_b_period': best_params.get('senkou_span_b_period', 52),
+        'displacement': 26,
+        'require_tk_cross': best_params.get('require_tk_cross', False),
+        'supertrend_atr_period': best_params.get('supertrend_atr_period', 10),
+        'supertrend_multiplier': round(best_params.get('supertrend_multiplier', 3.0), 2)
+    }
+
+    risk_config = {
+        'margin_mode': "isolated",
+        'risk_per_trade_pct': round(best_params.get('risk_per_trade_pct', 1.0), 2),
+        'risk_reward_ratio': round(best_params.get('risk_reward_ratio', 2.0), 2),
+        'leverage': best_params.get('leverage', 10),
+        'trailing_stop_activation_rr': round(best_params.get('trailing_stop_activation_rr', 2.0), 2),
+        'trailing_stop_callback_rate_pct': round(best_params.get('trailing_stop_callback_rate_pct', 1.0), 2),
+        'atr_multiplier_sl': round(best_params.get('atr_multiplier_sl', 2.0), 2),
+        'min_sl_pct': 0.5
+    }
+    behavior_config = {"use_longs": True, "use_shorts": True}
+
+    config_output = {
+        "market": {"symbol": symbol, "timeframe": timeframe, "htf": CURRENT_HTF},
+        "strategy": strategy_config,
+        "risk": risk_config, "behavior": behavior_config
+    }
+    with open(config_output_path, 'w') as f: json.dump(config_output, f, indent=4)
+    print(f"\n✔ Beste Konfiguration gespeichert.")
+    return {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "status": "success",
+        "pnl_pct": round(best_trial.value, 2),
+        "config_file": os.path.basename(config_output_path)
+    }
+
+
+def _pair_process(task, args, workers, results_file):
+    """Einstiegspunkt eines Paar-Prozesses des Schedulers: optimieren und Ergebnis mergen."""
+    _configure(args)
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    merge_results(results_file, [optimize_pair(task, args, workers, show_progress_bar=False)])
+
+
+def run_scheduled(tasks, args, budget, results_file):
+    """
+    Optimiert mehrere Paare gleichzeitig. Jedes Paar läuft in einem eigenen (nicht-daemonischen)
+    Prozess mit einem Anteil des CPU-Budgets; längere Datensätze bekommen mehr Worker. Die längsten
+    Paare starten zuerst, freie Kerne werden sofort an das nächste wartende Paar vergeben.
+    """
+    lengths = {}
+    for index, task in enumerate(tasks):
+        actual_start = _resolve_start_date(task['timeframe'], args.end_date) if args.start_date == 'auto' else args.start_date
+        # Lädt bzw. ergänzt den Cache vorab sequenziell (LTF und HTF - Paare mit gemeinsamer HTF
+        # würden dieselbe Datei sonst gleichzeitig nachladen); die Paar-Prozesse lesen dann nur noch
+        data = load_data(task['symbol'], task['timeframe'], actual_start, args.end_date)
+        lengths[index] = len(data)
+        if not data.empty:
+            load_htf_data({'symbol': task['symbol'], 'timeframe': task['timeframe'],
+                           'htf': determine_htf(task['timeframe'])}, data.index.min(), data.index.max())
+
+    allocation = allocate_cpu_budget(lengths, budget)
+    pending = sorted(lengths, key=lambda index: lengths[index], reverse=True)
+    for index in pending:
+        task = tasks[index]
+        print(f"  -> {task['symbol']} ({task['timeframe']}): {lengths[index]} Kerzen, {allocation[index]} Worker")
+
+    # Schema einmal hier anlegen, sonst legen parallel startende Paar-Prozesse die Tabellen gleichzeitig an
+    if args.storage == 'sqlite':
+        optuna.storages.RDBStorage(_storage_url())
+
+    ctx = multiprocessing.get_context('spawn')
+    running = {}
+    free = budget
+    failed = []
+    while pending or running:
+        while pending and allocation[pending[0]] <= free:
+            index = pending.pop(0)
+            process = ctx.Process(target=_pair_process, args=(tasks[index], args, allocation[index], results_file))
+            process.start()
+            running[process.sentinel] = (index, process)
+            free -= allocation[index]
+
+        for sentinel in multiprocessing.connection.wait(list(running)):
+            index, process = running.pop(sentinel)
+            process.join()
+            free += allocation[index]
+            if process.exitcode != 0:
+                failed.append({"symbol": tasks[index]['symbol'], "timeframe": tasks[index]['timeframe'],
+                               "status": "failed", "reason": "error"})
+    if failed:
+        merge_results(results_file, failed)
+
+
 def main():
-    global HISTORICAL_DATA, CURRENT_SYMBOL, CURRENT_TIMEFRAME, CURRENT_HTF, CONFIG_SUFFIX, MAX_DRAWDOWN_CONSTRAINT, MIN_WIN_RATE_CONSTRAINT, MIN_PNL_CONSTRAINT, START_CAPITAL, OPTIM_MODE
     parser = argparse.ArgumentParser(description="Parameter-Optimierung für UtBot2 (Ichimoku)")
     parser.add_argument('--symbols', required=True, type=str)
     parser.add_argument('--timeframes', required=True, type=str)
@@ -113,123 +919,50 @@ def main():
     parser.add_argument('--min_pnl', required=True, type=float)
     parser.add_argument('--mode', required=True, type=str)
     parser.add_argument('--config_suffix', type=str, default="")
+    parser.add_argument('--executor', choices=['process', 'thread'], default='process',
+                        help="process: ein Prozess pro Job (umgeht den GIL), thread: Optuna n_jobs-Threads")
+    parser.add_argument('--storage', choices=STORAGE_BACKENDS, default='journal',
+                        help="journal: Append-only-Datei pro Study, sqlite: gemeinsame DB, memory: In-Memory mit Checkpoints")
+    parser.add_argument('--checkpoint_every', type=int, default=50,
+                        help="memory-Storage: Checkpoint alle N Trials")
+    parser.add_argument('--warm_start', dest='warm_start', action='store_true', default=None,
+                        help="Study mit aktueller Config + besten Trials des letzten Laufs vorbelegen")
+    parser.add_argument('--cold_start', dest='warm_start', action='store_false',
+                        help="Warm-Start aus settings.json für diesen Lauf deaktivieren")
+    parser.add_argument('--sequential', action='store_true',
+                        help="Paare nacheinander optimieren statt das CPU-Budget parallel aufzuteilen")
+    parser.add_argument('--engine', choices=['trial', 'population'], default='trial',
+                        help="trial: ein Backtest pro Trial; population: ask/tell-Batches im Populations-Backtest")
+    parser.add_argument('--population_size', type=int, default=POPULATION_SIZE,
+                        help="Trials pro ask/tell-Batch bei --engine population, höchstens max(10, trials/8). "
+                             "Größere Batches simulieren effizienter, der Sampler lernt aber erst nach jedem Batch")
+    parser.add_argument('--no_signal_grid', action='store_true',
+                        help="Ichimoku-Signale nicht als Raster vorberechnen (data/cache/*.signals.npz)")
+    parser.add_argument('--no_result_cache', action='store_true',
+                        help="Backtest-Ergebnisse nicht aus artifacts/cache lesen/schreiben")
+    parser.add_argument('--cache_mb', type=int, default=512, help="Speicherbudget des Indikator-Caches in MB")
     args = parser.parse_args()
 
-    CONFIG_SUFFIX = args.config_suffix
-    MAX_DRAWDOWN_CONSTRAINT, MIN_WIN_RATE_CONSTRAINT, MIN_PNL_CONSTRAINT = args.max_drawdown / 100.0, args.min_win_rate, args.min_pnl
-    START_CAPITAL, N_TRIALS, OPTIM_MODE = args.start_capital, args.trials, args.mode
+    _configure(args)
+    budget = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if PRUNING:
+        print(f"INFO: Multi-Fidelity aktiv ({PRUNING.get('pruner', 'hyperband')}, {PRUNING['chunks']} Abschnitte).")
 
     symbols, timeframes = args.symbols.split(), args.timeframes.split()
     TASKS = [{'symbol': f"{s}/USDT:USDT", 'timeframe': tf} for s in symbols for tf in timeframes]
 
     print(f"INFO: {len(TASKS)} Strategie-Paare werden optimiert.")
 
-    results = []
-
-    for task in TASKS:
-        symbol, timeframe = task['symbol'], task['timeframe']
-        CURRENT_SYMBOL = symbol
-        CURRENT_TIMEFRAME = timeframe
-        CURRENT_HTF = determine_htf(timeframe)
-
-        actual_start = _resolve_start_date(timeframe, args.end_date) if args.start_date == 'auto' else args.start_date
-        print(f"\n===== Optimiere: {symbol} ({timeframe}) [Ichimoku + Supertrend MTF] =====")
-        HISTORICAL_DATA = load_data(symbol, timeframe, actual_start, args.end_date)
-        if HISTORICAL_DATA.empty:
-            results.append({"symbol": symbol, "timeframe": timeframe, "status": "failed", "reason": "no_data"})
-            continue
-
-        DB_FILE = os.path.join(PROJECT_ROOT, 'artifacts', 'db', 'optuna_studies_ichimoku.db')
-        os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
-        STORAGE_URL = f"sqlite:///{DB_FILE}?timeout=60"
-        study_name = f"ichi_st_{create_safe_filename(symbol, timeframe)}{CONFIG_SUFFIX}_{OPTIM_MODE}"
-
-        # Alte Study löschen falls vorhanden, um mit frischen Parametern zu starten
-        try:
-            optuna.delete_study(study_name=study_name, storage=STORAGE_URL)
-            print(f"  -> Alte Study '{study_name}' gelöscht, starte neu...")
-        except KeyError:
-            pass  # Study existiert noch nicht
-
-        study = optuna.create_study(storage=STORAGE_URL, study_name=study_name, direction="maximize", load_if_exists=False)
-        try:
-            study.optimize(objective, n_trials=N_TRIALS, n_jobs=args.jobs, show_progress_bar=True)
-        except Exception as e:
-            print(f"FEHLER: {e}")
-            results.append({"symbol": symbol, "timeframe": timeframe, "status": "failed", "reason": "error"})
-            continue
-
-        valid_trials = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
-        if not valid_trials:
-            results.append({"symbol": symbol, "timeframe": timeframe, "status": "failed", "reason": "no_valid_trials"})
-            continue
-
-        best_trial = max(valid_trials, key=lambda t: t.value)
-        best_params = best_trial.params
-
-        config_dir = os.path.join(PROJECT_ROOT, 'src', 'utbot2', 'strategy', 'configs')
-        os.makedirs(config_dir, exist_ok=True)
-        config_output_path = os.path.join(config_dir, f'config_{create_safe_filename(symbol, timeframe)}{CONFIG_SUFFIX}.json')
-
-        # Robuste Config-Erstellung (kompatibel mit alten und neuen Trials)
-        strategy_config = {
-            'tenkan_period': best_params.get('tenkan_period', 9),
-            'kijun_period': best_params.get('kijun_period', 26),
-            'senkou_span_b_period': best_params.get('senkou_span_b_period', 52),
-            'displacement': 26,
-            'require_tk_cross': best_params.get('require_tk_cross', False),
-            'supertrend_atr_period': best_params.get('supertrend_atr_period', 10),
-            'supertrend_multiplier': round(best_params.get('supertrend_multiplier', 3.0), 2)
-        }
-
-        risk_config = {
-            'margin_mode': "isolated",
-            'risk_per_trade_pct': round(best_params.get('risk_per_trade_pct', 1.0), 2),
-            'risk_reward_ratio': round(best_params.get('risk_reward_ratio', 2.0), 2),
-            'leverage': best_params.get('leverage', 10),
-            'trailing_stop_activation_rr': round(best_params.get('trailing_stop_activation_rr', 2.0), 2),
-            'trailing_stop_callback_rate_pct': round(best_params.get('trailing_stop_callback_rate_pct', 1.0), 2),
-            'atr_multiplier_sl': round(best_params.get('atr_multiplier_sl', 2.0), 2),
-            'min_sl_pct': 0.5
-        }
-        behavior_config = {"use_longs": True, "use_shorts": True}
-
-        config_output = {
-            "market": {"symbol": symbol, "timeframe": timeframe, "htf": CURRENT_HTF},
-            "strategy": strategy_config,
-            "risk": risk_config, "behavior": behavior_config
-        }
-        with open(config_output_path, 'w') as f: json.dump(config_output, f, indent=4)
-        print(f"\n✔ Beste Konfiguration gespeichert.")
-        results.append({
-            "symbol": symbol,
-            "timeframe": timeframe,
-            "status": "success",
-            "pnl_pct": round(best_trial.value, 2),
-            "config_file": os.path.basename(config_output_path)
-        })
-
     results_dir = os.path.join(PROJECT_ROOT, 'artifacts', 'results')
     os.makedirs(results_dir, exist_ok=True)
     results_file = os.path.join(results_dir, 'optimization_results.json')
 
-    # Merge with existing results (don't overwrite previous runs in the same pipeline)
-    existing_results = []
-    if os.path.exists(results_file):
-        try:
-            with open(results_file) as f:
-                existing_data = json.load(f)
-            existing_results = existing_data.get('results', [])
-        except Exception:
-            existing_results = []
-
-    # Replace entries for the same symbol/timeframe, keep the rest
-    new_keys = {(r['symbol'], r['timeframe']) for r in results}
-    merged = [r for r in existing_results if (r['symbol'], r['timeframe']) not in new_keys]
-    merged.extend(results)
-
-    with open(results_file, 'w') as f:
-        json.dump({"total": len(merged), "results": merged}, f, indent=2)
+    if len(TASKS) > 1 and budget > 1 and not args.sequential:
+        print(f"INFO: Paar-Scheduler mit {budget} Kernen.")
+        run_scheduled(TASKS, args, budget, results_file)
+    else:
+        results = [optimize_pair(task, args, budget) for task in TASKS]
+        merge_results(results_file, results)
     print(f"\nErgebnisse gespeichert: {results_file}")
 
 if __name__ == "__main__":
@@ -0,0 +1,200 @@
+# /root/utbot2/src/utbot2/analysis/population_backtester.py
+"""
+Populations-Backtest: simuliert N Parameter-Sets gleichzeitig über dieselben
+OHLCV-Arrays.
+
+Der Zustand (Position, Entry, SL/TP, Trailing, Kapital, Drawdown) liegt als
+Array der Länge N vor; pro Kerze wird er für alle Mitglieder mit NumPy-Masken
+fortgeschrieben. Die Regeln sind identisch zu backtester.simulate_trades
+(gleiche Rechenreihenfolge, gleiche Vergleiche), die Ergebnisse stimmen also
+Trial für Trial überein. Der Optimizer nutzt das über Optunas ask/tell-Schnittstelle
+(siehe optimizer.optimize_population).
+"""
+import os
+import sys
+from bisect import bisect_left
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.analysis.backtester import (ABSOLUTE_MAX_NOTIONAL_VALUE, FEE_PCT, MAX_ALLOWED_EFFECTIVE_LEVERAGE,
+                                        _trade_stats)
+
+
+def _risk_array(risk_params_list, name, default, scale=None):
+    values = np.array([rp.get(name, default) for rp in risk_params_list], dtype=np.float64)
+    return values / scale if scale else values
+
+
+def simulate_population(high, low, close, atr, signals, risk_params_list, start_capital=1000,
+                        abort_max_drawdown=None, abort_capital_floor=None, checkpoints=None, on_checkpoint=None):
+    """
+    Positions-Simulation für viele Parameter-Sets auf einmal.
+
+    Args:
+        high, low, close, atr: np.ndarray (float64) pro Kerze, für alle Mitglieder gleich
+        signals: int8-Matrix (Mitglieder x Kerzen), 1 = buy, -1 = sell, 0 = kein Signal
+        risk_params_list: ein Risiko-Dict pro Mitglied (wie bei simulate_trades)
+        start_capital, abort_max_drawdown, abort_capital_floor: wie bei simulate_trades
+        checkpoints: aufsteigende Kerzen-Indizes; beim Erreichen wird
+            on_checkpoint(schritt, {mitglied: zwischenergebnis}) für alle noch laufenden
+            Mitglieder aufgerufen. Der Callback liefert die Mitglieder, die abbrechen sollen.
+
+    Returns:
+        Liste mit einem Ergebnis-Dict pro Mitglied (Format von simulate_trades)
+    """
+    signals = np.atleast_2d(np.asarray(signals, dtype=np.int8))
+    n_members, n_bars = signals.shape
+    highs = np.asarray(high, dtype=np.float64).tolist()
+    lows = np.asarray(low, dtype=np.float64).tolist()
+    closes = np.asarray(close, dtype=np.float64).tolist()
+    atrs = np.asarray(atr, dtype=np.float64).tolist()
+
+    risk_reward_ratio = _risk_array(risk_params_list, 'risk_reward_ratio', 2.0)
+    risk_per_trade_pct = _risk_array(risk_params_list, 'risk_per_trade_pct', 1.0, 100)
+    activation_rr = _risk_array(risk_params_list, 'trailing_stop_activation_rr', 2.0)
+    callback_rate = _risk_array(risk_params_list, 'trailing_stop_callback_rate_pct', 1.0, 100)
+    leverage = _risk_array(risk_params_list, 'leverage', 10)
+    atr_multiplier_sl = _risk_array(risk_params_list, 'atr_multiplier_sl', 2.0)
+    min_sl_pct = _risk_array(risk_params_list, 'min_sl_pct', 0.5, 100.0)
+    long_trailing_factor = 1 - callback_rate
+    short_trailing_factor = 1 + callback_rate
+
+    capital = np.full(n_members, float(start_capital))
+    peak_capital = capital.copy()
+    max_drawdown_pct = np.zeros(n_members)
+    trades_count = np.zeros(n_members, dtype=np.int64)
+    wins_count = np.zeros(n_members, dtype=np.int64)
+    aborted_at = np.full(n_members, -1, dtype=np.int64)
+    running = np.ones(n_members, dtype=bool)
+
+    # Positions-Records als Spalten. Preise von Shorts werden negiert gespeichert
+    # (Entry, SL, TP, Aktivierung, Peak), damit Long und Short mit denselben
+    # Vergleichen auskommen: "Low <= SL" eines Shorts ist "-High <= -SL".
+    # Die Negation ist exakt, die Ergebnisse bleiben bitgleich zu simulate_trades.
+    in_position = np.zeros(n_members, dtype=bool)
+    is_long = np.zeros(n_members, dtype=bool)
+    pos_entry = np.zeros(n_members)
+    pos_sl = np.zeros(n_members)
+    pos_tp = np.zeros(n_members)
+    pos_activation = np.zeros(n_members)
+    pos_peak = np.zeros(n_members)
+    pos_trailing_factor = np.zeros(n_members)
+    pos_notional = np.zeros(n_members)
+    pos_trailing = np.zeros(n_members, dtype=bool)
+
+    checkpoints = list(checkpoints) if (checkpoints is not None and on_checkpoint is not None) else []
+    next_checkpoint = checkpoints[0] if checkpoints else -1
+    checkpoint_step = 0
+    # Solange kein Mitglied eine Position hält, zählen nur Kerzen mit irgendeinem Signal
+    signal_bars = np.flatnonzero(signals.any(axis=0)).tolist()
+
+    bar_index = -1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        while True:
+            bar_index += 1
+            running &= capital > 0
+            in_position &= running
+            if not running.any(): break
+
+            any_position = in_position.any()
+            if not any_position:
+                next_signal = bisect_left(signal_bars, bar_index)
+                bar_index = signal_bars[next_signal] if next_signal < len(signal_bars) else n_bars
+
+            while 0 <= next_checkpoint <= bar_index and next_checkpoint < n_bars:
+                checkpoint_step += 1
+                partials = {int(m): _trade_stats(start_capital, float(capital[m]), int(trades_count[m]),
+                                                 int(wins_count[m]), float(max_drawdown_pct[m]))
+                            for m in np.flatnonzero(running)}
+                for m in on_checkpoint(checkpoint_step, partials) or ():
+                    if running[m]:
+                        running[m] = in_position[m] = False
+                        aborted_at[m] = next_checkpoint
+                next_checkpoint = checkpoints[checkpoint_step] if checkpoint_step < len(checkpoints) else -1
+            if bar_index >= n_bars or not running.any(): break
+
+            bar_high, bar_low, bar_close, bar_atr = highs[bar_index], lows[bar_index], closes[bar_index], atrs[bar_index]
+
+            # --- Positions-Management ---
+            if any_position:
+                # Günstige / ungünstige Kerzenseite in Positionsrichtung (Shorts negiert)
+                favorable = np.where(is_long, bar_high, -bar_low)
+                adverse = np.where(is_long, bar_low, -bar_high)
+                pos_trailing |= in_position & (favorable >= pos_activation)
+                trailing = in_position & pos_trailing
+                np.copyto(pos_peak, favorable, where=trailing & (favorable > pos_peak))
+                trailing_sl = pos_peak * pos_trailing_factor
+                np.copyto(pos_sl, trailing_sl, where=trailing & (trailing_sl > pos_sl))
+
+                exit_sl = in_position & (adverse <= pos_sl)
+                exit_tp = in_position & ~exit_sl & ~pos_trailing & (favorable >= pos_tp)
+                exit_price = np.where(exit_sl, pos_sl, pos_tp)
+                exiting = (exit_sl | exit_tp) & (exit_price != 0)
+
+                if exiting.any():
+                    ratio = exit_price / pos_entry
+                    pnl_pct = np.where(is_long, ratio - 1, 1 - ratio)
+                    pnl_usd = pos_notional * pnl_pct
+                    total_fees = pos_notional * FEE_PCT * 2
+                    net = pnl_usd - total_fees
+                    np.copyto(capital, capital + net, where=exiting)
+                    wins_count += exiting & (net > 0)
+                    trades_count += exiting
+                    in_position &= ~exiting
+                    np.copyto(peak_capital, capital, where=exiting & (capital > peak_capital))
+                    drawdown = (peak_capital - capital) / peak_capital
+                    np.copyto(max_drawdown_pct, drawdown,
+                              where=exiting & (peak_capital > 0) & (drawdown > max_drawdown_pct))
+
+                    # Drawdown und Kapital ändern sich nur bei Ausstiegen -> nur hier prüfen
+                    breached = np.zeros(n_members, dtype=bool)
+                    if abort_max_drawdown is not None:
+                        breached |= max_drawdown_pct > abort_max_drawdown
+                    if abort_capital_floor is not None:
+                        breached |= capital < abort_capital_floor
+                    breached &= exiting
+                    if breached.any():
+                        aborted_at[breached] = bar_index
+                        running &= ~breached
+
+            # --- Einstiegs-Logik ---
+            signal = signals[:, bar_index]
+            entering = running & ~in_position & (capital > 0) & (signal != 0)
+            if bar_atr <= 0 or not entering.any(): continue
+
+            entry_price = bar_close
+            atr_dist = bar_atr * atr_multiplier_sl
+            min_dist = entry_price * min_sl_pct
+            sl_dist = np.where(min_dist > atr_dist, min_dist, atr_dist)
+
+            risk_amount_usd = capital * risk_per_trade_pct
+            sl_pct = sl_dist / entry_price
+            calc_notional = risk_amount_usd / sl_pct
+            max_notional = capital * MAX_ALLOWED_EFFECTIVE_LEVERAGE
+            final_notional = np.where(max_notional < calc_notional, max_notional, calc_notional)
+            final_notional = np.where(ABSOLUTE_MAX_NOTIONAL_VALUE < final_notional, ABSOLUTE_MAX_NOTIONAL_VALUE, final_notional)
+            margin_needed = final_notional / leverage
+            entering &= (sl_pct > 0) & ~(margin_needed > capital)
+            if not entering.any(): continue
+
+            going_long = signal == 1
+            np.copyto(is_long, going_long, where=entering)
+            np.copyto(pos_sl, np.where(going_long, entry_price - sl_dist, -(entry_price + sl_dist)), where=entering)
+            np.copyto(pos_tp, np.where(going_long, entry_price + sl_dist * risk_reward_ratio,
+                                       -(entry_price - sl_dist * risk_reward_ratio)), where=entering)
+            np.copyto(pos_activation, np.where(going_long, entry_price + sl_dist * activation_rr,
+                                               -(entry_price - sl_dist * activation_rr)), where=entering)
+            np.copyto(pos_trailing_factor, np.where(going_long, long_trailing_factor, short_trailing_factor), where=entering)
+            signed_entry = np.where(going_long, entry_price, -entry_price)
+            np.copyto(pos_entry, signed_entry, where=entering)
+            np.copyto(pos_peak, signed_entry, where=entering)
+            np.copyto(pos_notional, final_notional, where=entering)
+            pos_trailing &= ~entering
+            in_position |= entering
+
+    return [_trade_stats(start_capital, float(capital[m]), int(trades_count[m]), int(wins_count[m]),
+                         float(max_drawdown_pct[m]), int(aborted_at[m]) if aborted_at[m] >= 0 else None)
+            for m in range(n_members)]
@@ -6,18 +6,96 @@ import sys
 import os
 import json # Fürs Speichern
 import numpy as np # Für np.nan
+import multiprocessing
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
-from utbot2.analysis.portfolio_simulator import run_portfolio_simulation
+from utbot2.analysis.portfolio_screening import approximate_portfolios, equity_returns, select_finalists
+from utbot2.analysis.portfolio_simulator import (GRID_MATRICES, build_time_grid, prepare_strategy, select_from_grid,
+                                                 simulate_portfolio, simulate_time_grid)
+
+# Kandidaten pro Greedy-Runde, die nach dem Näherungs-Screening exakt simuliert werden
+SCREEN_TOP_K = 10
+
+# Zeitraster im Worker-Prozess (memory-mapped, nur lesend)
+_WORKER_GRID = None
+_WORKER_START_CAPITAL = None
+
+
+def _init_candidate_worker(grid_dir, timestamps, keys, risk_params, start_capital):
+    """Initializer der Worker: bindet die Raster-Matrizen per Memory-Mapping ein (kein Pickling)."""
+    global _WORKER_GRID, _WORKER_START_CAPITAL
+    _WORKER_GRID = {name: np.load(os.path.join(grid_dir, f"{name}.npy"), mmap_mode='r') for name in GRID_MATRICES}
+    _WORKER_GRID.update({'timestamps': timestamps, 'keys': keys, 'risk_params': risk_params})
+    _WORKER_START_CAPITAL = start_capital
+
+
+def _simulate_team(team_columns):
+    result = simulate_time_grid(_WORKER_START_CAPITAL, select_from_grid(_WORKER_GRID, team_columns), verbose=False)
+    if result:
+        result.pop('equity_curve', None)  # Kurve wird nur für den Gewinner einer Runde gebraucht
+    return result
+
+
+class _CandidateEvaluator:
+    """
+    Simuliert die Kandidaten-Teams einer Greedy-Runde. Mit mehr als einem Worker
+    über einen Prozess-Pool, der einmal pro Optimierung startet; die Matrizen des
+    Zeitrasters liegen dafür als .npy unter artifacts/tmp und werden von allen
+    Workern memory-mapped gelesen. Die Ergebnisse kommen immer in der Reihenfolge
+    der übergebenen Teams zurück.
+    """
+    def __init__(self, grid, start_capital, workers):
+        self.grid = grid
+        self.start_capital = start_capital
+        self.workers = workers
+        self._executor = None
+        self._grid_dir = None
+
+    def _start_pool(self):
+        self._grid_dir = os.path.join(PROJECT_ROOT, 'artifacts', 'tmp', f"portfolio_grid_{os.getpid()}")
+        os.makedirs(self._grid_dir, exist_ok=True)
+        for name in GRID_MATRICES:
+            np.save(os.path.join(self._grid_dir, f"{name}.npy"), self.grid[name])
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_candidate_worker,
+            initargs=(self._grid_dir, self.grid['timestamps'], self.grid['keys'], self.grid['risk_params'],
+                      self.start_capital))
+
+    def evaluate(self, teams, desc=None):
+        if self.workers <= 1 or len(teams) <= 1:
+            return [simulate_time_grid(self.start_capital, select_from_grid(self.grid, team), verbose=False)
+                    for team in tqdm(teams, desc=desc)]
+        if self._executor is None:
+            self._start_pool()
+        chunksize = max(1, len(teams) // (self.workers * 4))
+        return list(tqdm(self._executor.map(_simulate_team, teams, chunksize=chunksize), total=len(teams), desc=desc))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._grid_dir is not None:
+            shutil.rmtree(self._grid_dir, ignore_errors=True)
+            self._grid_dir = None
+
 
 # *** Angepasst: Nimmt target_max_dd entgegen ***
-def run_portfolio_optimizer(start_capital, strategies_data, start_date, end_date, target_max_dd: float):
+def run_portfolio_optimizer(start_capital, strategies_data, start_date, end_date, target_max_dd: float, workers=None,
+                            screen_top_k=SCREEN_TOP_K):
     """
     Findet die Kombination von SMC-Strategien, die das höchste Endkapital liefert,
     während der maximale Drawdown unter dem Zielwert (`target_max_dd`) bleibt UND jeder Coin nur einmal vorkommt.
     Verwendet einen modifizierten Greedy-Algorithmus.
+
+    `workers`: Prozesse für die Kandidaten einer Greedy-Runde (None = alle CPU-Kerne, 1 = sequentiell).
+    `screen_top_k`: Hat eine Runde mehr Kandidaten, werden sie zuerst mit dem Näherungsmodell
+    (portfolio_screening) bewertet und nur die besten `screen_top_k` exakt simuliert
+    (None/0 = alle exakt).
     """
     print(f"\n--- Starte automatische Portfolio-Optimierung (SMC) mit Max DD <= {target_max_dd:.2f}% & ohne Coin-Kollisionen ---")
     target_max_dd_decimal = target_max_dd / 100.0 # Umrechnung in Dezimalzahl für Vergleiche
@@ -29,15 +107,24 @@ def run_portfolio_optimizer(start_capital, strategies_data, start_date, end_date
     # --- 1. Analysiere Einzel-Performance & filtere nach Max DD ---
     print("1/3: Analysiere Einzel-Performance & filtere nach Max DD...")
     single_strategy_results = []
+    # Jede Strategie wird genau einmal vorbereitet (Indikatoren, HTF-Bias, Signale);
+    # alle Team-Simulationen greifen danach nur noch auf diese Artefakte zu
+    prepared_strategies = {}
 
     for filename, strat_data in tqdm(strategies_data.items(), desc="Bewerte Einzelstrategien"):
         strategy_key = f"{strat_data['symbol']}_{strat_data['timeframe']}"
-        sim_data = {strategy_key: strat_data}
         if 'data' not in strat_data or strat_data['data'].empty:
             print(f"WARNUNG: Keine Daten für {filename} in Einzelanalyse.")
             continue
 
-        result = run_portfolio_simulation(start_capital, sim_data, start_date, end_date)
+        try:
+            prepared = prepare_strategy(strat_data, start_date, end_date)
+        except Exception as e:
+            print(f"Fehler bei Vorbereitung von {strategy_key}: {e}")
+            prepared = None
+        if prepared is not None:
+            prepared_strategies[filename] = prepared
+        result = simulate_portfolio(start_capital, {strategy_key: prepared} if prepared is not None else {})
 
         if result and not result.get("liquidation_date"):
             # Max DD aus Ergebnis holen (als Dezimalzahl)
@@ -88,87 +175,113 @@ def run_portfolio_optimizer(start_capital, strategies_data, start_date, end_date
             initial_coin = initial_best_strat_data['symbol'].split('/')[0] # NEU
             selected_coins.add(initial_coin) # NEU
 
-    while True:
-        best_next_addition = None
-        best_capital_with_addition = best_end_capital # Starte mit dem Kapital des aktuellen besten Portfolios
-        current_best_result_for_addition = best_portfolio_result # Merke dir das Ergebnis dieser Runde
-
-        progress_bar = tqdm(candidate_pool, desc=f"Teste Team mit {len(best_portfolio_files)+1} Mitgliedern")
-        for candidate_file in progress_bar:
-
-            # --- START: NEUER CODE ZUR KOLLISIONSPRÜFUNG ---
-            candidate_strat_data = strategies_data.get(candidate_file)
-            if not candidate_strat_data:
-                continue # Überspringe, falls Daten für Kandidat fehlen
-
-            candidate_coin = candidate_strat_data['symbol'].split('/')[0]
-
-            # Prüfe, ob der Coin dieses Kandidaten bereits im Portfolio ist
-            if candidate_coin in selected_coins:
-                continue # Überspringe diesen Kandidaten, da der Coin schon vorhanden ist
-            # --- ENDE: NEUER CODE ---
-
-            # Bestehender Code:
-            current_team_files = best_portfolio_files + [candidate_file]
-
-            # Eindeutigkeitsprüfung (gleicher Coin/Timeframe - sollte durch obige Prüfung unnötig sein, aber sicher ist sicher)
-            unique_check = set()
-            is_valid_team = True
-            for f in current_team_files:
-                strat_info = strategies_data.get(f)
-                if not strat_info: is_valid_team = False; break
-                key = strat_info['symbol'] + strat_info['timeframe']
-                if key in unique_check: is_valid_team = False; break
-                unique_check.add(key)
-            if not is_valid_team: continue
-
-            # Daten für Simulator zusammenstellen
-            current_team_data = {}
-            valid_data_for_sim = True
-            for fname in current_team_files:
-                strat_d = strategies_data.get(fname)
-                if strat_d and 'data' in strat_d and not strat_d['data'].empty:
-                    sim_key = f"{strat_d['symbol']}_{strat_d['timeframe']}"
-                    current_team_data[sim_key] = strat_d
-                else:
-                    valid_data_for_sim = False; break
-            if not valid_data_for_sim: continue
-
-            # Portfolio simulieren
-            result = run_portfolio_simulation(start_capital, current_team_data, start_date, end_date)
-
-            # Prüfen ob Ergebnis gültig UND Max DD eingehalten wird
-            if result and not result.get("liquidation_date"):
-                actual_max_dd = result.get('max_drawdown_pct', 100.0) / 100.0
-
-                # *** NEUE BEDINGUNG: Prüfe Max DD UND ob Endkapital besser ist ***
-                if actual_max_dd <= target_max_dd_decimal and result['end_capital'] > best_capital_with_addition:
-                    # Dieses Team ist besser als das bisher beste dieser Runde
-                    best_capital_with_addition = result['end_capital']
-                    best_next_addition = candidate_file
-                    current_best_result_for_addition = result # Aktualisiere das beste Ergebnis dieser Runde
-
-        # Prüfe, ob eine Verbesserung gefunden wurde (best_next_addition ist nicht None)
-        if best_next_addition:
-            # Eine bessere Kombination wurde gefunden
-            print(f"-> Füge hinzu: {best_next_addition} (Neues Kapital: {best_capital_with_addition:.2f} USDT, Max DD: {current_best_result_for_addition['max_drawdown_pct']:.2f}%)")
-            best_portfolio_files.append(best_next_addition)
-
-            # --- START: NEUER CODE ZUM AKTUALISIEREN DES SETS ---
-            added_strat_data = strategies_data.get(best_next_addition)
-            if added_strat_data:
-                added_coin = added_strat_data['symbol'].split('/')[0]
-                selected_coins.add(added_coin)
-            # --- ENDE: NEUER CODE ---
-
-            # Bestehender Code:
-            best_end_capital = best_capital_with_addition # Aktualisiere globales bestes Kapital
-            best_portfolio_result = current_best_result_for_addition # Übernehme das beste Ergebnis
-            candidate_pool.remove(best_next_addition) # Entferne aus Kandidaten
-        else:
-            # Keine weitere Verbesserung durch Hinzufügen möglich oder alle Kandidaten verletzen Max DD/Coin-Constraint
-            print("Keine weitere Verbesserung des Profits (unter Einhaltung des Max DD & ohne Coin-Kollision) durch Hinzufügen von Strategien gefunden. Optimierung beendet.")
-            break # Verlasse die while-Schleife
+    # Gemeinsames Zeitraster aller vorbereiteten Strategien; Teams sind Spalten-Auswahlen daraus
+    grid = build_time_grid(prepared_strategies)
+    grid_columns = {fname: col for col, fname in enumerate(grid['keys'])}
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    evaluator = _CandidateEvaluator(grid, start_capital, workers)
+    # Pro-Kerze-Renditen der Einzel-Simulationen auf dem gemeinsamen Raster (für das Screening)
+    standalone_returns = {res['filename']: equity_returns(res['result']['equity_curve'], grid['timestamps'], start_capital)
+                          for res in single_strategy_results} if screen_top_k else {}
+
+    try:
+        while True:
+            best_next_addition = None
+            best_capital_with_addition = best_end_capital # Starte mit dem Kapital des aktuellen besten Portfolios
+            current_best_result_for_addition = best_portfolio_result # Merke dir das Ergebnis dieser Runde
+
+            # Gültige Teams dieser Runde in Pool-Reihenfolge sammeln
+            round_candidates = []
+            round_teams = []
+            for candidate_file in candidate_pool:
+
+                # --- START: NEUER CODE ZUR KOLLISIONSPRÜFUNG ---
+                candidate_strat_data = strategies_data.get(candidate_file)
+                if not candidate_strat_data:
+                    continue # Überspringe, falls Daten für Kandidat fehlen
+
+                candidate_coin = candidate_strat_data['symbol'].split('/')[0]
+
+                # Prüfe, ob der Coin dieses Kandidaten bereits im Portfolio ist
+                if candidate_coin in selected_coins:
+                    continue # Überspringe diesen Kandidaten, da der Coin schon vorhanden ist
+                # --- ENDE: NEUER CODE ---
+
+                # Bestehender Code:
+                current_team_files = best_portfolio_files + [candidate_file]
+
+                # Eindeutigkeitsprüfung (gleicher Coin/Timeframe - sollte durch obige Prüfung unnötig sein, aber sicher ist sicher)
+                unique_check = set()
+                is_valid_team = True
+                for f in current_team_files:
+                    strat_info = strategies_data.get(f)
+                    if not strat_info: is_valid_team = False; break
+                    key = strat_info['symbol'] + strat_info['timeframe']
+                    if key in unique_check: is_valid_team = False; break
+                    unique_check.add(key)
+                if not is_valid_team: continue
+
+                # Spalten der vorbereiteten Team-Mitglieder (Reihenfolge = Einstiegs-Priorität)
+                team_columns = [grid_columns[fname] for fname in current_team_files if fname in grid_columns]
+                if not team_columns: continue
+                round_candidates.append(candidate_file)
+                round_teams.append(team_columns)
+
+            # Vorauswahl per Näherungsmodell, nur die Finalisten laufen exakt (in Pool-Reihenfolge)
+            if screen_top_k and len(round_candidates) > screen_top_k:
+                approximation = approximate_portfolios(
+                    equity_returns(best_portfolio_result['equity_curve'], grid['timestamps'], start_capital),
+                    np.column_stack([standalone_returns[f] for f in round_candidates]), start_capital)
+                finalists = select_finalists(approximation, target_max_dd, screen_top_k)
+                print(f"Screening: {len(finalists)} von {len(round_candidates)} Kandidaten werden exakt simuliert.")
+                round_candidates = [round_candidates[i] for i in finalists]
+                round_teams = [round_teams[i] for i in finalists]
+
+            # Portfolios simulieren (parallel, Ergebnisse in Pool-Reihenfolge)
+            results = evaluator.evaluate(round_teams, desc=f"Teste Team mit {len(best_portfolio_files)+1} Mitgliedern")
+
+            for candidate_file, team_columns, result in zip(round_candidates, round_teams, results):
+                # Prüfen ob Ergebnis gültig UND Max DD eingehalten wird
+                if result and not result.get("liquidation_date"):
+                    actual_max_dd = result.get('max_drawdown_pct', 100.0) / 100.0
+
+                    # *** NEUE BEDINGUNG: Prüfe Max DD UND ob Endkapital besser ist ***
+                    # Strikt größer: bei Gleichstand gewinnt der frühere Kandidat im Pool
+                    if actual_max_dd <= target_max_dd_decimal and result['end_capital'] > best_capital_with_addition:
+                        # Dieses Team ist besser als das bisher beste dieser Runde
+                        best_capital_with_addition = result['end_capital']
+                        best_next_addition = candidate_file
+                        best_team_columns = team_columns
+                        current_best_result_for_addition = result # Aktualisiere das beste Ergebnis dieser Runde
+
+            if best_next_addition and 'equity_curve' not in current_best_result_for_addition:
+                # Worker liefern keine Equity-Kurve mit -> für den Gewinner lokal nachrechnen
+                current_best_result_for_addition = simulate_time_grid(
+                    start_capital, select_from_grid(grid, best_team_columns), verbose=False)
+
+            # Prüfe, ob eine Verbesserung gefunden wurde (best_next_addition ist nicht None)
+            if best_next_addition:
+                # Eine bessere Kombination wurde gefunden
+                print(f"-> Füge hinzu: {best_next_addition} (Neues Kapital: {best_capital_with_addition:.2f} USDT, Max DD: {current_best_result_for_addition['max_drawdown_pct']:.2f}%)")
+                best_portfolio_files.append(best_next_addition)
+
+                # --- START: NEUER CODE ZUM AKTUALISIEREN DES SETS ---
+                added_strat_data = strategies_data.get(best_next_addition)
+                if added_strat_data:
+                    added_coin = added_strat_data['symbol'].split('/')[0]
+                    selected_coins.add(added_coin)
+                # --- ENDE: NEUER CODE ---
+
+                # Bestehender Code:
+                best_end_capital = best_capital_with_addition # Aktualisiere globales bestes Kapital
+                best_portfolio_result = current_best_result_for_addition # Übernehme das beste Ergebnis
+                candidate_pool.remove(best_next_addition) # Entferne aus Kandidaten
+            else:
+                # Keine weitere Verbesserung durch Hinzufügen möglich oder alle Kandidaten verletzen Max DD/Coin-Constraint
+                print("Keine weitere Verbesserung des Profits (unter Einhaltung des Max DD & ohne Coin-Kollision) durch Hinzufügen von Strategien gefunden. Optimierung beendet.")
+                break # Verlasse die while-Schleife
+    finally:
+        evaluator.close()
 
     # --- Ergebnisse speichern ---
     try:
@@ -0,0 +1,71 @@
+# /root/utbot2/src/utbot2/analysis/portfolio_screening.py
+"""
+Schnelles Näherungsmodell für die Greedy-Portfolio-Suche.
+
+Statt jedes Kandidaten-Team exakt (gemeinsame Margin, Positionsgrößen auf
+Basis des Portfolio-Kapitals) zu simulieren, werden die Pro-Kerze-Renditen der
+Einzel-Simulationen auf dem gemeinsamen Zeitraster addiert: Jede Strategie
+riskiert einen Anteil des Gesamtkapitals, ihre Rendite wirkt also näherungsweise
+additiv auf die Portfolio-Rendite. Endkapital und Drawdown ergeben sich per
+cumprod/maximum.accumulate für alle Kandidaten gleichzeitig.
+
+Nicht modelliert werden das Margin-Limit und die Einstiegs-Reihenfolge bei
+knappem Kapital - das Modell dient nur der Vorauswahl, die Finalisten laufen
+durch die exakte Simulation (portfolio_simulator.simulate_time_grid).
+"""
+import numpy as np
+import pandas as pd
+
+
+def equity_returns(equity_curve: pd.DataFrame, timestamps: pd.DatetimeIndex, start_capital) -> np.ndarray:
+    """
+    Pro-Kerze-Renditen einer Equity-Kurve (Ergebnis von run_portfolio_simulation)
+    auf dem Zeitraster `timestamps`. Zeitschritte ohne eigene Kerze haben Rendite 0.
+    """
+    if equity_curve is None or equity_curve.empty:
+        return np.zeros(len(timestamps))
+    equity = equity_curve['equity'].reindex(timestamps).ffill().fillna(start_capital).to_numpy(dtype=np.float64)
+    previous = np.concatenate(([float(start_capital)], equity[:-1]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(previous > 0, equity / previous - 1, 0.0)
+    return returns
+
+
+def approximate_portfolios(base_returns: np.ndarray, candidate_returns: np.ndarray, start_capital):
+    """
+    Näherung für "aktuelles Portfolio + Kandidat" für alle Kandidaten auf einmal.
+
+    Args:
+        base_returns: Pro-Kerze-Renditen des aktuellen Portfolios, Länge T
+        candidate_returns: (T x Kandidaten)-Matrix der Einzel-Renditen
+
+    Returns:
+        dict mit Arrays pro Kandidat: 'end_capital', 'max_drawdown_pct' (in %)
+        und 'liquidated' (Kapital fällt irgendwann auf <= 0)
+    """
+    team_returns = base_returns[:, None] + candidate_returns
+    growth = 1 + team_returns
+    liquidated = (growth <= 0).any(axis=0)
+    equity = start_capital * np.cumprod(np.maximum(growth, 0), axis=0)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=0), start_capital)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = np.where(peak > 0, (peak - equity) / peak, 0.0)
+    return {
+        'end_capital': equity[-1] if len(equity) else np.full(candidate_returns.shape[1], float(start_capital)),
+        'max_drawdown_pct': drawdown.max(axis=0) * 100 if len(drawdown) else np.zeros(candidate_returns.shape[1]),
+        'liquidated': liquidated,
+    }
+
+
+def select_finalists(approximation, target_max_dd_pct, top_k) -> list:
+    """
+    Indizes der `top_k` aussichtsreichsten Kandidaten, aufsteigend sortiert (also in
+    Pool-Reihenfolge, damit Gleichstände in der exakten Runde wie bisher aufgelöst
+    werden). Kandidaten, die den Drawdown-Zielwert schon in der Näherung
+    verletzen oder liquidieren, kommen nur zum Zug, wenn sonst Plätze frei bleiben.
+    """
+    end_capital = approximation['end_capital']
+    feasible = ~approximation['liquidated'] & (approximation['max_drawdown_pct'] <= target_max_dd_pct)
+    # Stabile Sortierung: zulässige zuerst, dann nach Endkapital absteigend, bei Gleichstand Pool-Reihenfolge
+    order = np.lexsort((np.arange(len(end_capital)), -end_capital, ~feasible))
+    return sorted(order[:top_k].tolist())
@@ -13,8 +13,9 @@ sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
 # Imports auf Ichimoku angepasst
 from utbot2.strategy.ichimoku_engine import IchimokuEngine
-from utbot2.strategy.trade_logic import get_titan_signal
-from utbot2.analysis.backtester import load_data
+from utbot2.strategy.trade_logic import get_titan_signals
+from utbot2.analysis.backtester import align_htf_positions, load_data
+from utbot2.analysis.indicator_cache import dataset_fingerprint, indicator_cache
 from utbot2.utils.timeframe_utils import determine_htf
 
 # Hilfsklasse für Bias (da wir kein zentrales Enum mehr haben)
@@ -23,79 +24,205 @@ class Bias:
     BEARISH = "BEARISH"
     NEUTRAL = "NEUTRAL"
 
-def run_portfolio_simulation(start_capital, strategies_data, start_date, end_date):
+def htf_cloud_bias(htf_df, index, timeframe=None, htf=None):
     """
-    Führt eine chronologische Portfolio-Simulation mit mehreren Ichimoku-Strategien durch.
+    Ichimoku-Wolken-Bias der übergeordneten Timeframe pro Kerze von `index`.
+
+    Maßgeblich ist die letzte HTF-Kerze, die beim Schluss der LTF-Kerze bereits
+    abgeschlossen ist (backtester.align_htf_positions, wie im Backtest); ohne
+    Timeframes die letzte mit Eröffnungszeit <= Zeitstempel. Close über der
+    Wolke -> BULLISH, darunter -> BEARISH, sonst NEUTRAL.
+
+    Returns:
+        np.ndarray mit Bias-Strings, gleiche Länge wie `index`
     """
-    print("\n--- Starte Portfolio-Simulation (Ichimoku)... ---")
+    bias = np.full(len(index), Bias.NEUTRAL, dtype=object)
+    try:
+        rows = align_htf_positions(index, htf_df.index, timeframe, htf)
+        known = rows >= 0
+        close = htf_df['close'].to_numpy(dtype=np.float64)[rows[known]]
+        ssa = htf_df['senkou_span_a'].to_numpy(dtype=np.float64)[rows[known]]
+        ssb = htf_df['senkou_span_b'].to_numpy(dtype=np.float64)[rows[known]]
+        # Wie Pythons max()/min(): bei NaN gewinnt das erste Argument
+        cloud_top = np.where(ssb > ssa, ssb, ssa)
+        cloud_bottom = np.where(ssb < ssa, ssb, ssa)
+        known_bias = np.where(close > cloud_top, Bias.BULLISH,
+                              np.where(close < cloud_bottom, Bias.BEARISH, Bias.NEUTRAL))
+        bias[known] = known_bias
+    except Exception as e:
+        print(f"WARNUNG: HTF-Bias konnte nicht bestimmt werden: {e}")
+    return bias
 
-    # --- 1. Datenvorbereitung (Indikatoren & Ichimoku berechnen) ---
-    print("1/3: Bereite Strategie-Daten vor (Indikatoren & Clouds)...")
+
+def build_time_grid(processed_strategies):
+    """
+    Legt die vorbereiteten Strategien auf ein gemeinsames Zeitraster.
+
+    Returns:
+        dict mit 'timestamps' (DatetimeIndex, Vereinigung aller Kerzen), 'keys'
+        (Spaltenreihenfolge) und den (Zeitschritte x Strategien)-Matrizen 'high',
+        'low', 'close', 'atr' (float64, NaN = keine Kerze) sowie 'position'
+        (int64, Zeilenindex im Strategie-DataFrame, -1 = keine Kerze) und 'signal'
+        (int8, 1 = buy, -1 = sell, 0 = kein Signal oder keine Kerze), dazu
+        'risk_params' (Liste in Spaltenreihenfolge)
+    """
+    keys = list(processed_strategies)
+    timestamps = pd.DatetimeIndex([])
+    for key in keys:
+        timestamps = timestamps.union(processed_strategies[key]['data'].index)
+    timestamps = timestamps.sort_values()
+
+    shape = (len(timestamps), len(keys))
+    grid = {'timestamps': timestamps, 'keys': keys, 'position': np.full(shape, -1, dtype=np.int64),
+            'signal': np.zeros(shape, dtype=np.int8),
+            'risk_params': [processed_strategies[key].get('risk_params', {}) for key in keys]}
+    for name in ('high', 'low', 'close', 'atr'):
+        grid[name] = np.full(shape, np.nan)
+    for col, key in enumerate(keys):
+        df = processed_strategies[key]['data']
+        rows = timestamps.get_indexer(df.index)
+        grid['position'][rows, col] = np.arange(len(df))
+        if 'signals' in processed_strategies[key]:
+            grid['signal'][rows, col] = processed_strategies[key]['signals']
+        for name in ('high', 'low', 'close', 'atr'):
+            grid[name][rows, col] = df[name].to_numpy(dtype=np.float64)
+    return grid
+
+
+GRID_MATRICES = ('high', 'low', 'close', 'atr', 'position', 'signal')
+
+
+def select_from_grid(grid, columns):
+    """
+    Teil-Raster für ein Team (Spalten-Indizes in gewünschter Reihenfolge). Es bleiben
+    nur Zeitschritte, an denen mindestens ein Mitglied eine Kerze hat - das ist genau
+    das Raster, das build_time_grid für dieses Team allein bauen würde.
+    """
+    columns = list(columns)
+    rows = np.flatnonzero((np.asarray(grid['position'][:, columns]) >= 0).any(axis=1))
+    team_grid = {'timestamps': grid['timestamps'][rows], 'keys': [grid['keys'][c] for c in columns],
+                 'risk_params': [grid['risk_params'][c] for c in columns]}
+    for name in GRID_MATRICES:
+        team_grid[name] = np.asarray(grid[name][:, columns])[rows]
+    return team_grid
+
+
+def _prepare_strategy_artifacts(strat, params, start_date, end_date):
+    """ATR, Ichimoku, HTF-Bias und Einstiegssignale einer Strategie (ohne Risiko-Parameter)."""
+    df = strat['data'].copy()
+    if df.empty or len(df) < 50: return None
+    
+    # 1a. ATR berechnen (für SL)
+    atr_indicator = ta.volatility.AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=14)
+    df['atr'] = atr_indicator.average_true_range()
     
-    processed_strategies = {}
-    all_timestamps = set()
+    # 1b. Ichimoku berechnen
+    engine = IchimokuEngine(settings=params)
+    df = engine.process_dataframe(df)
     
-    # Wir verarbeiten jede Strategie vorab, um Performance zu sparen
+    # NaN Werte am Anfang entfernen
+    df.dropna(subset=['atr', 'tenkan_sen', 'senkou_span_b'], inplace=True)
+    
+    if df.empty: return None
+    
+    # 1c. MTF Bias pro Kerze: HTF-Daten laden, Ichimoku berechnen und auf den LTF-Index ausrichten
+    htf = strat.get('htf') or determine_htf(strat['timeframe'])
+    symbol = strat['symbol']
+    
+    market_bias = None
+    if htf and htf != strat['timeframe']:
+        htf_data = load_data(symbol, htf, start_date, end_date)
+        if not htf_data.empty:
+            htf_engine = IchimokuEngine(settings={})
+            htf_df = htf_engine.process_dataframe(htf_data)
+            # Bias der letzten abgeschlossenen HTF-Kerze, einmal für alle Kerzen
+            market_bias = htf_cloud_bias(htf_df, df.index, strat['timeframe'], htf)
+
+    # 1d. Einstiegssignale inkl. MTF-Filter einmal für die ganze Serie
+    # (entspricht get_titan_signal auf df.loc[:ts] für jede Kerze)
+    signals = get_titan_signals(df, {"strategy": params}, market_bias)
+    return {'data': df, 'signals': signals}
+
+
+def prepare_strategy(strat, start_date, end_date):
+    """
+    Vorbereitungs-Phase für eine Strategie (Eintrag aus strategies_data).
+
+    Die teuren Artefakte (Indikator-DataFrame, Einstiegssignale) liegen im
+    indicator_cache, Schlüssel: Datensatz-Fingerprint, Symbol, Timeframe, HTF,
+    Strategie-Parameter und Zeitraum. Derselbe Config-Eintrag wird also nur einmal
+    vorbereitet, egal in wie vielen Portfolios er simuliert wird.
+
+    Returns:
+        dict mit 'data', 'signals', 'params', 'risk_params' oder None, wenn die
+        Daten für eine Simulation nicht reichen. Die Artefakte werden geteilt und
+        dürfen nicht verändert werden.
+    """
+    params = strat.get('smc_params', {}) # Heißt oft noch so, enthält aber Ichimoku-Werte
+    cache_key = (
+        'portfolio_prepared', dataset_fingerprint(strat['data']), strat['symbol'], strat['timeframe'],
+        strat.get('htf'), json.dumps(params, sort_keys=True, default=str), str(start_date), str(end_date),
+    )
+    artifacts = indicator_cache.get_or_compute(
+        cache_key, lambda: _prepare_strategy_artifacts(strat, params, start_date, end_date))
+    if artifacts is None:
+        return None
+    return {**artifacts, 'params': params, 'risk_params': strat.get('risk_params', {})}
+
+
+def prepare_strategies(strategies_data, start_date, end_date):
+    """Bereitet alle Strategien vor; fehlerhafte oder zu kurze werden übersprungen."""
+    prepared_strategies = {}
     for key, strat in tqdm(strategies_data.items(), desc="Verarbeite Strategien"):
         try:
-            df = strat['data'].copy()
-            if df.empty or len(df) < 50: continue
-            
-            params = strat.get('smc_params', {}) # Heißt oft noch so, enthält aber Ichimoku-Werte
-            
-            # 1a. ATR berechnen (für SL)
-            atr_indicator = ta.volatility.AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=14)
-            df['atr'] = atr_indicator.average_true_range()
-            
-            # 1b. Ichimoku berechnen
-            engine = IchimokuEngine(settings=params)
-            df = engine.process_dataframe(df)
-            
-            # NaN Werte am Anfang entfernen
-            df.dropna(subset=['atr', 'tenkan_sen', 'senkou_span_b'], inplace=True)
-            
-            if df.empty: continue
-            
-            # 1c. MTF Bias bestimmen (Global für den Zeitraum vereinfacht)
-            # In einer perfekten Simulation müssten wir das pro Kerze tun, 
-            # aber für Portfolio-Sims reicht oft der globale Bias des Zeitraums oder wir prüfen es live (teuer).
-            # Wir machen hier eine Annäherung: Wir laden die HTF Daten und berechnen den Bias pro Kerze "live" im Loop wäre zu langsam.
-            # Wir speichern den HTF DataFrame vorbereitet ab.
-            htf = strat.get('htf') or determine_htf(strat['timeframe'])
-            symbol = strat['symbol']
-            
-            htf_bias_lookup = None
-            if htf and htf != strat['timeframe']:
-                htf_data = load_data(symbol, htf, start_date, end_date)
-                if not htf_data.empty:
-                    htf_engine = IchimokuEngine(settings={})
-                    htf_df = htf_engine.process_dataframe(htf_data)
-                    # Wir machen ein einfaches Reindexing, damit wir im Loop schnell zugreifen können
-                    # Das ist komplex bei unterschiedlichen TFs. 
-                    # Vereinfachung: Wir nutzen den Bias der letzten HTF Kerze VOR dem aktuellen TS.
-                    htf_bias_lookup = htf_df
-            
-            processed_strategies[key] = {
-                'data': df,
-                'params': params,
-                'risk_params': strat.get('risk_params', {}),
-                'htf_data': htf_bias_lookup
-            }
-            
-            all_timestamps.update(df.index)
-            
+            prepared = prepare_strategy(strat, start_date, end_date)
+            if prepared is not None:
+                prepared_strategies[key] = prepared
         except Exception as e:
             print(f"Fehler bei Vorbereitung von {key}: {e}")
+    return prepared_strategies
+
+
+def run_portfolio_simulation(start_capital, strategies_data, start_date, end_date):
+    """
+    Führt eine chronologische Portfolio-Simulation mit mehreren Ichimoku-Strategien durch.
+    """
+    print("\n--- Starte Portfolio-Simulation (Ichimoku)... ---")
+
+    # --- 1. Datenvorbereitung (Indikatoren & Ichimoku berechnen) ---
+    print("1/3: Bereite Strategie-Daten vor (Indikatoren & Clouds)...")
+    processed_strategies = prepare_strategies(strategies_data, start_date, end_date)
+    return simulate_portfolio(start_capital, processed_strategies)
+
 
+def simulate_portfolio(start_capital, processed_strategies):
+    """
+    Simulations-Phase: chronologische Portfolio-Simulation auf bereits vorbereiteten
+    Strategien (siehe prepare_strategies). Schlüssel von `processed_strategies`
+    sind die Strategie-Keys des Ergebnisses, die Reihenfolge bestimmt die
+    Einstiegs-Priorität pro Zeitschritt.
+    """
     if not processed_strategies:
         print("Keine gültigen Strategien nach Vorbereitung.")
         return None
 
-    sorted_timestamps = sorted(list(all_timestamps))
-    print(f"-> {len(sorted_timestamps)} Zeitschritte zu simulieren.")
+    # Alle Strategien auf ein gemeinsames Zeitraster legen: (Zeitschritte x Strategien)-Matrizen,
+    # NaN bzw. -1 markieren Zeitschritte ohne Kerze der jeweiligen Strategie
+    return simulate_time_grid(start_capital, build_time_grid(processed_strategies))
+
+
+def simulate_time_grid(start_capital, grid, verbose=True):
+    """
+    Chronologische Portfolio-Simulation auf einem Zeitraster (build_time_grid bzw.
+    select_from_grid). Liest nur die Raster-Matrizen und grid['risk_params'].
+    """
+    strategy_keys = grid['keys']
+    if verbose:
+        print(f"-> {len(grid['timestamps'])} Zeitschritte zu simulieren.")
 
     # --- 2. Simulation ---
-    print("2/3: Führe Simulation durch...")
+    if verbose:
+        print("2/3: Führe Simulation durch...")
     
     equity = start_capital
     peak_equity = start_capital
@@ -114,51 +241,57 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
     absolute_max_notional_value = 1000000
     min_notional = 5.0
 
-    for ts in tqdm(sorted_timestamps, desc="Simuliere"):
+    # Zeilen als Python-Listen: Zellzugriffe im Loop ohne NumPy-/Pandas-Overhead
+    high_rows, low_rows = grid['high'].tolist(), grid['low'].tolist()
+    close_rows, atr_rows = grid['close'].tolist(), grid['atr'].tolist()
+    position_rows, signal_rows = grid['position'].tolist(), grid['signal'].tolist()
+
+    for step, ts in enumerate(tqdm(grid['timestamps'], desc="Simuliere", disable=not verbose)):
         if liquidation_date: break
 
         current_total_equity = equity
         unrealized_pnl = 0
         positions_to_close = []
+        bar_positions = position_rows[step]
 
         # A) Offene Positionen managen
         for key, pos in open_positions.items():
-            strat = processed_strategies.get(key)
-            if not strat or ts not in strat['data'].index:
+            col = pos['column']
+            if bar_positions[col] < 0:
                 # Preis nicht verfügbar -> PnL schätzen mit letztem Preis
                 if pos.get('last_known_price'):
                     pnl_mult = 1 if pos['side'] == 'long' else -1
                     unrealized_pnl += pos['notional_value'] * (pos['last_known_price'] / pos['entry_price'] - 1) * pnl_mult
                 continue
 
-            current_candle = strat['data'].loc[ts]
-            pos['last_known_price'] = current_candle['close']
+            bar_high, bar_low, bar_close = high_rows[step][col], low_rows[step][col], close_rows[step][col]
+            pos['last_known_price'] = bar_close
             
             exit_price = None
             callback_rate = pos['callback_rate']
 
             # Trailing Stop / SL / TP Logik
             if pos['side'] == 'long':
-                if not pos['trailing_active'] and current_candle['high'] >= pos['activation_price']: 
+                if not pos['trailing_active'] and bar_high >= pos['activation_price']: 
                     pos['trailing_active'] = True
                 if pos['trailing_active']:
-                    pos['peak_price'] = max(pos['peak_price'], current_candle['high'])
+                    pos['peak_price'] = max(pos['peak_price'], bar_high)
                     trailing_sl = pos['peak_price'] * (1 - callback_rate)
                     pos['stop_loss'] = max(pos['stop_loss'], trailing_sl)
                 
-                if current_candle['low'] <= pos['stop_loss']: exit_price = pos['stop_loss']
-                elif not pos['trailing_active'] and current_candle['high'] >= pos['take_profit']: exit_price = pos['take_profit']
+                if bar_low <= pos['stop_loss']: exit_price = pos['stop_loss']
+                elif not pos['trailing_active'] and bar_high >= pos['take_profit']: exit_price = pos['take_profit']
             
             else: # Short
-                if not pos['trailing_active'] and current_candle['low'] <= pos['activation_price']: 
+                if not pos['trailing_active'] and bar_low <= pos['activation_price']: 
                     pos['trailing_active'] = True
                 if pos['trailing_active']:
-                    pos['peak_price'] = min(pos['peak_price'], current_candle['low'])
+                    pos['peak_price'] = min(pos['peak_price'], bar_low)
                     trailing_sl = pos['peak_price'] * (1 + callback_rate)
                     pos['stop_loss'] = min(pos['stop_loss'], trailing_sl)
                 
-                if current_candle['high'] >= pos['stop_loss']: exit_price = pos['stop_loss']
-                elif not pos['trailing_active'] and current_candle['low'] <= pos['take_profit']: exit_price = pos['take_profit']
+                if bar_high >= pos['stop_loss']: exit_price = pos['stop_loss']
+                elif not pos['trailing_active'] and bar_low <= pos['take_profit']: exit_price = pos['take_profit']
 
             if exit_price:
                 pnl_pct = (exit_price / pos['entry_price'] - 1) if pos['side'] == 'long' else (1 - exit_price / pos['entry_price'])
@@ -169,51 +302,22 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
                 positions_to_close.append(key)
             else:
                 pnl_mult = 1 if pos['side'] == 'long' else -1
-                unrealized_pnl += pos['notional_value'] * (current_candle['close'] / pos['entry_price'] - 1) * pnl_mult
+                unrealized_pnl += pos['notional_value'] * (bar_close / pos['entry_price'] - 1) * pnl_mult
 
         for key in positions_to_close:
             del open_positions[key]
 
         # B) Neue Positionen öffnen
         if equity > 0:
-            for key, strat in processed_strategies.items():
+            for col, key in enumerate(strategy_keys):
                 if key in open_positions: continue
-                if ts not in strat['data'].index: continue
-
-                current_candle = strat['data'].loc[ts]
-                
-                # MTF Bias bestimmen (Lookup)
-                market_bias = Bias.NEUTRAL
-                if strat['htf_data'] is not None:
-                    # Finde letzte Kerze im HTF vor dem aktuellen TS
-                    # Da Simulation langsam wäre mit 'asof', vereinfachen wir:
-                    # Wir nehmen an, der Bias ändert sich selten.
-                    # Korrekte Simulation:
-                    try:
-                        # Wir suchen den Index im HTF, der kleiner/gleich ts ist
-                        # Das ist teuer in Python Loop. 
-                        # Optimierung: Wir nehmen Bias.NEUTRAL oder implementieren 'asof' effizient.
-                        # Hier nutzen wir Pandas asof (kann langsam sein, aber korrekt)
-                        htf_idx = strat['htf_data'].index.asof(ts)
-                        if pd.notna(htf_idx):
-                            htf_row = strat['htf_data'].loc[htf_idx]
-                            if htf_row['close'] > max(htf_row['senkou_span_a'], htf_row['senkou_span_b']):
-                                market_bias = Bias.BULLISH
-                            elif htf_row['close'] < min(htf_row['senkou_span_a'], htf_row['senkou_span_b']):
-                                market_bias = Bias.BEARISH
-                    except: pass
-
-                # Signal abrufen (WICHTIG: Hier wird jetzt ein DataFrame Slice übergeben)
-                # Wir übergeben die Daten bis zum aktuellen Zeitpunkt
-                data_slice = strat['data'].loc[:ts]
-                
-                params_for_logic = {"strategy": strat['params'], "risk": strat['risk_params']}
-                side, price = get_titan_signal(data_slice, current_candle, params_for_logic, market_bias)
+                if bar_positions[col] < 0: continue
 
+                side = signal_rows[step][col]
                 if side:
-                    risk_params = strat['risk_params']
-                    entry_price = current_candle['close']
-                    current_atr = current_candle['atr']
+                    risk_params = grid['risk_params'][col]
+                    entry_price = close_rows[step][col]
+                    current_atr = atr_rows[step][col]
                     
                     atr_mult = risk_params.get('atr_multiplier_sl', 2.0)
                     min_sl = risk_params.get('min_sl_pct', 0.5) / 100.0
@@ -244,7 +348,7 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
                     rr = risk_params.get('risk_reward_ratio', 2.0)
                     act_rr = risk_params.get('trailing_stop_activation_rr', 2.0)
                     
-                    if side == 'buy':
+                    if side == 1:
                         sl = entry_price - sl_dist
                         tp = entry_price + sl_dist * rr
                         act = entry_price + sl_dist * act_rr
@@ -254,7 +358,8 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
                         act = entry_price - sl_dist * act_rr
                         
                     open_positions[key] = {
-                        'side': 'long' if side == 'buy' else 'short',
+                        'column': col,
+                        'side': 'long' if side == 1 else 'short',
                         'entry_price': entry_price, 'stop_loss': sl, 'take_profit': tp,
                         'activation_price': act, 'trailing_active': False,
                         'peak_price': entry_price, 'callback_rate': risk_params.get('trailing_stop_callback_rate_pct', 1.0)/100,
@@ -277,7 +382,8 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
             liquidation_date = ts
 
     # --- 3. Abschluss ---
-    print("3/3: Bereite Ergebnisse vor...")
+    if verbose:
+        print("3/3: Bereite Ergebnisse vor...")
     final_equity = equity_curve[-1]['equity'] if equity_curve else start_capital
     total_pnl_pct = (final_equity / start_capital - 1) * 100 if start_capital > 0 else 0
     wins = sum(1 for t in trade_history if t['pnl'] > 0)
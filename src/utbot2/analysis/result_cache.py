@@ -0,0 +1,124 @@
+# /root/utbot2/src/utbot2/analysis/result_cache.py
+"""
+Persistenter Cache für Backtest-Ergebnisse (SQLite unter artifacts/cache).
+
+Der Schlüssel ist ein SHA-256 über Dataset-Fingerprint, Fingerprint der
+HTF-Daten (Supertrend-Bias), Strategie- und Risiko-Parameter, Startkapital,
+Abbruch-Schwellen und BACKTEST_ENGINE_VERSION.
+Identische Backtests (Optimizer, show_results, interactive_status) liefern so
+die gespeicherten Kennzahlen sofort. Bei mehr als `max_entries` Einträgen
+werden die am längsten nicht mehr gelesenen entfernt.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from utbot2.analysis.backtester import BACKTEST_ENGINE_VERSION, load_htf_data, run_backtest
+from utbot2.analysis.indicator_cache import dataset_fingerprint
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+DEFAULT_CACHE_FILE = os.path.join(PROJECT_ROOT, 'artifacts', 'cache', 'backtest_results.sqlite')
+DEFAULT_MAX_ENTRIES = 200_000
+# run_backtest-Argumente, deren Wirkung nicht im Schlüssel steckt -> Cache umgehen
+UNCACHED_KWARGS = ('on_checkpoint', 'processed_data', 'entry_signals')
+
+
+def result_key(fingerprint, strategy_params, risk_params, start_capital, htf_fingerprint=None, **extra) -> str:
+    payload = json.dumps({
+        'engine': BACKTEST_ENGINE_VERSION,
+        'data': fingerprint,
+        'htf_data': htf_fingerprint,
+        'strategy': strategy_params,
+        'risk': risk_params,
+        'start_capital': start_capital,
+        'extra': extra,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    SQLite-Tabelle key -> Ergebnis-JSON. Jede Operation öffnet eine eigene
+    Verbindung (WAL-Modus), damit Threads und Worker-Prozesse parallel lesen
+    und schreiben können.
+    """
+    def __init__(self, path: str = DEFAULT_CACHE_FILE, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._puts_since_evict = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS results ("
+                         "key TEXT PRIMARY KEY, result TEXT NOT NULL, last_access REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_access ON results(last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=60)
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, result: dict):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO results (key, result, last_access) VALUES (?, ?, ?)",
+                         (key, json.dumps(result, default=float), time.time()))
+        # Zählen kostet einen Table-Scan -> nur gelegentlich prüfen
+        self._puts_since_evict += 1
+        if self._puts_since_evict >= 100:
+            self._puts_since_evict = 0
+            self.evict()
+
+    def evict(self):
+        """Entfernt die am längsten ungenutzten Einträge oberhalb von max_entries."""
+        with self._connect() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute("DELETE FROM results WHERE key IN "
+                             "(SELECT key FROM results ORDER BY last_access ASC LIMIT ?)", (excess,))
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+_default_cache = None
+
+
+def get_result_cache() -> ResultCache:
+    """Prozessweite Standard-Instanz (artifacts/cache/backtest_results.sqlite)."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
+
+
+def cached_run_backtest(data, strategy_params, risk_params, start_capital=1000, cache=None, fingerprint=None, **kwargs):
+    """
+    run_backtest mit persistentem Ergebnis-Cache. Abbruch-Schwellen fließen in den
+    Schlüssel ein; Läufe mit Checkpoint-Callback werden nicht gecacht, da ihr
+    Abbruch von außen (z.B. vom Pruner) abhängt. Ebenso Läufe mit vorberechneten
+    Eingaben (`processed_data`, `entry_signals`), die der Schlüssel nicht abbildet.
+    `fingerprint` spart das Hashen von `data`, wenn er bereits bekannt ist.
+    """
+    if any(kwargs.get(name) is not None for name in UNCACHED_KWARGS):
+        return run_backtest(data, strategy_params, risk_params, start_capital, **kwargs)
+
+    cache = cache if cache is not None else get_result_cache()
+    extra = {name: kwargs[name] for name in ('abort_max_drawdown', 'abort_capital_floor') if kwargs.get(name) is not None}
+    _, htf_fingerprint = load_htf_data(strategy_params, data.index.min(), data.index.max())
+    key = result_key(fingerprint or dataset_fingerprint(data), strategy_params, risk_params, start_capital,
+                     htf_fingerprint=htf_fingerprint, **extra)
+    result = cache.get(key)
+    if result is None:
+        result = run_backtest(data, strategy_params, risk_params, start_capital, **kwargs)
+        cache.put(key, result)
+    return result
@@ -16,7 +16,8 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
 # KORREKTUR: Import run_backtest statt run_smc_backtest
-from utbot2.analysis.backtester import load_data, run_backtest
+from utbot2.analysis.backtester import load_data
+from utbot2.analysis.result_cache import cached_run_backtest
 from utbot2.analysis.portfolio_simulator import run_portfolio_simulation
 from utbot2.analysis.portfolio_optimizer import run_portfolio_optimizer
 from utbot2.utils.telegram import send_document
@@ -61,7 +62,7 @@ def run_single_analysis(start_date, end_date, start_capital):
             strategy_params['htf'] = config['market'].get('htf')
 
             # KORREKTUR: Aufruf von run_backtest statt run_smc_backtest
-            result = run_backtest(data.copy(), strategy_params, risk_params, start_capital, verbose=False)
+            result = cached_run_backtest(data.copy(), strategy_params, risk_params, start_capital, verbose=False)
             
             all_results.append({
                 "Strategie": strategy_name,
@@ -0,0 +1,121 @@
+# /root/utbot2/src/utbot2/analysis/signal_grid.py
+"""
+Vorberechnete Ichimoku-Einstiegssignale für das komplette Integer-Raster des
+Optimizers (tenkan x kijun x senkou x require_tk_cross).
+
+Pro Kombination werden Long- und Short-Signale als Bitsets (np.packbits)
+gespeichert - rund 2 x n/8 Bytes statt n Bytes int8. Die Datei liegt neben dem
+OHLCV-Cache (data/cache/<SYMBOL>_<TF>.signals.npz) und trägt den Fingerprint
+des Datensatzes: Solange keine neuen Kerzen hinzukommen, wird sie bei jedem
+Optimizer-Lauf wiederverwendet, sonst neu aufgebaut.
+
+Der HTF-Supertrend-Bias ist nicht Teil des Rasters (der Multiplikator ist
+kontinuierlich) und wird erst im Optimizer per apply_market_bias kombiniert.
+"""
+import itertools
+import os
+import sys
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.strategy.trade_logic import get_titan_signals
+from utbot2.utils.ohlcv_cache import temp_path
+
+SIGNAL_GRID_SUFFIX = '.signals.npz'
+
+
+def signal_grid_path(symbol: str, timeframe: str) -> str:
+    """Pfad der Raster-Datei neben dem OHLCV-Cache (gleiche Namenskonvention wie load_data)."""
+    symbol_filename = symbol.replace('/', '-').replace(':', '-')
+    return os.path.join(PROJECT_ROOT, 'data', 'cache', f"{symbol_filename}_{timeframe}{SIGNAL_GRID_SUFFIX}")
+
+
+class SignalGrid:
+    """
+    Bitsets der Einstiegssignale für alle Kombinationen eines Integer-Rasters.
+    """
+    def __init__(self, fingerprint, n_bars, displacement, combos, long_bits, short_bits):
+        self.fingerprint = fingerprint
+        self.n_bars = int(n_bars)
+        self.displacement = int(displacement)
+        self.combos = [tuple(combo) for combo in combos]
+        self._rows = {combo: row for row, combo in enumerate(self.combos)}
+        self.long_bits = long_bits
+        self.short_bits = short_bits
+
+    @classmethod
+    def build(cls, batch, fingerprint, tenkan_periods, kijun_periods, senkou_periods, displacement=26):
+        """Berechnet alle Kombinationen einmal über eine IchimokuBatch (Sparse Tables)."""
+        combos = list(itertools.product(tenkan_periods, kijun_periods, senkou_periods, (False, True)))
+        n_bars = len(batch.df)
+        long_bits = np.zeros((len(combos), (n_bars + 7) // 8), dtype=np.uint8)
+        short_bits = np.zeros_like(long_bits)
+        frames = {}
+        for row, (tenkan, kijun, senkou, require_tk_cross) in enumerate(combos):
+            settings = {'tenkan_period': tenkan, 'kijun_period': kijun, 'senkou_span_b_period': senkou,
+                        'displacement': displacement, 'require_tk_cross': require_tk_cross}
+            # Mit und ohne TK-Cross teilen sich dieselben Ichimoku-Linien
+            frame = frames.pop((tenkan, kijun, senkou), None)
+            if frame is None:
+                frame = frames[(tenkan, kijun, senkou)] = batch.process_dataframe(settings)
+            signals = get_titan_signals(frame, {'strategy': settings})
+            long_bits[row] = np.packbits(signals == 1)
+            short_bits[row] = np.packbits(signals == -1)
+        return cls(fingerprint, n_bars, displacement, combos, long_bits, short_bits)
+
+    def __contains__(self, combo):
+        return tuple(combo) in self._rows
+
+    def signals(self, tenkan, kijun, senkou, require_tk_cross) -> np.ndarray:
+        """int8-Signalvektor (1 = buy, -1 = sell, 0 = kein Signal) ohne MTF-Bias."""
+        row = self._rows[(tenkan, kijun, senkou, bool(require_tk_cross))]
+        longs = np.unpackbits(self.long_bits[row], count=self.n_bars).astype(np.int8)
+        shorts = np.unpackbits(self.short_bits[row], count=self.n_bars).astype(np.int8)
+        return longs - shorts
+
+    def matches(self, fingerprint, combos, displacement=26) -> bool:
+        return (self.fingerprint == fingerprint and self.displacement == displacement
+                and set(map(tuple, combos)) <= set(self._rows))
+
+    def save(self, path: str):
+        """Speichert atomar (.tmp + os.replace) als unkomprimiertes .npz."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = temp_path(path)
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, fingerprint=np.array(self.fingerprint), n_bars=self.n_bars, displacement=self.displacement,
+                     combos=np.array(self.combos, dtype=np.int64), long_bits=self.long_bits, short_bits=self.short_bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as archive:
+            combos = [(int(t), int(k), int(s), bool(tk)) for t, k, s, tk in archive['combos']]
+            return cls(str(archive['fingerprint']), int(archive['n_bars']), int(archive['displacement']),
+                       combos, archive['long_bits'], archive['short_bits'])
+
+
+def load_or_build_signal_grid(path, batch, fingerprint, tenkan_periods, kijun_periods, senkou_periods, displacement=26):
+    """
+    Lädt das Raster aus `path`, wenn Fingerprint und Kombinationen passen; sonst wird
+    es neu berechnet und gespeichert.
+
+    Returns:
+        (SignalGrid, bool): Raster und ob es neu berechnet wurde
+    """
+    combos = list(itertools.product(tenkan_periods, kijun_periods, senkou_periods, (False, True)))
+    if os.path.exists(path):
+        try:
+            grid = SignalGrid.load(path)
+            if grid.matches(fingerprint, combos, displacement):
+                return grid, False
+        except (OSError, ValueError, KeyError):
+            pass
+    grid = SignalGrid.build(batch, fingerprint, tenkan_periods, kijun_periods, senkou_periods, displacement)
+    try:
+        grid.save(path)
+    except OSError as e:
+        print(f"WARNUNG: Signal-Raster konnte nicht gespeichert werden: {e}")
+    return grid, True
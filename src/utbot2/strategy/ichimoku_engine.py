@@ -1,7 +1,31 @@
 # /root/utbot2/src/utbot2/strategy/ichimoku_engine.py
+from collections import deque
+
 import pandas as pd
 import numpy as np
 
+
+class _RollingExtreme:
+    """Rolling-Maximum/-Minimum über ein festes Fenster mit monotoner Deque (O(1) amortisiert)."""
+    def __init__(self, window: int, is_max: bool):
+        self.window = window
+        self.is_max = is_max
+        self.values = deque()  # (position, wert), monoton fallend (max) bzw. steigend (min)
+
+    def push(self, position: int, value: float):
+        if self.is_max:
+            while self.values and self.values[-1][1] <= value:
+                self.values.pop()
+        else:
+            while self.values and self.values[-1][1] >= value:
+                self.values.pop()
+        self.values.append((position, value))
+        while self.values[0][0] <= position - self.window:
+            self.values.popleft()
+        # Wie pandas rolling(window): erst ab vollem Fenster ein Wert
+        return self.values[0][1] if position >= self.window - 1 else np.nan
+
+
 class IchimokuEngine:
     """
     Berechnet die Ichimoku Cloud Indikatoren.
@@ -12,6 +36,7 @@ class IchimokuEngine:
         self.kijun_period = settings.get('kijun_period', 26)
         self.senkou_span_b_period = settings.get('senkou_span_b_period', 52)
         self.displacement = settings.get('displacement', 26)
+        self._stream = None
 
     def _donchian(self, series_high, series_low, window):
         """Hilfsfunktion für (Highest High + Lowest Low) / 2"""
@@ -43,3 +68,166 @@ class IchimokuEngine:
         df['chikou_span'] = df['close'].shift(-self.displacement)
 
         return df
+
+    # ------------------------------------------------------------------ #
+    # Streaming-Modus (Live): eine abgeschlossene Kerze pro Aufruf
+    # ------------------------------------------------------------------ #
+    def reset_stream(self, history: int = None):
+        """
+        Initialisiert den Streaming-Zustand.
+
+        `history` ist die Anzahl der vorgehaltenen Zeilen für latest_frame();
+        standardmäßig so viele, wie get_titan_signal mindestens benötigt.
+        """
+        history = history or max(60, self.displacement + 2)
+        self._stream = {
+            'position': -1,
+            'extremes': {
+                window: (_RollingExtreme(window, True), _RollingExtreme(window, False))
+                for window in {self.tenkan_period, self.kijun_period, self.senkou_span_b_period}
+            },
+            # Ringpuffer für die Verschiebung der Senkou-Spans um `displacement` Kerzen
+            'span_a_buffer': deque(maxlen=self.displacement + 1),
+            'span_b_buffer': deque(maxlen=self.displacement + 1),
+            'rows': deque(maxlen=max(history, self.displacement + 1)),
+            'history': history,
+        }
+
+    def update(self, timestamp, candle) -> dict:
+        """
+        Verarbeitet eine abgeschlossene Kerze (Mapping mit open/high/low/close/volume)
+        und aktualisiert Tenkan, Kijun, Senkou A/B und Chikou in O(1) amortisiert.
+
+        Returns:
+            Die neue Zeile als Dict (gleiche Spalten wie process_dataframe).
+        """
+        if self._stream is None:
+            self.reset_stream()
+        state = self._stream
+        state['position'] += 1
+        position = state['position']
+        high, low, close = float(candle['high']), float(candle['low']), float(candle['close'])
+
+        donchian = {}
+        for window, (highest, lowest) in state['extremes'].items():
+            donchian[window] = (highest.push(position, high) + lowest.push(position, low)) / 2
+
+        tenkan = donchian[self.tenkan_period]
+        kijun = donchian[self.kijun_period]
+        state['span_a_buffer'].append((tenkan + kijun) / 2)
+        state['span_b_buffer'].append(donchian[self.senkou_span_b_period])
+
+        # Werte von vor `displacement` Kerzen sind die aktuellen Senkou-Spans
+        displaced = len(state['span_a_buffer']) > self.displacement
+        rows = state['rows']
+
+        # Chikou Span: der aktuelle Close gehört zur Kerze `displacement` zurück
+        if self.displacement == 0:
+            chikou = close
+        else:
+            chikou = np.nan
+            if len(rows) >= self.displacement:
+                rows[-self.displacement]['chikou_span'] = close
+
+        row = {
+            'timestamp': timestamp,
+            'open': float(candle.get('open', np.nan)), 'high': high, 'low': low, 'close': close,
+            'volume': float(candle.get('volume', np.nan)),
+            'tenkan_sen': tenkan, 'kijun_sen': kijun,
+            'senkou_span_a': state['span_a_buffer'][0] if displaced else np.nan,
+            'senkou_span_b': state['span_b_buffer'][0] if displaced else np.nan,
+            'chikou_span': chikou,
+        }
+        rows.append(row)
+        return row
+
+    def warm_up(self, df: pd.DataFrame):
+        """Füttert historische Kerzen in den Streaming-Zustand (z.B. beim Start des Live-Loops)."""
+        self.reset_stream(self._stream['history'] if self._stream else None)
+        for timestamp, candle in zip(df.index, df.to_dict('records')):
+            self.update(timestamp, candle)
+
+    def latest_frame(self) -> pd.DataFrame:
+        """
+        Die letzten Zeilen des Streams als DataFrame in der Form, die get_titan_signal
+        erwartet (Index = Timestamp, OHLCV + Ichimoku-Spalten).
+        """
+        if not self._stream or not self._stream['rows']:
+            return pd.DataFrame()
+        rows = list(self._stream['rows'])[-self._stream['history']:]
+        return pd.DataFrame(rows).set_index('timestamp')
+
+
+class IchimokuBatch:
+    """
+    Ichimoku für viele Parameter-Sets auf denselben OHLC-Daten.
+
+    Baut einmalig Sparse Tables für Highest High / Lowest Low auf (O(n log W)).
+    Danach kostet jedes Rolling-Extremum einer beliebigen Fensterlänge nur noch
+    zwei Array-Lookups, und die Ichimoku-Linien für jede Kombination aus
+    (tenkan, kijun, senkou) werden aus gemerkten Donchian-Mittellinien
+    zusammengesetzt. Die Ergebnisse sind identisch zu IchimokuEngine.process_dataframe.
+    """
+    def __init__(self, df: pd.DataFrame, max_window: int = 64):
+        self.df = df
+        self.max_window = max_window
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        self._high_table = self._build_sparse_table(high, np.maximum)
+        self._low_table = self._build_sparse_table(low, np.minimum)
+        self._donchian_cache = {}
+
+    def _build_sparse_table(self, values, op):
+        """table[k][j] = op(values[j : j + 2**k])"""
+        table = [values]
+        span = 1
+        while span * 2 <= min(self.max_window, len(values)):
+            prev = table[-1]
+            table.append(op(prev[:-span], prev[span:]))
+            span *= 2
+        return table
+
+    def _rolling(self, table, op, window):
+        n = len(self.df)
+        result = np.full(n, np.nan)
+        if window > n:
+            return result
+        level = window.bit_length() - 1
+        span = 1 << level
+        row = table[level]
+        result[window - 1:] = op(row[:n - window + 1], row[window - span:n - span + 1])
+        return result
+
+    def donchian(self, window: int) -> np.ndarray:
+        """(Highest High + Lowest Low) / 2 über `window` Kerzen, gemerkt pro Fensterlänge."""
+        if window < 1 or window > self.max_window:
+            raise ValueError(f"Fensterlänge {window} außerhalb von 1..{self.max_window}")
+        cached = self._donchian_cache.get(window)
+        if cached is None:
+            highest = self._rolling(self._high_table, np.maximum, window)
+            lowest = self._rolling(self._low_table, np.minimum, window)
+            cached = (highest + lowest) / 2
+            self._donchian_cache[window] = cached
+        return cached
+
+    def process_dataframe(self, settings: dict) -> pd.DataFrame:
+        """
+        Liefert denselben DataFrame wie IchimokuEngine(settings).process_dataframe(df),
+        aber aus den vorberechneten Rolling-Extrema.
+        """
+        if self.df.empty:
+            return self.df
+
+        engine = IchimokuEngine(settings)
+        df = self.df.copy()
+        index = df.index
+
+        tenkan = pd.Series(self.donchian(engine.tenkan_period), index=index)
+        kijun = pd.Series(self.donchian(engine.kijun_period), index=index)
+        df['tenkan_sen'] = tenkan
+        df['kijun_sen'] = kijun
+        df['senkou_span_a'] = ((tenkan + kijun) / 2).shift(engine.displacement)
+        df['senkou_span_b'] = pd.Series(self.donchian(engine.senkou_span_b_period), index=index).shift(engine.displacement)
+        df['chikou_span'] = df['close'].shift(-engine.displacement)
+
+        return df
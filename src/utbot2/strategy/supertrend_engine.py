@@ -2,6 +2,85 @@
 import pandas as pd
 import numpy as np
 
+try:
+    from numba import njit  # Optional: JIT-Kompilierung des Band-Loops
+except ImportError:
+    njit = None
+
+
+def _supertrend_kernel(basic_upper, basic_lower, close, start, supertrend, direction, final_upper, final_lower):
+    """
+    Rekursive Band-/Richtungsberechnung des Supertrends über rohe Sequenzen.
+
+    Schreibt in die vorallozierten Ausgaben (supertrend, direction, final_upper,
+    final_lower). Wird mit numba kompiliert, falls verfügbar; sonst läuft derselbe
+    Code mit Python-Listen (deutlich schneller als `.iloc` pro Schritt).
+    """
+    n = len(close)
+
+    # Initialisierung
+    final_upper[start] = basic_upper[start]
+    final_lower[start] = basic_lower[start]
+    supertrend[start] = final_upper[start]
+    direction[start] = -1  # Start bearish
+
+    for i in range(start + 1, n):
+        # Upper Band: Nimm das Minimum, wenn Close > vorheriges Upper
+        if basic_upper[i] < final_upper[i-1] or close[i-1] > final_upper[i-1]:
+            final_upper[i] = basic_upper[i]
+        else:
+            final_upper[i] = final_upper[i-1]
+
+        # Lower Band: Nimm das Maximum, wenn Close < vorheriges Lower
+        if basic_lower[i] > final_lower[i-1] or close[i-1] < final_lower[i-1]:
+            final_lower[i] = basic_lower[i]
+        else:
+            final_lower[i] = final_lower[i-1]
+
+        # Supertrend-Richtung bestimmen
+        if direction[i-1] == -1:  # War bearish
+            if close[i] > final_upper[i]:
+                direction[i] = 1  # Wechsel zu bullish
+                supertrend[i] = final_lower[i]
+            else:
+                direction[i] = -1
+                supertrend[i] = final_upper[i]
+        else:  # War bullish
+            if close[i] < final_lower[i]:
+                direction[i] = -1  # Wechsel zu bearish
+                supertrend[i] = final_upper[i]
+            else:
+                direction[i] = 1
+                supertrend[i] = final_lower[i]
+
+
+_supertrend_kernel_jit = njit(cache=True)(_supertrend_kernel) if njit is not None else None
+
+
+def supertrend_bands(basic_upper, basic_lower, close, start):
+    """
+    Berechnet Supertrend, Richtung und finale Bänder aus float64-Arrays.
+
+    Nutzt den numba-Kernel, falls numba installiert ist, ansonsten den
+    Python-Fallback über Listen.
+
+    Returns:
+        Tuple (supertrend, direction, final_upper, final_lower) als np.ndarray
+    """
+    basic_upper = np.ascontiguousarray(basic_upper, dtype=np.float64)
+    basic_lower = np.ascontiguousarray(basic_lower, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    n = len(close)
+
+    if _supertrend_kernel_jit is not None:
+        outputs = tuple(np.zeros(n) for _ in range(4))
+        _supertrend_kernel_jit(basic_upper, basic_lower, close, start, *outputs)
+        return outputs
+
+    outputs = tuple([0.0] * n for _ in range(4))
+    _supertrend_kernel(basic_upper.tolist(), basic_lower.tolist(), close.tolist(), start, *outputs)
+    return tuple(np.array(values, dtype=np.float64) for values in outputs)
+
 
 class SupertrendEngine:
     """
@@ -64,50 +143,10 @@ class SupertrendEngine:
         basic_upper = hl2 + (self.multiplier * atr)
         basic_lower = hl2 - (self.multiplier * atr)
         
-        # Initialisiere Supertrend-Arrays
-        n = len(df)
-        supertrend = np.zeros(n)
-        direction = np.zeros(n)
-        final_upper = np.zeros(n)
-        final_lower = np.zeros(n)
-        
-        close = df['close'].values
-        
-        # Initialisierung
-        final_upper[self.atr_period] = basic_upper.iloc[self.atr_period]
-        final_lower[self.atr_period] = basic_lower.iloc[self.atr_period]
-        supertrend[self.atr_period] = final_upper[self.atr_period]
-        direction[self.atr_period] = -1  # Start bearish
-        
-        # Supertrend-Berechnung
-        for i in range(self.atr_period + 1, n):
-            # Upper Band: Nimm das Minimum, wenn Close > vorheriges Upper
-            if basic_upper.iloc[i] < final_upper[i-1] or close[i-1] > final_upper[i-1]:
-                final_upper[i] = basic_upper.iloc[i]
-            else:
-                final_upper[i] = final_upper[i-1]
-            
-            # Lower Band: Nimm das Maximum, wenn Close < vorheriges Lower
-            if basic_lower.iloc[i] > final_lower[i-1] or close[i-1] < final_lower[i-1]:
-                final_lower[i] = basic_lower.iloc[i]
-            else:
-                final_lower[i] = final_lower[i-1]
-            
-            # Supertrend-Richtung bestimmen
-            if direction[i-1] == -1:  # War bearish
-                if close[i] > final_upper[i]:
-                    direction[i] = 1  # Wechsel zu bullish
-                    supertrend[i] = final_lower[i]
-                else:
-                    direction[i] = -1
-                    supertrend[i] = final_upper[i]
-            else:  # War bullish
-                if close[i] < final_lower[i]:
-                    direction[i] = -1  # Wechsel zu bearish
-                    supertrend[i] = final_upper[i]
-                else:
-                    direction[i] = 1
-                    supertrend[i] = final_lower[i]
+        # Rekursive Band-Berechnung (numba-Kernel oder Python-Fallback)
+        supertrend, direction, final_upper, final_lower = supertrend_bands(
+            basic_upper.to_numpy(), basic_lower.to_numpy(), df['close'].to_numpy(), self.atr_period
+        )
         
         df['supertrend'] = supertrend
         df['supertrend_direction'] = direction
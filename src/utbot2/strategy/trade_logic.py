@@ -167,3 +167,112 @@ def get_titan_signal(processed_data: pd.DataFrame, current_candle: pd.Series, pa
         return signal_side, signal_price
 
     return None, None
+
+
+def get_titan_signals(processed_data: pd.DataFrame, params: dict, market_bias=None) -> np.ndarray:
+    """
+    Vektorisierte Variante von get_titan_signal für die gesamte Serie.
+
+    Wertet dieselben fünf Ichimoku-Bedingungen (plus optionalen TK-Cross und
+    Supertrend-MTF-Filter) für jede Kerze so aus, als würde get_titan_signal
+    mit `processed_data.iloc[:i + 1]` aufgerufen - aber mit NumPy-Spaltenoperationen
+    statt eines Aufrufs pro Kerze.
+
+    Args:
+        processed_data: DataFrame mit OHLC- und Ichimoku-Spalten (IchimokuEngine)
+        params: Dict mit 'strategy' (displacement, require_tk_cross)
+        market_bias: None, ein einzelner Bias ("BULLISH"/"BEARISH"/"NEUTRAL")
+            oder ein Array pro Kerze (Bias-Strings oder 1/-1/0)
+
+    Returns:
+        np.ndarray (int8): 1 = buy, -1 = sell, 0 = kein Signal
+    """
+    n = 0 if processed_data is None else len(processed_data)
+    signals = np.zeros(n, dtype=np.int8)
+    if n == 0:
+        return signals
+
+    strategy_params = params.get('strategy', {})
+    displacement = strategy_params.get('displacement', 26)
+    require_tk_cross = strategy_params.get('require_tk_cross', False)
+
+    def col(name):
+        return processed_data[name].to_numpy(dtype=np.float64)
+
+    def shift(values, periods):
+        shifted = np.full(n, np.nan)
+        if periods < n:
+            shifted[periods:] = values[:n - periods]
+        return shifted
+
+    close, high, low = col('close'), col('high'), col('low')
+    tenkan, kijun = col('tenkan_sen'), col('kijun_sen')
+    ssa, ssb = col('senkou_span_a'), col('senkou_span_b')
+
+    # Sicherheitschecks: Mindestlänge des Slices bis zur Kerze und gültige Indikatoren
+    slice_len = np.arange(1, n + 1)
+    eligible = (slice_len >= 60) & (slice_len >= displacement + 2)
+    eligible &= ~(np.isnan(ssa) | np.isnan(ssb) | np.isnan(tenkan) | np.isnan(kijun))
+
+    with np.errstate(invalid='ignore'):
+        # === Kumo (Wolke) ===
+        cloud_top = np.maximum(ssa, ssb)
+        cloud_bottom = np.minimum(ssa, ssb)
+
+        # === TK-Cross (Vorkerze) ===
+        prev_tenkan, prev_kijun = shift(tenkan, 1), shift(kijun, 1)
+        tk_cross_bull = (prev_tenkan <= prev_kijun) & (tenkan > kijun)
+        tk_cross_bear = (prev_tenkan >= prev_kijun) & (tenkan < kijun)
+
+        # === Chikou Span gegen historische Kerze (displacement zurück) ===
+        hist_high, hist_low = shift(high, displacement), shift(low, displacement)
+        hist_cloud_top = shift(cloud_top, displacement)
+        hist_cloud_bottom = shift(cloud_bottom, displacement)
+        chikou_clear_bull = (close > hist_high) & (close > hist_cloud_top)
+        chikou_clear_bear = (close < hist_low) & (close < hist_cloud_bottom)
+
+        long_signal = (
+            eligible
+            & (close > cloud_top)        # 1. Preis über Kumo
+            & (tenkan > kijun)           # 2. Tenkan > Kijun
+            & chikou_clear_bull          # 3. Chikou über hist. Preis + hist. Wolke
+            & (ssa > ssb)                # 4. Zukunftswolke ist bullish
+            & (close > tenkan)           # 5. Momentum-Bestätigung
+        )
+        short_signal = (
+            eligible
+            & (close < cloud_bottom)     # 1. Preis unter Kumo
+            & (tenkan < kijun)           # 2. Tenkan < Kijun
+            & chikou_clear_bear          # 3. Chikou unter hist. Preis + hist. Wolke
+            & (ssa < ssb)                # 4. Zukunftswolke ist bearish
+            & (close < tenkan)           # 5. Momentum-Bestätigung
+        )
+
+    if require_tk_cross:
+        long_signal &= tk_cross_bull
+        short_signal &= tk_cross_bear
+
+    signals[long_signal] = 1
+    signals[short_signal] = -1
+
+    # === Supertrend MTF Filter ===
+    return apply_market_bias(signals, market_bias)
+
+
+def apply_market_bias(signals: np.ndarray, market_bias=None) -> np.ndarray:
+    """
+    Supertrend-MTF-Filter auf einen fertigen Signalvektor: Shorts bei bullishem
+    und Longs bei bearishem Bias werden verworfen. `signals` bleibt unverändert
+    (gecachte Vektoren können so gefahrlos wiederverwendet werden).
+    """
+    if market_bias is None:
+        return signals
+    bias = np.asarray(market_bias)
+    if bias.dtype.kind in 'iuf':
+        bullish, bearish = bias == 1, bias == -1
+    else:
+        bullish, bearish = bias == "BULLISH", bias == "BEARISH"
+    filtered = signals.copy()
+    filtered[(signals == -1) & bullish] = 0
+    filtered[(signals == 1) & bearish] = 0
+    return filtered
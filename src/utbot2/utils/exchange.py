@@ -53,12 +53,25 @@ class Exchange:
         try:
             start_dt = pd.to_datetime(start_date_str + 'T00:00:00Z', utc=True)
             end_dt = pd.to_datetime(end_date_str + 'T23:59:59Z', utc=True)
-            start_ts = int(start_dt.timestamp() * 1000)
-            end_ts = int(end_dt.timestamp() * 1000)
         except ValueError as e:
             logger.error(f"FEHLER: Ungültiges Datumsformat: {e}")
             return pd.DataFrame()
 
+        df = self.fetch_ohlcv_range(symbol, timeframe, start_dt, end_dt, max_retries)
+        if df.empty:
+            logger.warning(f"Keine historischen Daten für {symbol} ({timeframe}) im Zeitraum {start_date_str} - {end_date_str} gefunden.")
+            return df
+        return df.loc[start_dt:end_dt]
+
+    def fetch_ohlcv_range(self, symbol, timeframe, start_dt, end_dt, max_retries=3):
+        """
+        Lädt alle Kerzen mit Eröffnungszeit in [start_dt, end_dt] (UTC-Timestamps),
+        seitenweise à 1000 Kerzen. Wird von load_data auch für reine Lückenfüllung genutzt.
+        """
+        if not self.markets: return pd.DataFrame()
+        start_ts = int(start_dt.timestamp() * 1000)
+        end_ts = int(end_dt.timestamp() * 1000)
+
         all_ohlcv = []
         current_ts = start_ts
         retries = 0
@@ -98,7 +111,6 @@ class Exchange:
                 retries += 1
 
         if not all_ohlcv:
-            logger.warning(f"Keine historischen Daten für {symbol} ({timeframe}) im Zeitraum {start_date_str} - {end_date_str} gefunden.")
             return pd.DataFrame()
 
         df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
@@ -0,0 +1,170 @@
+# /root/utbot2/src/utbot2/utils/ohlcv_cache.py
+"""
+Binärer OHLCV-Cache für data/cache.
+
+Jede Datei ist ein strukturiertes NumPy-Array (.npy) mit den Feldern
+timestamp (int64, Epoch-Millisekunden, UTC) und open/high/low/close/volume
+(float64). Die Datei wird per Memory-Mapping geöffnet; nur der angefragte
+Zeitraum wird per Binärsuche auf der Timestamp-Spalte gelesen. Im Gegensatz
+zu read_csv entfällt das Parsen der Zeitstempel-Strings vollständig.
+
+Einmalige Migration der vorhandenen CSV-Dateien:
+    python src/utbot2/utils/ohlcv_cache.py
+"""
+import glob
+import json
+import os
+import sys
+import uuid
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+OHLCV_DTYPE = np.dtype([('timestamp', '<i8')] + [(col, '<f8') for col in OHLCV_COLUMNS])
+BINARY_SUFFIX = '.npy'
+CSV_SUFFIX = '.csv'
+
+
+def _to_epoch_ms(value):
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+    return ts.value // 1_000_000
+
+
+def _to_records(df: pd.DataFrame) -> np.ndarray:
+    records = np.empty(len(df), dtype=OHLCV_DTYPE)
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    records['timestamp'] = index.tz_convert('UTC').as_unit('ms').asi8
+    for col in OHLCV_COLUMNS:
+        records[col] = df[col].to_numpy(dtype=np.float64) if col in df.columns else np.nan
+    return records
+
+
+def temp_path(path: str) -> str:
+    """Eindeutiger Temp-Name neben `path` - parallele Schreiber (Prozesse/Threads) kollidieren nicht."""
+    return f"{path}.tmp.{os.getpid()}.{uuid.uuid4().hex}"
+
+
+def _save_records(records: np.ndarray, path: str):
+    tmp_path = temp_path(path)
+    with open(tmp_path, 'wb') as f:
+        np.save(f, records)
+    os.replace(tmp_path, path)
+
+
+def write_ohlcv_cache(df: pd.DataFrame, path: str):
+    """Schreibt einen OHLCV-DataFrame (DatetimeIndex UTC) atomar als .npy."""
+    _save_records(_to_records(df), path)
+
+
+def read_ohlcv_cache(path: str, start=None, end=None) -> pd.DataFrame:
+    """
+    Liest den Zeitraum [start, end] aus einer .npy-Cache-Datei (memory-mapped).
+
+    Returns:
+        DataFrame mit DatetimeIndex 'timestamp' (UTC) und OHLCV-Spalten
+    """
+    records = np.load(path, mmap_mode='r')
+    timestamps = records['timestamp']
+    lo = np.searchsorted(timestamps, _to_epoch_ms(start), side='left') if start is not None else 0
+    hi = np.searchsorted(timestamps, _to_epoch_ms(end), side='right') if end is not None else len(records)
+    window = records[lo:hi]
+
+    index = pd.DatetimeIndex(pd.to_datetime(np.asarray(window['timestamp']), unit='ms', utc=True), name='timestamp')
+    return pd.DataFrame({col: np.array(window[col]) for col in OHLCV_COLUMNS}, index=index)
+
+
+def merge_ohlcv_cache(df: pd.DataFrame, path: str) -> int:
+    """
+    Führt neue Kerzen mit einer bestehenden .npy-Cache-Datei zusammen (sortiert,
+    dedupliziert nach Timestamp). Bei überlappenden Zeitstempeln gewinnt die neu
+    geladene Kerze - so werden nachträglich korrigierte Kerzen übernommen.
+
+    Returns:
+        Anzahl der tatsächlich neu hinzugekommenen Kerzen
+    """
+    if not os.path.exists(path):
+        merged = df[~df.index.duplicated(keep='last')].sort_index()
+        write_ohlcv_cache(merged, path)
+        return len(merged)
+
+    existing = np.load(path)
+    incoming = _to_records(df)
+    if len(incoming) == 0:
+        return 0
+    # np.unique liefert das erste Vorkommen -> neue Kerzen (vorne) gewinnen
+    combined = np.concatenate([incoming[::-1], existing])
+    _, first = np.unique(combined['timestamp'], return_index=True)
+    merged = combined[first]
+    _save_records(merged, path)
+    return len(merged) - len(existing)
+
+
+def cache_meta_path(path: str) -> str:
+    return f"{path}.meta.json"
+
+
+def read_cache_meta(path: str) -> dict:
+    """Metadaten zur Cache-Datei (z.B. 'first_available'); leeres Dict, falls keine vorhanden."""
+    try:
+        with open(cache_meta_path(path), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_cache_meta(path: str, **values):
+    """Ergänzt bzw. überschreibt Einträge in den Metadaten der Cache-Datei (atomar)."""
+    meta = read_cache_meta(path)
+    meta.update(values)
+    meta_path = cache_meta_path(path)
+    tmp_path = temp_path(meta_path)
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def cache_time_range(path: str):
+    """Erster und letzter Zeitstempel einer .npy-Cache-Datei (ohne die Daten zu laden)."""
+    timestamps = np.load(path, mmap_mode='r')['timestamp']
+    if len(timestamps) == 0:
+        return None, None
+    return (pd.to_datetime(int(timestamps[0]), unit='ms', utc=True),
+            pd.to_datetime(int(timestamps[-1]), unit='ms', utc=True))
+
+
+def read_csv_cache(path: str) -> pd.DataFrame:
+    """CSV-Fallback im bisherigen Format (Spalte 'timestamp' als Index)."""
+    return pd.read_csv(path, index_col='timestamp', parse_dates=True)
+
+
+def migrate_csv_cache(cache_dir: str, overwrite: bool = False) -> int:
+    """
+    Konvertiert alle CSV-Dateien in `cache_dir` in das Binärformat (die CSVs bleiben erhalten).
+
+    Returns:
+        Anzahl der geschriebenen .npy-Dateien
+    """
+    migrated = 0
+    for csv_path in sorted(glob.glob(os.path.join(cache_dir, f"*{CSV_SUFFIX}"))):
+        npy_path = csv_path[:-len(CSV_SUFFIX)] + BINARY_SUFFIX
+        if os.path.exists(npy_path) and not overwrite:
+            continue
+        try:
+            df = read_csv_cache(csv_path)
+            df = df[~df.index.duplicated(keep='first')].sort_index()
+            write_ohlcv_cache(df, npy_path)
+            migrated += 1
+        except Exception as e:
+            print(f"WARNUNG: {os.path.basename(csv_path)} konnte nicht migriert werden: {e}")
+    return migrated
+
+
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+    target_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, 'data', 'cache')
+    count = migrate_csv_cache(target_dir)
+    print(f"✔ {count} CSV-Dateien in '{target_dir}' ins Binärformat migriert.")
@@ -39,3 +39,15 @@ def determine_htf(timeframe):
         return '1d' 
         
     return best_htf
+
+
+def timeframe_to_minutes(timeframe):
+    """
+    Dauer einer Kerze in Minuten (z.B. '15m' -> 15, '4h' -> 240, '1d' -> 1440).
+    Gibt None zurück, wenn das Format unbekannt ist.
+    """
+    units = {'m': 1, 'h': 60, 'd': 1440, 'w': 10080}
+    try:
+        return int(timeframe[:-1]) * units[timeframe[-1]]
+    except (TypeError, ValueError, KeyError, IndexError):
+        return None
@@ -0,0 +1,283 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Füge das Projektverzeichnis zum Python-Pfad hinzu
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.analysis import backtester
+from utbot2.analysis.backtester import (compute_signal_vector, build_htf_bias, align_htf_positions, simulate_trades,
+                                        missing_cache_ranges, drop_unclosed_candles, add_atr, run_backtest, load_data)
+from utbot2.strategy.ichimoku_engine import IchimokuEngine
+from utbot2.strategy.supertrend_engine import SupertrendEngine
+from utbot2.strategy.trade_logic import apply_market_bias, get_titan_signal, get_titan_signals
+
+CACHE_DIR = os.path.join(PROJECT_ROOT, 'data', 'cache')
+
+
+def _load_cached(symbol_file, timeframe, rows=None):
+    path = os.path.join(CACHE_DIR, f"{symbol_file}_{timeframe}.csv")
+    if not os.path.exists(path):
+        pytest.skip(f"Cache-Datei {path} nicht vorhanden.")
+    df = pd.read_csv(path, index_col='timestamp', parse_dates=True)
+    return df.iloc[-rows:] if rows else df
+
+
+@pytest.fixture(scope="module")
+def btc_1h():
+    """BTC 1h Daten mit Ichimoku und HTF-Supertrend (4h) aus dem lokalen Cache."""
+    data = _load_cached('BTC-USDT-USDT', '1h', rows=600)
+    htf_data = _load_cached('BTC-USDT-USDT', '4h')
+    htf_data = htf_data.loc[data.index.min() - pd.Timedelta(days=30):data.index.max()]
+    processed = IchimokuEngine(settings={}).process_dataframe(data)
+    htf_processed = SupertrendEngine(settings={}).process_dataframe(htf_data)
+    return processed, htf_processed
+
+
+@pytest.mark.parametrize("require_tk_cross", [False, True])
+def test_signal_vector_matches_per_bar_slicing(btc_1h, require_tk_cross):
+    """Das vorberechnete Signal muss dem alten Aufruf mit `loc[:timestamp]` pro Kerze entsprechen."""
+    processed, htf_processed = btc_1h
+    params = {"strategy": {'displacement': 26, 'require_tk_cross': require_tk_cross}, "risk": {}}
+
+    bias = build_htf_bias(processed.index, htf_processed, '1h', '4h')
+    signals = compute_signal_vector(processed, params, bias)
+
+    bias_names = {1: "BULLISH", -1: "BEARISH", 0: "NEUTRAL"}
+    expected = np.zeros(len(processed), dtype=np.int8)
+    for i, timestamp in enumerate(processed.index):
+        side, _ = get_titan_signal(processed.loc[:timestamp], processed.iloc[i], params, bias_names[bias[i]])
+        expected[i] = {'buy': 1, 'sell': -1}.get(side, 0)
+
+    assert np.array_equal(signals, expected)
+
+
+def test_htf_alignment_waits_for_htf_close():
+    """Eine 4h-Kerze darf erst ab der 1h-Kerze genutzt werden, mit der sie abgeschlossen ist."""
+    ltf_index = pd.date_range('2025-01-01 00:00', periods=12, freq='1h', tz='UTC')
+    htf_index = pd.date_range('2025-01-01 00:00', periods=3, freq='4h', tz='UTC')
+
+    positions = align_htf_positions(ltf_index, htf_index, '1h', '4h')
+
+    # 00:00-02:00: noch keine HTF-Kerze geschlossen; 03:00 schließt um 04:00 zusammen mit HTF 00:00
+    assert positions.tolist() == [-1, -1, -1, 0, 0, 0, 0, 1, 1, 1, 1, 2]
+
+
+def test_htf_bias_without_timeframes_matches_asof(btc_1h):
+    """Ohne Timeframe-Angaben entspricht die Zuordnung dem früheren index.asof pro Kerze."""
+    processed, htf_processed = btc_1h
+    bias = build_htf_bias(processed.index, htf_processed)
+
+    for i, timestamp in enumerate(processed.index):
+        htf_idx = htf_processed.index.asof(timestamp)
+        direction = htf_processed.loc[htf_idx, 'supertrend_direction'] if pd.notna(htf_idx) else 0
+        assert bias[i] == (direction if direction in (1, -1) else 0)
+
+
+@pytest.mark.parametrize("market_bias", [None, "BULLISH", "BEARISH"])
+def test_vectorized_signals_match_scalar_logic(btc_1h, market_bias):
+    """get_titan_signals muss für jede Kerze dasselbe liefern wie get_titan_signal."""
+    processed, _ = btc_1h
+    params = {"strategy": {'displacement': 26}, "risk": {}}
+
+    signals = get_titan_signals(processed, params, market_bias)
+
+    for i in range(len(processed)):
+        data_slice = processed.iloc[:i + 1]
+        side, _ = get_titan_signal(data_slice, data_slice.iloc[-1], params, market_bias)
+        assert signals[i] == {'buy': 1, 'sell': -1}.get(side, 0), f"Abweichung bei Kerze {i}"
+
+
+def test_simulate_trades_trailing_stop_exit():
+    """Long-Einstieg, Trailing-Aktivierung bei 2R und Ausstieg am nachgezogenen Stop."""
+    high = np.array([100.5, 103.0, 105.0, 106.0])
+    low = np.array([99.5, 99.0, 101.0, 104.0])
+    close = np.array([100.0, 102.0, 102.0, 105.0])
+    atr = np.ones(4)
+    signals = np.array([1, 0, 0, 0], dtype=np.int8)
+
+    result = simulate_trades(high, low, close, atr, signals, {}, start_capital=1000)
+
+    # SL-Abstand 2 (2x ATR) -> Notional 500; Trailing-SL = 105 * 0.99 = 103.95
+    assert result['trades_count'] == 1
+    assert result['win_rate'] == 100
+    assert result['end_capital'] == pytest.approx(1000 + 500 * 0.0395 - 0.5)
+
+
+def test_missing_cache_ranges_only_covers_gaps():
+    """Nur die Ränder außerhalb des gecachten Blocks werden nachgeladen."""
+    ts = lambda value: pd.Timestamp(value, tz='UTC')
+    data_start, data_end = ts('2025-03-01 00:00'), ts('2025-03-10 23:00')
+
+    ranges = missing_cache_ranges(data_start, data_end, ts('2025-02-01 00:00'), ts('2025-03-20 23:59:59'), '1h')
+    # Tail beginnt nach der letzten gecachten (geschlossenen) Kerze
+    assert ranges == [(ts('2025-02-01 00:00'), data_start - pd.Timedelta(milliseconds=1)),
+                      (ts('2025-03-11 00:00'), ts('2025-03-20 23:59:59'))]
+
+    # Bis jetzt kann keine weitere Kerze geschlossen sein -> kein Tail-Abruf
+    assert missing_cache_ranges(data_start, data_end, data_start, ts('2025-03-20 23:59:59'), '1h',
+                                now=ts('2025-03-11 00:59')) == []
+
+    # Letzte Kerze des Tages bereits im Cache -> kein Tail-Abruf
+    assert missing_cache_ranges(data_start, data_end, data_start, ts('2025-03-10 23:59:59'), '1h') == []
+
+    # Cache beginnt beim Listing der Börse -> kein Head-Abruf mehr
+    assert missing_cache_ranges(data_start, data_end, ts('2025-02-01 00:00'), ts('2025-03-10 23:59:59'), '1h',
+                                first_available=data_start) == []
+
+
+class _FakeExchange:
+    """Liefert Kerzen aus einem DataFrame und protokolliert die abgefragten Zeiträume."""
+    candles = None
+    calls = []
+
+    def __init__(self, api_setup):
+        self.markets = {'BTC/USDT:USDT': {}}
+
+    def fetch_historical_ohlcv(self, symbol, timeframe, start_date_str, end_date_str):
+        start = pd.to_datetime(start_date_str + 'T00:00:00Z', utc=True)
+        end = pd.to_datetime(end_date_str + 'T23:59:59Z', utc=True)
+        return self.fetch_ohlcv_range(symbol, timeframe, start, end)
+
+    def fetch_ohlcv_range(self, symbol, timeframe, start_dt, end_dt):
+        _FakeExchange.calls.append((start_dt, end_dt))
+        return _FakeExchange.candles.loc[start_dt:end_dt].copy()
+
+
+@pytest.fixture
+def fake_exchange(tmp_path, monkeypatch):
+    monkeypatch.setattr(backtester, 'PROJECT_ROOT', str(tmp_path))
+    monkeypatch.setattr(backtester, 'secrets_cache', {'utbot2': [{}]})
+    monkeypatch.setattr(backtester, 'Exchange', _FakeExchange)
+    index = pd.date_range('2025-03-01', '2025-03-05 12:00', freq='1h', tz='UTC', name='timestamp')
+    values = np.arange(len(index), dtype=np.float64) + 100
+    _FakeExchange.candles = pd.DataFrame({'open': values, 'high': values + 1, 'low': values - 1, 'close': values,
+                                          'volume': np.ones(len(index))}, index=index)
+    _FakeExchange.calls = []
+    return _FakeExchange
+
+
+def test_load_data_covers_today_without_open_candle(fake_exchange, monkeypatch):
+    """Die offene Tageskerze wird nie gespeichert; der Cache gilt trotzdem als vollständig."""
+    index = pd.date_range('2025-02-01', '2025-03-05', freq='1D', tz='UTC', name='timestamp')
+    values = np.arange(len(index), dtype=np.float64) + 100
+    fake_exchange.candles = pd.DataFrame({'open': values, 'high': values + 1, 'low': values - 1, 'close': values,
+                                          'volume': np.ones(len(index))}, index=index)
+    monkeypatch.setattr(backtester, '_utc_now', lambda: pd.Timestamp('2025-03-05 12:30', tz='UTC'))
+
+    for _ in range(3):
+        data = load_data('BTC/USDT:USDT', '1d', '2025-02-01', '2025-03-05')
+    assert len(fake_exchange.calls) == 1
+    assert data.index[-1] == pd.Timestamp('2025-03-04', tz='UTC')
+
+    # Nächster Tag: nur die inzwischen geschlossene Kerze wird nachgeladen
+    fake_exchange.candles.loc[pd.Timestamp('2025-03-05', tz='UTC'), 'close'] = 999.0
+    monkeypatch.setattr(backtester, '_utc_now', lambda: pd.Timestamp('2025-03-06 00:30', tz='UTC'))
+    data = load_data('BTC/USDT:USDT', '1d', '2025-02-01', '2025-03-06')
+
+    assert fake_exchange.calls[-1][0] == pd.Timestamp('2025-03-05', tz='UTC')
+    assert len(fake_exchange.calls) == 2
+    assert data.index[-1] == pd.Timestamp('2025-03-05', tz='UTC') and data['close'].iloc[-1] == 999.0
+
+
+def test_load_data_remembers_listing_start(fake_exchange):
+    """Vor der ersten Kerze der Börse wird nur einmal nachgefragt."""
+    listing = pd.Timestamp('2025-03-01', tz='UTC')
+    head_calls = lambda: [call for call in fake_exchange.calls if call[0] < listing]
+
+    load_data('BTC/USDT:USDT', '1h', '2025-03-02', '2025-03-05')
+    load_data('BTC/USDT:USDT', '1h', '2025-02-20', '2025-03-05')
+    assert len(head_calls()) == 1
+
+    data = load_data('BTC/USDT:USDT', '1h', '2025-02-10', '2025-03-05')
+
+    assert len(head_calls()) == 1
+    assert data.index[0] == listing
+
+
+def test_drop_unclosed_candles():
+    """Kerzen, deren Schlusszeit noch in der Zukunft liegt, werden nicht übernommen."""
+    index = pd.date_range('2025-03-01 00:00', periods=4, freq='4h', tz='UTC')
+    df = pd.DataFrame({'close': [1., 2., 3., 4.]}, index=index)
+
+    closed = drop_unclosed_candles(df, '4h', now=pd.Timestamp('2025-03-01 14:30', tz='UTC'))
+
+    assert closed.index.tolist() == list(index[:3])
+
+
+def test_simulate_trades_aborts_on_drawdown_and_capital_floor():
+    """Abbruch beim ersten Ausstieg, der die Schwelle verletzt; ohne Schwelle läuft die Simulation durch."""
+    # Drei Longs, die jeweils am SL (Abstand 2) ausgestoppt werden
+    high = np.tile([100.5, 100.5], 3)
+    low = np.tile([99.5, 97.0], 3)
+    close = np.full(6, 100.0)
+    atr = np.ones(6)
+    signals = np.tile(np.array([1, 0], dtype=np.int8), 3)
+    risk = {'risk_per_trade_pct': 10.0, 'leverage': 10}
+
+    full = simulate_trades(high, low, close, atr, signals, risk, start_capital=1000)
+    assert full['trades_count'] == 3 and not full['aborted']
+
+    by_drawdown = simulate_trades(high, low, close, atr, signals, risk, start_capital=1000, abort_max_drawdown=0.15)
+    assert by_drawdown['aborted'] and by_drawdown['aborted_at'] == 3
+    assert by_drawdown['trades_count'] == 2 and by_drawdown['max_drawdown_pct'] > 0.15
+
+    by_floor = simulate_trades(high, low, close, atr, signals, risk, start_capital=1000, abort_capital_floor=950)
+    assert by_floor['aborted'] and by_floor['trades_count'] == 1
+
+
+def test_simulate_trades_reports_checkpoints_and_stops_on_request():
+    """Zwischenstände an Checkpoints entsprechen der Simulation des Präfixes; True bricht ab."""
+    high = np.tile([100.5, 100.5], 3)
+    low = np.tile([99.5, 97.0], 3)
+    close = np.full(6, 100.0)
+    atr = np.ones(6)
+    signals = np.tile(np.array([1, 0], dtype=np.int8), 3)
+    risk = {'risk_per_trade_pct': 10.0, 'leverage': 10}
+
+    reports = []
+    full = simulate_trades(high, low, close, atr, signals, risk, checkpoints=[2, 4],
+                           on_checkpoint=lambda step, partial: reports.append((step, partial)) and False)
+    prefix = simulate_trades(high[:4], low[:4], close[:4], atr[:4], signals[:4], risk)
+    assert [step for step, _ in reports] == [1, 2]
+    assert reports[1][1]['end_capital'] == prefix['end_capital']
+    assert not full['aborted'] and full['trades_count'] == 3
+
+    stopped = simulate_trades(high, low, close, atr, signals, risk, checkpoints=[2, 4],
+                              on_checkpoint=lambda step, partial: step == 1)
+    assert stopped['aborted'] and stopped['aborted_at'] == 2 and stopped['trades_count'] == 1
+
+
+def test_simulate_trades_fires_checkpoints_inside_skipped_flat_stretches():
+    """Checkpoints ohne offene Position werden trotz Sprung zur nächsten Signal-Kerze gemeldet."""
+    n = 20
+    high, low, close, atr = np.full(n, 100.5), np.full(n, 99.5), np.full(n, 100.0), np.ones(n)
+    signals = np.zeros(n, dtype=np.int8)
+    reports = []
+    result = simulate_trades(high, low, close, atr, signals, {}, checkpoints=[5, 10, 15],
+                             on_checkpoint=lambda step, partial: reports.append(step) and False)
+    assert reports == [1, 2, 3] and not result['aborted']
+
+    stopped = simulate_trades(high, low, close, atr, signals, {}, checkpoints=[5, 10, 15],
+                              on_checkpoint=lambda step, partial: step == 2)
+    assert stopped['aborted'] and stopped['aborted_at'] == 10
+
+
+def test_run_backtest_with_precomputed_entry_signals_matches_full_run():
+    """Vorberechnete Einstiegssignale (Optimizer) liefern dasselbe Ergebnis wie der komplette Backtest."""
+    data = _load_cached('BTC-USDT-USDT', '1h', rows=600)
+    strategy = {'tenkan_period': 9, 'kijun_period': 26, 'senkou_span_b_period': 52, 'displacement': 26,
+                'require_tk_cross': False, 'timeframe': '1h'}
+    risk = {'risk_reward_ratio': 2.0, 'risk_per_trade_pct': 1.0, 'leverage': 10, 'atr_multiplier_sl': 2.0}
+
+    processed = IchimokuEngine(settings=strategy).process_dataframe(add_atr(data.copy()))
+    entry_signals = apply_market_bias(get_titan_signals(processed, {'strategy': strategy}), np.zeros(len(processed)))
+
+    expected = run_backtest(data.copy(), strategy, risk)
+    result = run_backtest(data, strategy, risk, processed_data=processed[['high', 'low', 'close', 'atr']],
+                          entry_signals=entry_signals)
+    assert result == expected
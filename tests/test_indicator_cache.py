@@ -0,0 +1,52 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Füge das Projektverzeichnis zum Python-Pfad hinzu
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.analysis.indicator_cache import IndicatorCache, dataset_fingerprint
+
+
+def test_lru_eviction_respects_memory_budget():
+    """Bei vollem Budget fliegt der am längsten ungenutzte Eintrag raus."""
+    cache = IndicatorCache(max_bytes=3 * 800)
+    for key in 'abc':
+        cache.put(key, np.zeros(100))  # je 800 Bytes
+    assert cache.get('a') is not None  # 'a' wird zuletzt benutzt -> 'b' ist der älteste
+
+    cache.put('d', np.zeros(100))
+
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in 'acd')
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['bytes'] <= stats['max_bytes']
+
+
+def test_get_or_compute_counts_hits_and_misses_across_threads():
+    """Parallele Trials auf denselben Parametern: jeder Schlüssel wird gezählt, das Ergebnis ist konsistent."""
+    cache = IndicatorCache()
+    keys = [('ichimoku', i % 4) for i in range(200)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        values = list(pool.map(lambda key: cache.get_or_compute(key, lambda: np.full(10, key[1])), keys))
+
+    assert all(value[0] == key[1] for key, value in zip(keys, values))
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == len(keys)
+    assert stats['entries'] == 4
+
+
+def test_dataset_fingerprint_detects_changed_candles():
+    """Gleiche Daten -> gleicher Fingerprint; eine geänderte Kerze -> anderer Fingerprint."""
+    index = pd.date_range('2025-01-01', periods=50, freq='1h', tz='UTC')
+    df = pd.DataFrame({col: np.arange(50, dtype=float) for col in ('open', 'high', 'low', 'close')}, index=index)
+    changed = df.copy()
+    changed.iloc[-1, changed.columns.get_loc('close')] += 1
+
+    assert dataset_fingerprint(df) == dataset_fingerprint(df.copy())
+    assert dataset_fingerprint(df) != dataset_fingerprint(changed)
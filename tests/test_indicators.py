@@ -0,0 +1,109 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Füge das Projektverzeichnis zum Python-Pfad hinzu
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.strategy.ichimoku_engine import IchimokuEngine, IchimokuBatch
+from utbot2.strategy.supertrend_engine import SupertrendEngine
+
+CACHE_DIR = os.path.join(PROJECT_ROOT, 'data', 'cache')
+
+
+@pytest.fixture(scope="module")
+def ohlcv():
+    path = os.path.join(CACHE_DIR, "BTC-USDT-USDT_4h.csv")
+    if not os.path.exists(path):
+        pytest.skip(f"Cache-Datei {path} nicht vorhanden.")
+    return pd.read_csv(path, index_col='timestamp', parse_dates=True).iloc[-1500:]
+
+
+def _reference_supertrend(df, atr_period, multiplier):
+    """Ursprüngliche Supertrend-Berechnung (Python-Loop mit .iloc) als Referenz."""
+    engine = SupertrendEngine({'supertrend_atr_period': atr_period, 'supertrend_multiplier': multiplier})
+    atr = engine._calculate_atr(df)
+    hl2 = (df['high'] + df['low']) / 2
+    basic_upper = hl2 + (multiplier * atr)
+    basic_lower = hl2 - (multiplier * atr)
+
+    n = len(df)
+    supertrend, direction = np.zeros(n), np.zeros(n)
+    final_upper, final_lower = np.zeros(n), np.zeros(n)
+    close = df['close'].values
+
+    final_upper[atr_period] = basic_upper.iloc[atr_period]
+    final_lower[atr_period] = basic_lower.iloc[atr_period]
+    supertrend[atr_period] = final_upper[atr_period]
+    direction[atr_period] = -1
+
+    for i in range(atr_period + 1, n):
+        if basic_upper.iloc[i] < final_upper[i-1] or close[i-1] > final_upper[i-1]:
+            final_upper[i] = basic_upper.iloc[i]
+        else:
+            final_upper[i] = final_upper[i-1]
+        if basic_lower.iloc[i] > final_lower[i-1] or close[i-1] < final_lower[i-1]:
+            final_lower[i] = basic_lower.iloc[i]
+        else:
+            final_lower[i] = final_lower[i-1]
+        if direction[i-1] == -1:
+            if close[i] > final_upper[i]:
+                direction[i], supertrend[i] = 1, final_lower[i]
+            else:
+                direction[i], supertrend[i] = -1, final_upper[i]
+        else:
+            if close[i] < final_lower[i]:
+                direction[i], supertrend[i] = -1, final_upper[i]
+            else:
+                direction[i], supertrend[i] = 1, final_lower[i]
+
+    result = pd.DataFrame({
+        'supertrend': supertrend, 'supertrend_direction': direction,
+        'supertrend_upper': final_upper, 'supertrend_lower': final_lower
+    }, index=df.index)
+    result.iloc[:atr_period] = np.nan
+    return result
+
+
+@pytest.mark.parametrize("atr_period,multiplier", [(7, 2.0), (10, 3.0), (14, 3.7)])
+def test_supertrend_kernel_matches_reference(ohlcv, atr_period, multiplier):
+    """Der Array-Kernel muss exakt die Spalten der ursprünglichen Implementierung liefern."""
+    engine = SupertrendEngine({'supertrend_atr_period': atr_period, 'supertrend_multiplier': multiplier})
+    processed = engine.process_dataframe(ohlcv)
+    expected = _reference_supertrend(ohlcv, atr_period, multiplier)
+
+    for column in expected.columns:
+        np.testing.assert_array_equal(processed[column].to_numpy(), expected[column].to_numpy(), err_msg=column)
+
+
+@pytest.mark.parametrize("settings", [
+    {},
+    {'tenkan_period': 7, 'kijun_period': 22, 'senkou_span_b_period': 44},
+    {'tenkan_period': 12, 'kijun_period': 30, 'senkou_span_b_period': 60},
+    {'tenkan_period': 11, 'kijun_period': 23, 'senkou_span_b_period': 57},
+])
+def test_ichimoku_batch_matches_engine(ohlcv, settings):
+    """IchimokuBatch muss für jede Parameter-Kombination dieselben Linien wie IchimokuEngine liefern."""
+    batch = IchimokuBatch(ohlcv)
+    expected = IchimokuEngine(settings).process_dataframe(ohlcv)
+    pd.testing.assert_frame_equal(batch.process_dataframe(settings), expected)
+
+
+@pytest.mark.parametrize("settings", [{}, {'tenkan_period': 7, 'kijun_period': 30, 'senkou_span_b_period': 44}])
+def test_ichimoku_stream_matches_engine(ohlcv, settings):
+    """Kerze für Kerze gestreamte Werte müssen der Batch-Berechnung auf denselben Kerzen entsprechen."""
+    engine = IchimokuEngine(settings)
+    engine.reset_stream()
+
+    for i, (timestamp, candle) in enumerate(zip(ohlcv.index, ohlcv.to_dict('records'))):
+        engine.update(timestamp, candle)
+        if i in (10, 70, 400, len(ohlcv) - 1):
+            frame = engine.latest_frame()
+            expected = engine.process_dataframe(ohlcv.iloc[:i + 1])
+            pd.testing.assert_frame_equal(frame, expected.tail(len(frame))[frame.columns], check_freq=False)
+
+    assert len(engine.latest_frame()) == max(60, engine.displacement + 2)
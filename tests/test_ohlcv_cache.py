@@ -0,0 +1,68 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Füge das Projektverzeichnis zum Python-Pfad hinzu
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.utils.ohlcv_cache import (cache_time_range, merge_ohlcv_cache, migrate_csv_cache, read_ohlcv_cache,
+                                      read_csv_cache, write_ohlcv_cache)
+
+CSV_FILE = os.path.join(PROJECT_ROOT, 'data', 'cache', 'ETH-USDT-USDT_1h.csv')
+
+
+@pytest.fixture
+def migrated_cache(tmp_path):
+    if not os.path.exists(CSV_FILE):
+        pytest.skip(f"Cache-Datei {CSV_FILE} nicht vorhanden.")
+    csv_copy = tmp_path / os.path.basename(CSV_FILE)
+    csv_copy.write_bytes(open(CSV_FILE, 'rb').read())
+    assert migrate_csv_cache(str(tmp_path)) == 1
+    return read_csv_cache(str(csv_copy)), str(csv_copy).replace('.csv', '.npy')
+
+
+def test_binary_cache_roundtrip_matches_csv(migrated_cache):
+    """Der Binär-Cache muss denselben Zeitraum wie der CSV-Cache (inkl. Index und Dtypes) liefern."""
+    csv_data, npy_path = migrated_cache
+    start, end = csv_data.index[100], csv_data.index[-100]
+
+    data = read_ohlcv_cache(npy_path, start, end)
+
+    pd.testing.assert_frame_equal(data, csv_data.loc[start:end], check_freq=False)
+    assert cache_time_range(npy_path) == (csv_data.index.min(), csv_data.index.max())
+
+
+def test_binary_cache_accepts_date_strings(migrated_cache):
+    """Datumsstrings wie in load_data ('YYYY-MM-DD') werden als UTC interpretiert."""
+    csv_data, npy_path = migrated_cache
+    start = csv_data.index[50].strftime('%Y-%m-%d')
+    end = csv_data.index[-50].strftime('%Y-%m-%d')
+
+    data = read_ohlcv_cache(npy_path, start, end)
+
+    expected = csv_data.loc[pd.to_datetime(start, utc=True):pd.to_datetime(end, utc=True)]
+    pd.testing.assert_frame_equal(data, expected, check_freq=False)
+
+
+def test_merge_appends_only_missing_candles(tmp_path):
+    """Head/Tail-Nachladen: überlappende Kerzen werden nicht doppelt gespeichert, neu geladene gewinnen."""
+    if not os.path.exists(CSV_FILE):
+        pytest.skip(f"Cache-Datei {CSV_FILE} nicht vorhanden.")
+    csv_data = read_csv_cache(CSV_FILE).iloc[:500]
+    npy_path = str(tmp_path / "ETH-USDT-USDT_1h.npy")
+    write_ohlcv_cache(csv_data.iloc[100:300], npy_path)
+
+    head = csv_data.iloc[:110].copy()
+    tail = csv_data.iloc[290:].copy()
+    tail.loc[tail.index[0], 'close'] = -1.0  # Überlappung: korrigierte Kerze ersetzt die gecachte
+
+    assert merge_ohlcv_cache(head, npy_path) == 100
+    assert merge_ohlcv_cache(tail, npy_path) == 200
+    assert merge_ohlcv_cache(tail, npy_path) == 0
+
+    expected = csv_data.copy()
+    expected.loc[tail.index[0], 'close'] = -1.0
+    pd.testing.assert_frame_equal(read_ohlcv_cache(npy_path), expected, check_freq=False)
@@ -0,0 +1,177 @@
+import json
+import os
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Füge das Projektverzeichnis zum Python-Pfad hinzu
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.analysis import optimizer
+from utbot2.analysis.optimizer import SEARCH_SPACE, allocate_cpu_budget, merge_results, narrow_search_space, warm_start_seeds
+
+
+def test_cpu_budget_favours_longer_datasets():
+    """Das Budget wird vollständig und proportional zur Kerzenanzahl verteilt (mindestens 1 Worker)."""
+    allocation = allocate_cpu_budget({'5m': 100_000, '1h': 8_000, '1d': 1_000}, 16)
+
+    assert sum(allocation.values()) == 16
+    assert allocation['5m'] > allocation['1h'] >= allocation['1d'] >= 1
+
+
+def test_cpu_budget_with_fewer_cores_than_pairs():
+    """Weniger Kerne als Paare: jedes Paar bekommt 1 Worker, der Scheduler arbeitet in Wellen."""
+    assert allocate_cpu_budget({'a': 10, 'b': 20, 'c': 30}, 2) == {'a': 1, 'b': 1, 'c': 1}
+
+
+def test_merge_results_replaces_same_pair_and_keeps_others(tmp_path):
+    """Erneute Optimierung eines Paares ersetzt dessen Eintrag, andere Paare bleiben erhalten."""
+    results_file = str(tmp_path / 'optimization_results.json')
+    merge_results(results_file, [{"symbol": "BTC/USDT:USDT", "timeframe": "1h", "status": "failed"},
+                                 {"symbol": "ETH/USDT:USDT", "timeframe": "4h", "status": "success"}])
+    merge_results(results_file, [{"symbol": "BTC/USDT:USDT", "timeframe": "1h", "status": "success"}])
+
+    with open(results_file) as f:
+        data = json.load(f)
+    assert data['total'] == 2
+    assert {(r['symbol'], r['status']) for r in data['results']} == {("BTC/USDT:USDT", "success"), ("ETH/USDT:USDT", "success")}
+    assert not [name for name in os.listdir(tmp_path) if '.tmp' in name]
+
+
+def test_warm_start_seeds_from_config_and_previous_trials(tmp_path, monkeypatch):
+    """Startpunkte = aktuelle Config (auf den Suchraum begrenzt) + beste Trials der alten Study."""
+    import optuna
+    monkeypatch.setattr(optimizer, 'DB_DIR', str(tmp_path))
+    config_path = tmp_path / 'config.json'
+    config_path.write_text(json.dumps({
+        "strategy": {"tenkan_period": 9, "kijun_period": 26, "senkou_span_b_period": 80, "displacement": 26},
+        "risk": {"leverage": 10, "risk_reward_ratio": 2.5, "margin_mode": "isolated"}
+    }))
+
+    study = optuna.create_study(study_name='prev', storage=optimizer.create_storage('journal', 'prev'), direction='maximize')
+    for value, leverage in [(1.0, 5), (3.0, 7), (2.0, 9)]:
+        study.enqueue_trial({'leverage': leverage})
+        study.optimize(lambda trial: value + 0 * trial.suggest_int('leverage', 5, 15), n_trials=1)
+
+    seeds = warm_start_seeds('journal', 'prev', str(config_path), top_k=2)
+
+    assert seeds[0] == {'tenkan_period': 9, 'kijun_period': 26, 'senkou_span_b_period': 60,
+                        'leverage': 10, 'risk_reward_ratio': 2.5}
+    assert seeds[1:] == [{'leverage': 7}, {'leverage': 9}]
+
+
+def test_narrow_search_space_stays_within_original_bounds():
+    """Eingeengte Bereiche umschließen alle Startpunkte und verlassen nie den ursprünglichen Suchraum."""
+    seeds = [{'tenkan_period': 8, 'supertrend_multiplier': 3.9}, {'tenkan_period': 10, 'supertrend_multiplier': 3.5}]
+
+    narrowed = narrow_search_space(seeds, 0.2)
+
+    assert narrowed['tenkan_period'] == ('int', 7, 11)
+    assert narrowed['supertrend_multiplier'][1:] == pytest.approx((3.1, 4.0))
+    assert narrowed['require_tk_cross'] == SEARCH_SPACE['require_tk_cross']
+    assert narrowed['leverage'] == SEARCH_SPACE['leverage']
+
+
+def test_population_batch_size_leaves_room_for_posterior_updates():
+    """Ein Batch umfasst höchstens ein Achtel des Budgets, mindestens die TPE-Startphase."""
+    assert optimizer._population_batch_size(500, 256) == 62
+    assert optimizer._population_batch_size(40, 256) == optimizer.TPE_STARTUP_TRIALS
+    assert optimizer._population_batch_size(10_000, 256) == 256
+    assert optimizer._population_batch_size(500, 0) == 1
+
+
+def _synthetic_ohlcv(n_bars, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    spread = close * rng.uniform(0.001, 0.01, n_bars)
+    index = pd.date_range('2025-01-01', periods=n_bars, freq='1h', tz='UTC', name='timestamp')
+    return pd.DataFrame({'open': np.roll(close, 1), 'high': close + spread, 'low': close - spread, 'close': close,
+                         'volume': np.ones(n_bars)}, index=index)
+
+
+def test_process_executor_matches_thread_executor(tmp_path, monkeypatch):
+    """--executor process: alle Trials landen in der gemeinsamen Study, Ergebnisse wie im Thread-Modus."""
+    import optuna
+    monkeypatch.setattr(optimizer, 'PROJECT_ROOT', str(tmp_path))
+    monkeypatch.setattr(optimizer, 'DB_DIR', str(tmp_path / 'db'))
+    monkeypatch.setattr(optimizer, 'CURRENT_SYMBOL', 'TEST/USDT:USDT')
+    monkeypatch.setattr(optimizer, 'CURRENT_TIMEFRAME', '1h')
+    monkeypatch.setattr(optimizer, 'CURRENT_HTF', None)  # kein HTF-Download im Test
+    monkeypatch.setattr(optimizer, 'OPTIM_MODE', 'best_profit')
+    monkeypatch.setattr(optimizer, 'MAX_DRAWDOWN_CONSTRAINT', 0.5)
+    monkeypatch.setattr(optimizer, 'PRUNING', {})
+    monkeypatch.setattr(optimizer, 'USE_RESULT_CACHE', False)
+    monkeypatch.setattr(optimizer, 'USE_SIGNAL_GRID', False)
+    monkeypatch.setattr(optimizer, 'ENGINE', 'trial')
+    optimizer._prepare_dataset(_synthetic_ohlcv(1500, seed=3))
+
+    # Gleicher Seed -> gleiche Parameter in beiden Studies (unabhängig von der Reihenfolge der Worker)
+    rng = random.Random(7)
+    param_sets = [{name: (rng.randint(spec[1], spec[2]) if spec[0] == 'int' else
+                          rng.uniform(spec[1], spec[2]) if spec[0] == 'float' else rng.choice(spec[1]))
+                   for name, spec in SEARCH_SPACE.items()} for _ in range(8)]
+
+    threaded = optuna.create_study(direction='maximize')
+    for params in param_sets:
+        threaded.enqueue_trial(params)
+    threaded.optimize(optimizer.objective, n_trials=len(param_sets), n_jobs=2)
+
+    storage = optimizer.create_storage('journal', 'proc')
+    processed = optuna.create_study(study_name='proc', storage=storage, direction='maximize')
+    for params in param_sets:
+        processed.enqueue_trial(params)
+    optimizer._optimize_in_processes('proc', 'journal', len(param_sets), workers=2)
+
+    processed = optuna.load_study(study_name='proc', storage=optimizer.create_storage('journal', 'proc'))
+    count = lambda study, state: sum(t.state == state for t in study.trials)
+    for state in (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED):
+        assert count(processed, state) == count(threaded, state)
+    assert len(processed.trials) == len(param_sets)
+    assert count(processed, optuna.trial.TrialState.COMPLETE) > 0
+    assert processed.best_params == threaded.best_params
+    assert processed.best_value == threaded.best_value
+    assert not os.listdir(tmp_path / 'artifacts' / 'tmp')
+
+
+def test_journal_storage_reloads_study(tmp_path, monkeypatch):
+    """Eine Journal-Study lässt sich mit einer neuen Storage-Instanz vollständig wieder laden."""
+    import optuna
+    monkeypatch.setattr(optimizer, 'DB_DIR', str(tmp_path))
+    study = optuna.create_study(study_name='pair', storage=optimizer.create_storage('journal', 'pair'),
+                                direction='maximize')
+    study.optimize(lambda trial: trial.suggest_int('leverage', 5, 15), n_trials=3)
+
+    reloaded = optimizer._load_previous_study('journal', 'pair')
+
+    assert (tmp_path / 'pair.journal').exists()
+    assert [t.params for t in reloaded.trials] == [t.params for t in study.trials]
+    assert reloaded.best_value == study.best_value
+    assert optimizer._load_previous_study('journal', 'other') is None
+
+
+def test_memory_storage_resumes_from_checkpoint(tmp_path, monkeypatch):
+    """Die In-Memory-Study wird alle `every` Trials und am Ende als Journal gesichert und daraus geladen."""
+    import optuna
+    monkeypatch.setattr(optimizer, 'DB_DIR', str(tmp_path))
+    storage = optimizer.create_storage('memory', 'pair')
+    study = optuna.create_study(study_name='pair', storage=storage, direction='maximize')
+    checkpoint = optimizer._MemoryCheckpoint(storage, 'pair', every=2)
+
+    study.optimize(lambda trial: trial.suggest_int('leverage', 5, 15), n_trials=5, callbacks=[checkpoint])
+    assert len(optimizer._load_previous_study('memory', 'pair').trials) == 4
+
+    checkpoint.write()
+    resumed = optimizer._load_previous_study('memory', 'pair')
+    assert [t.params for t in resumed.trials] == [t.params for t in study.trials]
+    assert [name for name in os.listdir(tmp_path) if '.tmp' in name] == []
+
+
+def test_unknown_storage_backend_is_rejected(tmp_path, monkeypatch):
+    """Tippfehler im Backend-Namen fallen nicht stillschweigend auf sqlite zurück."""
+    monkeypatch.setattr(optimizer, 'DB_DIR', str(tmp_path))
+    with pytest.raises(ValueError, match="postgres"):
+        optimizer.create_storage('postgres', 'pair')
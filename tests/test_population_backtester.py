@@ -0,0 +1,158 @@
+import os
+import random
+import sys
+
+import numpy as np
+import optuna
+import pandas as pd
+import pytest
+
+# Füge das Projektverzeichnis zum Python-Pfad hinzu
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.analysis import optimizer
+from utbot2.analysis.backtester import add_atr, simulate_trades
+from utbot2.analysis.population_backtester import simulate_population
+from utbot2.analysis.result_cache import ResultCache
+from utbot2.strategy.ichimoku_engine import IchimokuEngine
+from utbot2.strategy.trade_logic import get_titan_signals
+
+CACHE_DIR = os.path.join(PROJECT_ROOT, 'data', 'cache')
+
+
+@pytest.fixture(scope="module")
+def btc_1h():
+    path = os.path.join(CACHE_DIR, 'BTC-USDT-USDT_1h.csv')
+    if not os.path.exists(path):
+        pytest.skip(f"Cache-Datei {path} nicht vorhanden.")
+    return pd.read_csv(path, index_col='timestamp', parse_dates=True).iloc[-2000:]
+
+
+def _random_params(rng):
+    params = {}
+    for name, spec in optimizer.SEARCH_SPACE.items():
+        if spec[0] == 'int':
+            params[name] = rng.randint(spec[1], spec[2])
+        elif spec[0] == 'float':
+            params[name] = rng.uniform(spec[1], spec[2])
+        else:
+            params[name] = rng.choice(spec[1])
+    return params
+
+
+def test_population_matches_single_simulation(btc_1h):
+    """Jedes Mitglied der Population liefert exakt das Ergebnis von simulate_trades."""
+    rng = random.Random(7)
+    processed = add_atr(btc_1h.copy())
+    arrays = [processed[col].to_numpy() for col in ('high', 'low', 'close', 'atr')]
+    signals, risks = [], []
+    for _ in range(24):
+        params = _random_params(rng)
+        strategy = {**params, 'displacement': 26}
+        signals.append(get_titan_signals(IchimokuEngine(settings=strategy).process_dataframe(processed),
+                                         {'strategy': strategy}))
+        risks.append({name: params[name] for name in ('risk_reward_ratio', 'risk_per_trade_pct', 'leverage',
+                                                      'trailing_stop_activation_rr', 'trailing_stop_callback_rate_pct',
+                                                      'atr_multiplier_sl')})
+
+    for kwargs in ({}, {'abort_max_drawdown': 0.05}, {'abort_capital_floor': 990}):
+        expected = [simulate_trades(*arrays, s, r, 1000, **kwargs) for s, r in zip(signals, risks)]
+        assert simulate_population(*arrays, np.stack(signals), risks, 1000, **kwargs) == expected
+    assert any(result['trades_count'] > 0 for result in expected)
+
+
+def test_population_checkpoints_stop_single_members():
+    """Ein Checkpoint-Abbruch betrifft nur die gemeldeten Mitglieder."""
+    high = np.tile([100.5, 100.5], 4)
+    low = np.tile([99.5, 97.0], 4)
+    close, atr = np.full(8, 100.0), np.ones(8)
+    signals = np.tile(np.array([1, 0], dtype=np.int8), (2, 4))
+    risk = {'risk_per_trade_pct': 10.0, 'leverage': 10}
+
+    seen = []
+
+    def on_checkpoint(step, partials):
+        seen.append((step, sorted(partials)))
+        return [1] if step == 1 else []
+
+    results = simulate_population(high, low, close, atr, signals, [risk, risk], checkpoints=[2, 6],
+                                  on_checkpoint=on_checkpoint)
+    assert seen == [(1, [0, 1]), (2, [0])]
+    assert results[0] == simulate_trades(high, low, close, atr, signals[0], risk)
+    assert results[1]['aborted'] and results[1]['aborted_at'] == 2 and results[1]['trades_count'] == 1
+
+
+def test_ask_tell_population_matches_objective(btc_1h, monkeypatch):
+    """optimize_population meldet dieselben Werte wie objective() für dieselben Parameter."""
+    monkeypatch.setattr(optimizer, 'CURRENT_SYMBOL', 'BTC/USDT:USDT')
+    monkeypatch.setattr(optimizer, 'CURRENT_TIMEFRAME', '1h')
+    monkeypatch.setattr(optimizer, 'CURRENT_HTF', None)  # kein HTF-Download im Test
+    monkeypatch.setattr(optimizer, 'OPTIM_MODE', 'best_profit')
+    monkeypatch.setattr(optimizer, 'MAX_DRAWDOWN_CONSTRAINT', 0.5)
+    monkeypatch.setattr(optimizer, 'PRUNING', {})
+    monkeypatch.setattr(optimizer, 'USE_RESULT_CACHE', False)
+    optimizer._prepare_dataset(btc_1h)
+
+    rng = random.Random(11)
+    param_sets = [_random_params(rng) for _ in range(12)]
+    expected = []
+    for params in param_sets:
+        try:
+            expected.append(optimizer.objective(optuna.trial.FixedTrial(params)))
+        except optuna.exceptions.TrialPruned:
+            expected.append(None)
+
+    study = optuna.create_study(direction="maximize")
+    for params in param_sets:
+        study.enqueue_trial(params)
+    optimizer.optimize_population(study, len(param_sets), population_size=5)
+
+    values = [t.value if t.state == optuna.trial.TrialState.COMPLETE else None
+              for t in sorted(study.trials, key=lambda t: t.number)]
+    assert values == expected
+    assert any(value is not None for value in values)
+
+
+class _AlwaysPrune(optuna.pruners.BasePruner):
+    def prune(self, study, trial):
+        return True
+
+
+def test_cached_trials_replay_checkpoints(btc_1h, monkeypatch, tmp_path):
+    """Cache-Treffer melden die gespeicherten Zwischenstände erneut an den Pruner (objective und Population)."""
+    monkeypatch.setattr(optimizer, 'CURRENT_SYMBOL', 'BTC/USDT:USDT')
+    monkeypatch.setattr(optimizer, 'CURRENT_TIMEFRAME', '1h')
+    monkeypatch.setattr(optimizer, 'CURRENT_HTF', None)  # kein HTF-Download im Test
+    monkeypatch.setattr(optimizer, 'OPTIM_MODE', 'best_profit')
+    monkeypatch.setattr(optimizer, 'MAX_DRAWDOWN_CONSTRAINT', 0.5)
+    monkeypatch.setattr(optimizer, 'PRUNING', {'chunks': 4})
+    monkeypatch.setattr(optimizer, 'USE_RESULT_CACHE', True)
+    cache = ResultCache(str(tmp_path / 'results.sqlite'))
+    monkeypatch.setattr(optimizer, 'get_result_cache', lambda: cache)
+    optimizer._prepare_dataset(btc_1h)
+
+    rng = random.Random(5)
+    study = optuna.create_study(direction="maximize", pruner=optuna.pruners.NopPruner())
+    params = _random_params(rng)
+    study.enqueue_trial(params)
+    study.optimize(optimizer.objective, n_trials=1)
+    reported = study.trials[0].intermediate_values
+    assert len(cache) == 1 and 1 in reported
+
+    # Treffer im Einzel- und im Populations-Modus: identische Zwischenberichte
+    study.enqueue_trial(params)
+    study.optimize(optimizer.objective, n_trials=1)
+    study.enqueue_trial(params)
+    optimizer.optimize_population(study, 1, population_size=1)
+    assert study.trials[1].intermediate_values == study.trials[2].intermediate_values == reported
+    assert len(cache) == 1
+
+    # Ein Pruner, der am ersten Checkpoint stoppt, greift auch bei Treffern
+    strict = optuna.create_study(direction="maximize", pruner=_AlwaysPrune())
+    strict.enqueue_trial(params)
+    strict.optimize(optimizer.objective, n_trials=1)
+    strict.enqueue_trial(params)
+    optimizer.optimize_population(strict, 1, population_size=1)
+    assert [t.state for t in strict.trials] == [optuna.trial.TrialState.PRUNED] * 2
+    assert [list(t.intermediate_values) for t in strict.trials] == [[1], [1]]
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Füge das Projektverzeichnis zum Python-Pfad hinzu
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.analysis.portfolio_screening import approximate_portfolios, equity_returns, select_finalists
+
+
+def test_equity_returns_on_common_grid():
+    """Renditen werden auf das Raster übertragen; Zeitschritte ohne eigene Kerze haben Rendite 0."""
+    grid = pd.date_range('2025-01-01', periods=5, freq='1h', tz='UTC')
+    curve = pd.DataFrame({'equity': [1100., 990.]}, index=grid[[1, 3]])
+
+    returns = equity_returns(curve, grid, 1000)
+
+    np.testing.assert_allclose(returns, [0., 0.1, 0., -0.1, 0.])
+    np.testing.assert_array_equal(equity_returns(pd.DataFrame(), grid, 1000), np.zeros(5))
+
+
+def test_approximate_portfolios_adds_returns():
+    """Team-Equity = Startkapital * cumprod(1 + Basis- + Kandidaten-Rendite), Drawdown ab Startkapital."""
+    base = np.array([0.1, -0.1, 0.0])
+    candidates = np.array([[0.0, 0.5], [0.0, -2.0], [0.1, 0.0]])
+
+    approx = approximate_portfolios(base, candidates, 1000)
+
+    equity = 1000 * np.cumprod([1.1, 0.9, 1.1])
+    assert approx['end_capital'][0] == pytest.approx(equity[-1])
+    assert approx['max_drawdown_pct'][0] == pytest.approx((1100 - 990) / 1100 * 100)
+    assert approx['liquidated'].tolist() == [False, True]
+    assert approx['end_capital'][1] == 0
+
+
+def test_select_finalists_prefers_feasible_and_keeps_pool_order():
+    """Top-K nach Endkapital unter den zulässigen Kandidaten, Rückgabe in Pool-Reihenfolge."""
+    approx = {
+        'end_capital': np.array([1200., 1500., 1300., 1300., 2000.]),
+        'max_drawdown_pct': np.array([10., 10., 10., 10., 80.]),
+        'liquidated': np.zeros(5, dtype=bool),
+    }
+    assert select_finalists(approx, 30.0, 2) == [1, 2]
+    assert select_finalists(approx, 30.0, 3) == [1, 2, 3]
+    # Unzulässige Kandidaten füllen nur freie Plätze auf
+    assert select_finalists(approx, 30.0, 5) == [0, 1, 2, 3, 4]
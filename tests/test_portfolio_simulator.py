@@ -0,0 +1,192 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Füge das Projektverzeichnis zum Python-Pfad hinzu
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.analysis import portfolio_optimizer, portfolio_simulator
+from utbot2.analysis.portfolio_simulator import (GRID_MATRICES, Bias, build_time_grid, htf_cloud_bias,
+                                                 prepare_strategies, run_portfolio_simulation, select_from_grid,
+                                                 simulate_portfolio)
+
+CACHE_DIR = os.path.join(PROJECT_ROOT, 'data', 'cache')
+
+
+def _cached_frame(name):
+    path = os.path.join(CACHE_DIR, f'{name}.csv')
+    if not os.path.exists(path):
+        pytest.skip(f"Cache-Datei {path} nicht vorhanden.")
+    return pd.read_csv(path, index_col='timestamp', parse_dates=True).loc['2025-01-01':'2025-08-01']
+
+
+@pytest.fixture(scope="module")
+def strategies_data():
+    # htf == timeframe -> kein HTF-Download im Test
+    return {
+        'BTC/USDT:USDT_1h': {
+            'symbol': 'BTC/USDT:USDT', 'timeframe': '1h', 'htf': '1h', 'data': _cached_frame('BTC-USDT-USDT_1h'),
+            'smc_params': {'tenkan_period': 9, 'kijun_period': 26, 'senkou_span_b_period': 52, 'displacement': 26},
+            'risk_params': {'risk_per_trade_pct': 2.0, 'leverage': 10, 'risk_reward_ratio': 2.0},
+        },
+        'ETH/USDT:USDT_4h': {
+            'symbol': 'ETH/USDT:USDT', 'timeframe': '4h', 'htf': '4h', 'data': _cached_frame('ETH-USDT-USDT_4h'),
+            'smc_params': {'tenkan_period': 7, 'kijun_period': 22, 'senkou_span_b_period': 44, 'displacement': 26,
+                           'require_tk_cross': True},
+            'risk_params': {'risk_per_trade_pct': 3.0, 'leverage': 5, 'risk_reward_ratio': 1.5},
+        },
+    }
+
+
+@pytest.fixture
+def prepare_calls(monkeypatch):
+    """Zählt die Aufrufe von _prepare_strategy_artifacts (Symbole in Aufrufreihenfolge) bei leerem Cache."""
+    calls = []
+    original = portfolio_simulator._prepare_strategy_artifacts
+
+    def counting(strat, *args):
+        calls.append(strat['symbol'])
+        return original(strat, *args)
+
+    monkeypatch.setattr(portfolio_simulator, '_prepare_strategy_artifacts', counting)
+    portfolio_simulator.indicator_cache.clear()
+    yield calls
+
+
+def test_time_grid_marks_missing_bars():
+    """Zeitschritte ohne Kerze einer Strategie sind NaN bzw. -1 im Raster."""
+    index_1h = pd.date_range('2025-01-01', periods=4, freq='1h', tz='UTC')
+    frames = {
+        'a': pd.DataFrame({'high': [2., 3., 4., 5.], 'low': [1., 2., 3., 4.], 'close': [1.5, 2.5, 3.5, 4.5],
+                           'atr': [.1, .2, .3, .4]}, index=index_1h),
+        'b': pd.DataFrame({'high': [20., 40.], 'low': [10., 30.], 'close': [15., 35.], 'atr': [1., 2.]},
+                          index=index_1h[::2] + pd.Timedelta('30min')),
+    }
+    grid = build_time_grid({key: {'data': df} for key, df in frames.items()})
+
+    assert grid['keys'] == ['a', 'b']
+    assert grid['timestamps'].is_monotonic_increasing and len(grid['timestamps']) == 6
+    assert grid['position'][:, 0].tolist() == [0, -1, 1, 2, -1, 3]
+    assert grid['position'][:, 1].tolist() == [-1, 0, -1, -1, 1, -1]
+    np.testing.assert_array_equal(grid['close'][:, 1], [np.nan, 15., np.nan, np.nan, 35., np.nan])
+    np.testing.assert_array_equal(grid['atr'][[0, 2, 3, 5], 0], frames['a']['atr'])
+
+
+def test_htf_cloud_bias_uses_last_started_htf_candle():
+    """Bias wie Index.asof: letzte HTF-Kerze mit Eröffnungszeit <= ts."""
+    htf_index = pd.date_range('2025-01-01 04:00', periods=3, freq='4h', tz='UTC')
+    htf_df = pd.DataFrame({'close': [110., 90., 100.], 'senkou_span_a': [100., 100., np.nan],
+                           'senkou_span_b': [105., 95., 95.]}, index=htf_index)
+    ltf_index = pd.date_range('2025-01-01 00:00', periods=16, freq='1h', tz='UTC')
+
+    bias = htf_cloud_bias(htf_df, ltf_index)
+
+    assert list(bias[:4]) == [Bias.NEUTRAL] * 4
+    assert list(bias[4:8]) == [Bias.BULLISH] * 4
+    assert list(bias[8:12]) == [Bias.BEARISH] * 4
+    # max(nan, 95) ist nan -> weder über noch unter der Wolke
+    assert list(bias[12:]) == [Bias.NEUTRAL] * 4
+
+
+def test_htf_cloud_bias_waits_for_htf_close():
+    """Mit Timeframes zählt wie im Backtest nur die beim LTF-Schluss abgeschlossene HTF-Kerze."""
+    htf_index = pd.date_range('2025-01-01 04:00', periods=3, freq='4h', tz='UTC')
+    htf_df = pd.DataFrame({'close': [110., 90., 100.], 'senkou_span_a': [100., 100., np.nan],
+                           'senkou_span_b': [105., 95., 95.]}, index=htf_index)
+    ltf_index = pd.date_range('2025-01-01 00:00', periods=16, freq='1h', tz='UTC')
+
+    bias = htf_cloud_bias(htf_df, ltf_index, '1h', '4h')
+
+    # Die 04:00-Kerze schließt um 08:00 -> erst die LTF-Kerze 07:00 (Schluss 08:00) sieht sie
+    assert list(bias[:7]) == [Bias.NEUTRAL] * 7
+    assert list(bias[7:11]) == [Bias.BULLISH] * 4
+    assert list(bias[11:15]) == [Bias.BEARISH] * 4
+    assert bias[15] == Bias.NEUTRAL
+
+
+def test_portfolio_simulation_regression(strategies_data):
+    """Referenzwerte der ursprünglichen, DataFrame-basierten Simulation."""
+    result = run_portfolio_simulation(1000, strategies_data, '2025-01-01', '2025-08-01')
+
+    assert result['trade_count'] == 28
+    assert result['end_capital'] == pytest.approx(1074.1961721470461, abs=1e-9)
+    assert result['max_drawdown_pct'] == pytest.approx(14.446289349801017, abs=1e-9)
+    assert result['min_equity'] == pytest.approx(885.3274377617219, abs=1e-9)
+    assert result['max_drawdown_date'] == pd.Timestamp('2025-03-24 01:00:00+0000')
+    assert result['liquidation_date'] is None
+    assert len(result['equity_curve']) == 1583
+    assert result['equity_curve']['equity'].iloc[-1] == result['end_capital']
+
+
+def test_prepared_strategies_are_reused(strategies_data, prepare_calls):
+    """Die Vorbereitung läuft pro Config und Zeitraum nur einmal; Simulieren liefert dasselbe Ergebnis."""
+    expected = run_portfolio_simulation(1000, strategies_data, '2025-01-01', '2025-08-01')
+    prepared = prepare_strategies(strategies_data, '2025-01-01', '2025-08-01')
+    result = simulate_portfolio(1000, prepared)
+
+    assert len(prepare_calls) == len(strategies_data)
+    assert result['equity_curve'].equals(expected['equity_curve'])
+    assert {k: v for k, v in result.items() if k != 'equity_curve'} == \
+        {k: v for k, v in expected.items() if k != 'equity_curve'}
+
+    # Anderer Zeitraum -> eigener Cache-Eintrag
+    prepare_strategies(strategies_data, '2025-02-01', '2025-08-01')
+    assert len(prepare_calls) == 2 * len(strategies_data)
+
+
+def test_portfolio_optimizer_prepares_each_strategy_once(strategies_data, prepare_calls, monkeypatch, tmp_path):
+    """Der Greedy-Optimizer bereitet jede Strategie genau einmal vor."""
+    monkeypatch.setattr(portfolio_optimizer, 'PROJECT_ROOT', str(tmp_path))
+
+    files = {f"config_{key}.json": strat for key, strat in strategies_data.items()}
+    result = portfolio_optimizer.run_portfolio_optimizer(1000, files, '2025-01-01', '2025-08-01', 50.0)
+
+    assert sorted(prepare_calls) == sorted(strat['symbol'] for strat in strategies_data.values())
+    assert result['optimal_portfolio']
+
+
+def test_team_grid_matches_own_grid(strategies_data):
+    """Ein Team-Ausschnitt des gemeinsamen Rasters entspricht dem Raster des Teams allein."""
+    prepared = prepare_strategies(strategies_data, '2025-01-01', '2025-08-01')
+    keys = list(prepared)
+    grid = build_time_grid(prepared)
+
+    for columns in ([1], [1, 0]):
+        team = select_from_grid(grid, columns)
+        own = build_time_grid({keys[c]: prepared[keys[c]] for c in columns})
+        assert team['keys'] == own['keys'] and team['timestamps'].equals(own['timestamps'])
+        for name in GRID_MATRICES:
+            np.testing.assert_array_equal(team[name], own[name])
+
+
+def test_portfolio_optimizer_parallel_matches_sequential(strategies_data, monkeypatch, tmp_path):
+    """Der Prozess-Pool liefert dasselbe Portfolio (inkl. Gleichstands-Auflösung) wie die sequentielle Suche."""
+    monkeypatch.setattr(portfolio_optimizer, 'PROJECT_ROOT', str(tmp_path))
+    files = {f"config_{key}.json": strat for key, strat in strategies_data.items()}
+    files['config_SOL/USDT:USDT_1h.json'] = {
+        'symbol': 'SOL/USDT:USDT', 'timeframe': '1h', 'htf': '1h', 'data': _cached_frame('SOL-USDT-USDT_1h'),
+        'smc_params': {'tenkan_period': 9, 'kijun_period': 26, 'senkou_span_b_period': 52, 'displacement': 26},
+        'risk_params': {'risk_per_trade_pct': 2.0, 'leverage': 10, 'risk_reward_ratio': 2.0},
+    }
+    # Zwei identische Kandidaten (gleiches Ergebnis) -> der frühere im Pool muss gewinnen
+    files['config_BTC/USDT:USDT_1h_copy.json'] = {**files['config_BTC/USDT:USDT_1h.json'], 'timeframe': '1h '}
+
+    sequential = portfolio_optimizer.run_portfolio_optimizer(1000, files, '2025-01-01', '2025-08-01', 50.0, workers=1,
+                                                             screen_top_k=None)
+    parallel = portfolio_optimizer.run_portfolio_optimizer(1000, files, '2025-01-01', '2025-08-01', 50.0, workers=2,
+                                                           screen_top_k=None)
+    # Screening mit nur einem Finalisten pro Runde findet hier dasselbe Portfolio
+    screened = portfolio_optimizer.run_portfolio_optimizer(1000, files, '2025-01-01', '2025-08-01', 50.0, workers=1,
+                                                           screen_top_k=1)
+
+    assert parallel['optimal_portfolio'] == sequential['optimal_portfolio']
+    assert 'config_BTC/USDT:USDT_1h.json' in parallel['optimal_portfolio']
+    assert 'config_BTC/USDT:USDT_1h_copy.json' not in parallel['optimal_portfolio']
+    assert parallel['final_result']['equity_curve'].equals(sequential['final_result']['equity_curve'])
+    assert parallel['final_result']['end_capital'] == sequential['final_result']['end_capital']
+    assert screened['optimal_portfolio'] == sequential['optimal_portfolio']
+    assert not (tmp_path / 'artifacts' / 'tmp').exists() or not any((tmp_path / 'artifacts' / 'tmp').iterdir())
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Füge das Projektverzeichnis zum Python-Pfad hinzu
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.analysis import result_cache
+from utbot2.analysis.result_cache import ResultCache, cached_run_backtest, result_key
+
+
+def test_result_key_depends_on_all_inputs():
+    """Jede Änderung an Daten, Parametern oder Engine-Version ergibt einen neuen Schlüssel."""
+    strategy = {'tenkan_period': 9, 'kijun_period': 26}
+    risk = {'leverage': 10, 'risk_reward_ratio': 2.0}
+    base = result_key('fp', strategy, risk, 1000)
+
+    assert base == result_key('fp', dict(reversed(list(strategy.items()))), risk, 1000)
+    assert base != result_key('fp2', strategy, risk, 1000)
+    assert base != result_key('fp', {**strategy, 'tenkan_period': 10}, risk, 1000)
+    assert base != result_key('fp', strategy, {**risk, 'leverage': 5}, 1000)
+    assert base != result_key('fp', strategy, risk, 2000)
+    assert base != result_key('fp', strategy, risk, 1000, abort_max_drawdown=0.3)
+    assert base != result_key('fp', strategy, risk, 1000, htf_fingerprint='htf')
+
+    original = result_cache.BACKTEST_ENGINE_VERSION
+    try:
+        result_cache.BACKTEST_ENGINE_VERSION = original + '-next'
+        assert base != result_key('fp', strategy, risk, 1000)
+    finally:
+        result_cache.BACKTEST_ENGINE_VERSION = original
+
+
+def test_cache_persists_and_evicts_least_recently_used(tmp_path):
+    """Einträge überleben eine neue Instanz; evict() entfernt die am längsten ungenutzten."""
+    path = str(tmp_path / 'results.sqlite')
+    cache = ResultCache(path, max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, {'total_pnl_pct': float(ord(key))})
+        time.sleep(0.01)
+    assert cache.get('a') == {'total_pnl_pct': 97.0}  # 'a' zuletzt gelesen -> 'b' ist der älteste
+
+    reopened = ResultCache(path, max_entries=2)
+    reopened.evict()
+
+    assert len(reopened) == 2
+    assert reopened.get('b') is None
+    assert reopened.get('c') == {'total_pnl_pct': 99.0}
+
+
+def test_cached_run_backtest_skips_simulation_on_hit(tmp_path, monkeypatch):
+    """Ein zweiter identischer Aufruf liefert das gespeicherte Ergebnis ohne Backtest."""
+    calls = []
+
+    def fake_backtest(data, strategy_params, risk_params, start_capital, **kwargs):
+        calls.append(kwargs)
+        return {'total_pnl_pct': 12.5, 'trades_count': 3}
+
+    monkeypatch.setattr(result_cache, 'run_backtest', fake_backtest)
+    cache = ResultCache(str(tmp_path / 'results.sqlite'))
+    index = pd.date_range('2025-01-01', periods=50, freq='1h', tz='UTC')
+    data = pd.DataFrame({col: np.linspace(1, 2, 50) for col in ('open', 'high', 'low', 'close')}, index=index)
+
+    first = cached_run_backtest(data, {'tenkan_period': 9}, {'leverage': 10}, 1000, cache=cache)
+    second = cached_run_backtest(data.copy(), {'tenkan_period': 9}, {'leverage': 10}, 1000, cache=cache)
+    cached_run_backtest(data, {'tenkan_period': 9}, {'leverage': 10}, 1000, cache=cache, abort_max_drawdown=0.3)
+
+    assert first == second == {'total_pnl_pct': 12.5, 'trades_count': 3}
+    assert len(calls) == 2
+
+
+def test_cached_run_backtest_keys_on_htf_data(tmp_path, monkeypatch):
+    """Geänderte HTF-Daten (Supertrend-Bias) bei gleichen LTF-Daten führen zu einem neuen Backtest."""
+    calls = []
+    htf = {'fingerprint': 'htf-1'}
+    monkeypatch.setattr(result_cache, 'run_backtest', lambda *args, **kwargs: calls.append(1) or {'total_pnl_pct': 1.0})
+    monkeypatch.setattr(result_cache, 'load_htf_data', lambda *args: (None, htf['fingerprint']))
+    cache = ResultCache(str(tmp_path / 'results.sqlite'))
+    index = pd.date_range('2025-01-01', periods=50, freq='1h', tz='UTC')
+    data = pd.DataFrame({col: np.linspace(1, 2, 50) for col in ('open', 'high', 'low', 'close')}, index=index)
+    strategy = {'symbol': 'BTC/USDT:USDT', 'timeframe': '1h', 'htf': '4h'}
+
+    cached_run_backtest(data, strategy, {'leverage': 10}, 1000, cache=cache)
+    cached_run_backtest(data, strategy, {'leverage': 10}, 1000, cache=cache)
+    htf['fingerprint'] = 'htf-2'
+    cached_run_backtest(data, strategy, {'leverage': 10}, 1000, cache=cache)
+
+    assert len(calls) == 2
+
+
+def test_cached_run_backtest_bypasses_precomputed_inputs(tmp_path, monkeypatch):
+    """Vorberechnete Eingaben stehen nicht im Schlüssel -> solche Läufe werden weder gelesen noch gespeichert."""
+    calls = []
+    monkeypatch.setattr(result_cache, 'run_backtest', lambda *args, **kwargs: calls.append(1) or {'total_pnl_pct': 1.0})
+    cache = ResultCache(str(tmp_path / 'results.sqlite'))
+    index = pd.date_range('2025-01-01', periods=50, freq='1h', tz='UTC')
+    data = pd.DataFrame({col: np.linspace(1, 2, 50) for col in ('open', 'high', 'low', 'close')}, index=index)
+
+    cached_run_backtest(data, {'tenkan_period': 9}, {'leverage': 10}, 1000, cache=cache)
+    cached_run_backtest(data, {'tenkan_period': 9}, {'leverage': 10}, 1000, cache=cache, entry_signals=np.zeros(50))
+    cached_run_backtest(data, {'tenkan_period': 9}, {'leverage': 10}, 1000, cache=cache, processed_data=data)
+
+    assert len(calls) == 3
+    assert len(cache) == 1
@@ -0,0 +1,61 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Füge das Projektverzeichnis zum Python-Pfad hinzu
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from utbot2.analysis.backtester import add_atr
+from utbot2.analysis.indicator_cache import dataset_fingerprint
+from utbot2.analysis.signal_grid import SignalGrid, load_or_build_signal_grid
+from utbot2.strategy.ichimoku_engine import IchimokuBatch, IchimokuEngine
+from utbot2.strategy.trade_logic import get_titan_signals
+
+CACHE_DIR = os.path.join(PROJECT_ROOT, 'data', 'cache')
+
+
+@pytest.fixture(scope="module")
+def btc_batch():
+    path = os.path.join(CACHE_DIR, 'BTC-USDT-USDT_1h.csv')
+    if not os.path.exists(path):
+        pytest.skip(f"Cache-Datei {path} nicht vorhanden.")
+    data = pd.read_csv(path, index_col='timestamp', parse_dates=True).iloc[-1500:]
+    return IchimokuBatch(add_atr(data.copy())), dataset_fingerprint(data)
+
+
+def test_grid_signals_match_direct_computation(btc_batch):
+    """Jede Raster-Kombination entspricht get_titan_signals auf dem IchimokuEngine-Frame."""
+    batch, fingerprint = btc_batch
+    grid = SignalGrid.build(batch, fingerprint, [7, 9], [26], [44, 52])
+
+    assert len(grid.combos) == 8
+    for tenkan, kijun, senkou, require_tk_cross in grid.combos:
+        settings = {'tenkan_period': tenkan, 'kijun_period': kijun, 'senkou_span_b_period': senkou,
+                    'displacement': 26, 'require_tk_cross': require_tk_cross}
+        expected = get_titan_signals(IchimokuEngine(settings=settings).process_dataframe(batch.df),
+                                     {'strategy': settings})
+        assert np.array_equal(grid.signals(tenkan, kijun, senkou, require_tk_cross), expected)
+    assert (9, 26, 52, False) in grid and (10, 26, 52, False) not in grid
+
+
+def test_grid_is_reused_until_the_dataset_changes(btc_batch, tmp_path):
+    """Gleicher Fingerprint -> Datei wird geladen; neue Kerzen (anderer Fingerprint) -> Neuaufbau."""
+    batch, fingerprint = btc_batch
+    path = str(tmp_path / 'BTC-USDT-USDT_1h.signals.npz')
+
+    grid, built = load_or_build_signal_grid(path, batch, fingerprint, [9], [26], [52])
+    assert built and os.path.exists(path)
+
+    reloaded, built = load_or_build_signal_grid(path, batch, fingerprint, [9], [26], [52])
+    assert not built
+    assert np.array_equal(reloaded.long_bits, grid.long_bits) and np.array_equal(reloaded.short_bits, grid.short_bits)
+    assert np.array_equal(reloaded.signals(9, 26, 52, True), grid.signals(9, 26, 52, True))
+
+    _, built = load_or_build_signal_grid(path, batch, 'neue-kerzen', [9], [26], [52])
+    assert built
+    _, built = load_or_build_signal_grid(path, batch, 'neue-kerzen', [9, 10], [26], [52])
+    assert built  # Raster deckt den größeren Suchraum noch nicht ab